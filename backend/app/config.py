@@ -24,6 +24,74 @@ class Settings(BaseSettings):
     from_email: str = ""
     frontend_url: str = "http://localhost:3000"
 
+    scraper_api_url: str = "http://api.scraperapi.com"  # point at benchmarks/fake_upstream.py for offline runs
+    scraper_timeout: float = 70.0
+    scraper_max_connections: int = 20
+    scraper_max_concurrency: int = 10
+
+    batch_max_asins: int = 500
+    batch_scrape_concurrency: int = 8
+
+    refresh_scheduler_enabled: bool = True
+    refresh_interval_hours: float = 5.0
+    refresh_scrapes_per_minute: int = 30
+    refresh_popularity_boost_seconds: int = 1800
+    refresh_poll_seconds: float = 30.0
+    refresh_lease_backend: str = ""  # "", "db" or "redis" when running several workers
+
+    keyword_suggest_url: str = "https://completion.amazon.com/api/2017/suggestions"
+    keyword_suggest_rate: float = 10.0  # autocomplete calls per second, process-wide
+    keyword_suggest_burst: float = 10.0
+    keyword_seed_count: int = 5
+    keyword_expand_depth: int = 2
+    keyword_second_level_seeds: int = 6
+    keyword_budget_seconds: float = 2.0
+
+    auth_principal_ttl_seconds: int = 30  # bounds how stale another worker's view of a user can get
+    auth_cache_max_entries: int = 10000
+
+    quota_backend: str = "memory"  # "redis" keeps counters exact across several uvicorn workers
+    web_concurrency: int = 1  # worker processes (WEB_CONCURRENCY, uvicorn's --workers default); >1 requires quota_backend="redis"
+    quota_burst_capacity: float = 10.0  # requests per user before the refill rate applies
+    quota_refill_per_second: float = 1.0
+    quota_flush_interval_seconds: float = 30.0
+    quota_flush_batch_size: int = 500
+
+    cache_backend: str = "memory"  # "memory" or "redis"
+    cache_max_entries: int = 10000
+    cache_ttl_keywords: int = 86400
+
+    competitor_crawl_enabled: bool = True
+    competitor_crawl_interval_hours: float = 24.0  # bestseller lists are recrawled once this old
+    competitor_crawl_poll_seconds: float = 60.0
+    competitor_crawl_concurrency: int = 4  # categories crawled at once; each fetches its pages concurrently too
+    competitor_crawl_max_pages: int = 5
+    competitor_snapshot_retention_days: int = 90  # 0 keeps every crawl
+    competitors_per_product: int = 20
+
+    http_cache_max_age_seconds: int = 60  # clients revalidate with If-None-Match after this
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 5  # 4-6 is the usual speed/size balance for dynamic responses
+
+    metrics_enabled: bool = True
+    metrics_sql_enabled: bool = True  # per-statement cursor hooks; the only part with a measurable cost
+    metrics_n_plus_one_threshold: int = 10  # log a request that runs one statement more often than this; 0 disables
+
+    profit_grid_max_cells: int = 50000
+
+    history_storage_mode: str = "changes"  # "changes" extends the last row when nothing moved, "full" always inserts
+    history_raw_retention_days: int = 180  # 0 keeps raw PriceHistory forever
+    history_hourly_retention_days: int = 365  # day and week rollups are kept forever
+    history_retention_interval_hours: float = 24.0
+    history_default_points: int = 200
+
+    page_archive_enabled: bool = True
+    page_archive_dir: str = "./page_archive"
+    page_archive_codec: str = "zstd"  # falls back to gzip when zstandard isn't installed
+    scraper_replay: bool = False  # serve fetches from the page archive instead of ScraperAPI
+
     class Config:
         env_file = ".env"
         case_sensitive = False
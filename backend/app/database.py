@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
+import threading
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./amazon_intel.db")
 
@@ -9,12 +13,133 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./amazon_intel.db")
 if "postgresql" in DATABASE_URL or "postgres" in DATABASE_URL:
     DATABASE_URL = "sqlite:///./amazon_intel.db"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+# "tuned" (default) enables WAL and the pragmas below; "default" is the
+# plain driver setup, kept for comparison benchmarks and odd filesystems
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+TUNED_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size=-65536",  # 64 MB page cache per connection
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url.rstrip("/") not in ("sqlite:", "sqlite+pysqlite:")
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in TUNED_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def build_engine(url: str, profile: str = SQLITE_PROFILE):
+    if profile != "tuned" or not _is_file_sqlite(url):
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    tuned = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=3600,
+    )
+    event.listen(tuned, "connect", _set_pragmas)
+    return tuned
+
+
+def build_async_engine(url: str, profile: str = SQLITE_PROFILE):
+    """aiosqlite engine for async route handlers; same pragmas as the sync engine"""
+    async_url = url.replace("sqlite://", "sqlite+aiosqlite://", 1) if url.startswith("sqlite://") else url
+    if profile != "tuned" or not _is_file_sqlite(url):
+        return create_async_engine(async_url)
+
+    tuned = create_async_engine(
+        async_url,
+        connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=3600,
+    )
+    event.listen(tuned.sync_engine, "connect", _set_pragmas)
+    return tuned
+
+
+engine = build_engine(DATABASE_URL)
+async_engine = build_async_engine(DATABASE_URL)
+
+
+# SQLite allows one writer at a time. Rather than letting sessions race for
+# the file lock (and surface "database is locked"), writers in this process
+# queue on one lock from their first write until the transaction ends.
+# A write is a flush, or a statement run through Session.execute() that
+# modifies rows (bulk/Core DML and text() DML never flush), or begin_write().
+# Readers never take it, and WAL keeps them off the writer's path.
+_write_lock = threading.Lock()
+
+_DML_PREFIXES = ("insert", "update", "delete", "replace", "begin immediate")
+
+
+def _is_dml(orm_execute_state) -> bool:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        return True
+    statement = orm_execute_state.statement
+    return isinstance(statement, TextClause) and statement.text.lstrip().lower().startswith(_DML_PREFIXES)
+
+
+def enable_write_serialization(session_factory, lock: threading.Lock = _write_lock):
+    def _take(session):
+        if not session.info.get("holds_write_lock"):
+            # Bounded wait so a misbehaving session can't wedge every writer;
+            # past the timeout SQLite's own busy handling takes over
+            if lock.acquire(timeout=SQLITE_BUSY_TIMEOUT_MS / 1000):
+                session.info["holds_write_lock"] = True
+
+    @event.listens_for(session_factory, "before_flush")
+    def _acquire(session, flush_context, instances):
+        _take(session)
+
+    @event.listens_for(session_factory, "do_orm_execute")
+    def _acquire_for_statement(orm_execute_state):
+        if _is_dml(orm_execute_state):
+            session = orm_execute_state.session
+            session.connection()  # begin now, so after_transaction_end is sure to release
+            _take(session)
+
+    @event.listens_for(session_factory, "after_transaction_end")
+    def _release(session, transaction):
+        if transaction.parent is None and session.info.pop("holds_write_lock", False):
+            lock.release()
+
+
+def begin_write(session):
+    """Open session's transaction as a writer, before anything is read.
+
+    For read-modify-write jobs: the process lock and SQLite's own write lock
+    are held from the first read until commit, so no other writer (in this
+    process or another) can change the rows that were read.
+    """
+    session.execute(text("BEGIN IMMEDIATE"))
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if SQLITE_PROFILE == "tuned" and _is_file_sqlite(DATABASE_URL):
+    enable_write_serialization(SessionLocal)
+
+# Async sessions are for reads. The write lock is a threading.Lock, which must not be
+# waited on from the event loop, so async code writes through SessionLocal in
+# asyncio.to_thread instead (see store_analyses, refresh._save).
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -22,4 +147,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
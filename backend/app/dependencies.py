@@ -1,29 +1,111 @@
+import math
+import time
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.config import settings
+from app.services.cache import InMemoryCache
+from app.services.quota import quotas, seconds_until_next_period
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
+# Verified claims per token string (until the token expires) and the user
+# row per subject (for a short TTL). Both are per process; the principal
+# TTL is what bounds staleness for changes made by another worker.
+claims_cache = InMemoryCache(settings.auth_cache_max_entries)
+principal_cache = InMemoryCache(settings.auth_cache_max_entries)
+
+# Columns a principal carries. The password hash and usage counters stay
+# out: nothing downstream of auth needs them and counters go stale fast.
+PRINCIPAL_FIELDS = ("id", "email", "full_name", "plan", "search_limit", "is_active", "is_verified", "created_at")
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    state = inspect(target)
+    if state.deleted or any(state.attrs[name].history.has_changes() for name in PRINCIPAL_FIELDS):
+        principal_cache.discard(str(target.id))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_update(orm_execute_state):
+    # update(User) / query(User).update() skip the per-row hooks above;
+    # drop every principal once such a statement commits
+    if orm_execute_state.is_update and any(m.class_ is User for m in orm_execute_state.all_mappers):
+        orm_execute_state.session.info["users_bulk_updated"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_bulk(session):
+    if session.info.pop("users_bulk_updated", False):
+        principal_cache.discard()
+
+
+async def _verified_claims(token: str) -> dict:
+    claims = await claims_cache.get(token)
+    if claims is not None and claims.get("exp", 0) > time.time():
+        return claims
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: str = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    claims = {"sub": payload.get("sub"), "exp": payload.get("exp") or 0}
+    ttl = int(claims["exp"] - time.time())
+    if ttl > 0:
+        await claims_cache.set(token, claims, ttl)
+    return claims
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    if not user.is_active:
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """The caller's user, as a detached User built from cached principal fields"""
+    claims = await _verified_claims(credentials.credentials)
+    user_id: str = claims["sub"]
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    fields = await principal_cache.get(user_id)
+    if fields is None:
+        row = (await db.execute(select(User).where(User.id == user_id))).scalars().first()
+        if not row:
+            raise HTTPException(status_code=401, detail="User not found")
+        fields = {name: getattr(row, name) for name in PRINCIPAL_FIELDS}
+        await principal_cache.set(user_id, fields, settings.auth_principal_ttl_seconds)
+
+    if not fields["is_active"]:
         raise HTTPException(status_code=403, detail="Account deactivated")
-    return user
\ No newline at end of file
+    # A fresh transient instance per request, so no request can mutate another's principal
+    return User(**fields)
+
+
+async def rate_limited_user(current_user: User = Depends(get_current_user)) -> User:
+    """get_current_user for scrape-triggering routes: also draws on the caller's burst budget"""
+    wait = await quotas.take_request(str(current_user.id))
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+    return current_user
+
+
+async def charge_searches(user: User, cost: int = 1):
+    """Count searches that go upstream against the user's monthly search_limit"""
+    if cost <= 0:
+        return
+    result = await quotas.charge(str(user.id), user.search_limit, cost)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Monthly search limit reached ({result.used}/{user.search_limit}, this request needs {cost})",
+            headers={"Retry-After": str(seconds_until_next_period())},
+        )
@@ -1,20 +1,34 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from app.config import settings
-from app.database import Base, engine
+from app.database import engine, async_engine
+from app.migrations import run_migrations
+from app.services.amazon.scraper_client import close_clients
+from app.services.cache import cache
+from app.services.compression import CompressionMiddleware
+from app.services.metrics import MetricsMiddleware, instrument_engine, registry
+from app.services.quota import quotas
+from app.tasks.competitor_crawl import crawler
+from app.tasks.history_retention import retention
+from app.tasks.quota_flush import quota_flusher
+from app.tasks.refresh_scheduler import scheduler
 from app.routers import auth, products, keywords, competitors, profit, analysis
 
 try:
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created")
+    applied = run_migrations(engine)
 except Exception as e:
-    print(f"⚠️ DB connection issue: {e}")
+    # Serving against a half-migrated schema fails later and less clearly; refuse to start
+    print(f"❌ Database migration failed: {e}")
+    raise
+print(f"✅ Database schema up to date ({', '.join(applied) or 'no pending migrations'})")
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -23,6 +37,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
+)
+
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    if settings.metrics_sql_enabled:
+        instrument_engine(engine)
+        instrument_engine(async_engine.sync_engine)
+
+registry.collected(
+    "cache_requests_total", "Response cache lookups", "counter", ("namespace", "result"),
+    lambda: [((ns, "hit"), n) for ns, n in list(cache.hits.items())]
+    + [((ns, "miss"), n) for ns, n in list(cache.misses.items())],
+)
+registry.collected(
+    "cache_hit_ratio", "Response cache hit ratio since start", "gauge", ("namespace",),
+    lambda: [((ns,), s["hit_ratio"]) for ns, s in cache.stats()["namespaces"].items()],
+)
+registry.collected(
+    "quota_rejections_total", "Requests refused with 429", "counter", ("reason",),
+    lambda: [(("burst",), quotas.throttled_total), (("monthly",), quotas.exhausted_total)],
+)
+registry.collected(
+    "refresh_queue_due", "Tracked products due for a refresh", "gauge", (),
+    lambda: [((), scheduler.stats()["queue_depth_due"])],
 )
 
 app.include_router(auth.router)
@@ -32,10 +74,48 @@ app.include_router(competitors.router)
 app.include_router(profit.router)
 app.include_router(analysis.router)
 
+@app.on_event("startup")
+async def startup():
+    if settings.refresh_scheduler_enabled:
+        scheduler.start()
+    if settings.competitor_crawl_enabled:
+        crawler.start()
+    retention.start()
+    quota_flusher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await scheduler.stop()
+    await crawler.stop()
+    await retention.stop()
+    await quota_flusher.stop()
+    await close_clients()
+    await async_engine.dispose()
+
 @app.get("/")
 def root():
     return {"app": settings.app_name, "version": settings.app_version, "status": "running"}
 
 @app.get("/health")
 def health():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/health/refresh")
+def refresh_health():
+    return scheduler.stats()
+
+@app.get("/health/competitors")
+def competitors_health():
+    return crawler.stats()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/cache")
+def cache_health():
+    return cache.stats()
+
+@app.get("/health/quota")
+def quota_health():
+    return {**quotas.stats(), "flushed_total": quota_flusher.flushed_total}
\ No newline at end of file
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.migrations import (
+    v001_initial, v002_latest_snapshot, v003_hot_path_indexes, v004_page_archive, v005_price_rollups,
+    v006_history_runs, v007_user_quota_period, v008_competitor_snapshots, v009_product_analyses,
+    v010_product_updated_at,
+)
+
+# Applied in order; each module exposes VERSION, NAME and upgrade(conn).
+# Migrations are frozen SQL for the schema at their own version and never
+# import models or services, which move on. Databases created by
+# create_all before migrations existed may already have some of what a
+# migration adds, so each one checks before creating or altering.
+MIGRATIONS = [
+    v001_initial, v002_latest_snapshot, v003_hot_path_indexes, v004_page_archive, v005_price_rollups,
+    v006_history_runs, v007_user_quota_period, v008_competitor_snapshots, v009_product_analyses,
+    v010_product_updated_at,
+]
+
+
+def current_version(conn) -> int:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def run_migrations(engine) -> list:
+    """Bring the database up to the latest schema version, one transaction per migration"""
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.VERSION <= version:
+            continue
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": migration.VERSION, "name": migration.NAME, "applied_at": datetime.now(timezone.utc)},
+            )
+        applied.append(migration.NAME)
+    return applied
@@ -0,0 +1,77 @@
+from sqlalchemy import text
+
+VERSION = 1
+NAME = "initial"
+
+# The schema as it stood before migrations existed (main.py ran create_all).
+# Frozen here: later changes belong in their own migration, never in this list.
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id VARCHAR(36) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        full_name VARCHAR(255),
+        "plan" VARCHAR(20),
+        monthly_searches INTEGER,
+        search_limit INTEGER,
+        is_active BOOLEAN,
+        is_verified BOOLEAN,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (email)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        id VARCHAR(36) NOT NULL,
+        asin VARCHAR(10) NOT NULL,
+        title TEXT,
+        brand VARCHAR(255),
+        category VARCHAR(255),
+        image_url TEXT,
+        amazon_url TEXT,
+        is_prime BOOLEAN,
+        last_synced_at DATETIME,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        PRIMARY KEY (id),
+        UNIQUE (asin)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS price_history (
+        id VARCHAR(36) NOT NULL,
+        product_id VARCHAR(36) NOT NULL,
+        price NUMERIC(10, 2),
+        bsr INTEGER,
+        rating NUMERIC(3, 2),
+        review_count INTEGER,
+        in_stock BOOLEAN,
+        recorded_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tracked_products (
+        id VARCHAR(36) NOT NULL,
+        user_id VARCHAR(36) NOT NULL,
+        product_id VARCHAR(36) NOT NULL,
+        tracked_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        PRIMARY KEY (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS refresh_leases (
+        asin VARCHAR(10) NOT NULL,
+        owner VARCHAR(64) NOT NULL,
+        expires_at DATETIME NOT NULL,
+        PRIMARY KEY (asin)
+    )
+    """,
+]
+
+
+def upgrade(conn):
+    for ddl in TABLES:
+        conn.execute(text(ddl))
@@ -0,0 +1,38 @@
+from sqlalchemy import inspect, text
+
+VERSION = 2
+NAME = "latest_snapshot"
+
+LATEST_COLUMNS = {
+    "latest_snapshot_id": "VARCHAR(36)",
+    "latest_price": "NUMERIC(10, 2)",
+    "latest_bsr": "INTEGER",
+    "latest_rating": "NUMERIC(3, 2)",
+    "latest_review_count": "INTEGER",
+    "latest_in_stock": "BOOLEAN",
+    "latest_recorded_at": "DATETIME",
+}
+
+# Only price_history columns that exist at this version; later migrations add more
+BACKFILL = """
+UPDATE products SET (
+    latest_snapshot_id, latest_price, latest_bsr, latest_rating,
+    latest_review_count, latest_in_stock, latest_recorded_at
+) = (
+    SELECT h.id, h.price, h.bsr, h.rating, h.review_count, h.in_stock, h.recorded_at
+    FROM price_history h
+    WHERE h.product_id = products.id
+    ORDER BY h.recorded_at DESC, h.rowid DESC
+    LIMIT 1
+)
+WHERE latest_snapshot_id IS NULL
+  AND EXISTS (SELECT 1 FROM price_history h WHERE h.product_id = products.id)
+"""
+
+
+def upgrade(conn):
+    existing = {c["name"] for c in inspect(conn).get_columns("products")}
+    for name, column_type in LATEST_COLUMNS.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE products ADD COLUMN {name} {column_type}"))
+    conn.execute(text(BACKFILL))
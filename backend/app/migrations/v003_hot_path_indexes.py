@@ -0,0 +1,24 @@
+from sqlalchemy import text
+
+VERSION = 3
+NAME = "hot_path_indexes"
+
+
+def upgrade(conn):
+    # Keep the oldest row of any duplicated tracking pair so the unique index can be built
+    conn.execute(text(
+        "DELETE FROM tracked_products WHERE rowid NOT IN ("
+        "SELECT MIN(rowid) FROM tracked_products GROUP BY user_id, product_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_price_history_product_recorded "
+        "ON price_history (product_id, recorded_at)"
+    ))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_tracked_products_user_product "
+        "ON tracked_products (user_id, product_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_tracked_products_product "
+        "ON tracked_products (product_id)"
+    ))
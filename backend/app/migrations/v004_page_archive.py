@@ -0,0 +1,27 @@
+from sqlalchemy import inspect, text
+
+VERSION = 4
+NAME = "page_archive"
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS raw_pages (
+    id VARCHAR(36) NOT NULL,
+    url TEXT NOT NULL,
+    asin VARCHAR(10),
+    kind VARCHAR(20) NOT NULL,
+    sha256 VARCHAR(64) NOT NULL,
+    status_code INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    fetched_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (id)
+)
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(CREATE_TABLE))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_raw_pages_asin_fetched ON raw_pages (asin, fetched_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_raw_pages_url_fetched ON raw_pages (url, fetched_at)"))
+    existing = {c["name"] for c in inspect(conn).get_columns("price_history")}
+    if "page_sha256" not in existing:
+        conn.execute(text("ALTER TABLE price_history ADD COLUMN page_sha256 VARCHAR(64)"))
@@ -0,0 +1,71 @@
+from sqlalchemy import text
+
+VERSION = 5
+NAME = "price_rollups"
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS price_rollups (
+    product_id VARCHAR(36) NOT NULL,
+    resolution VARCHAR(8) NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    samples INTEGER NOT NULL,
+    last_recorded_at DATETIME,
+    price_min FLOAT,
+    price_max FLOAT,
+    price_sum FLOAT,
+    price_n INTEGER NOT NULL,
+    price_last FLOAT,
+    bsr_min INTEGER,
+    bsr_max INTEGER,
+    bsr_sum FLOAT,
+    bsr_n INTEGER NOT NULL,
+    bsr_last INTEGER,
+    review_count_min INTEGER,
+    review_count_max INTEGER,
+    review_count_sum FLOAT,
+    review_count_n INTEGER NOT NULL,
+    review_count_last INTEGER,
+    PRIMARY KEY (product_id, resolution, bucket_start)
+)
+"""
+
+# Bucket starts in the format SQLAlchemy stores DATETIME in, so later upserts hit the same keys.
+# Weeks start on Monday.
+BUCKETS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00.000000', recorded_at)",
+    "day": "strftime('%Y-%m-%d 00:00:00.000000', recorded_at)",
+    "week": "strftime('%Y-%m-%d 00:00:00.000000', recorded_at, '-6 days', 'weekday 1')",
+}
+METRICS = ("price", "bsr", "review_count")
+
+# Every price_history row at this version is one observation at recorded_at
+# (runs with valid_until/repeat_count only arrive in v006). min/max/sum/n
+# cover non-null values; *_last is the value of the bucket's latest row.
+REBUILD = """
+INSERT INTO price_rollups (
+    product_id, resolution, bucket_start, samples, last_recorded_at,
+    {columns}
+)
+SELECT product_id, :resolution, bucket, COUNT(*), MAX(recorded_at),
+    {aggregates}
+FROM (
+    SELECT product_id, recorded_at, CAST(price AS FLOAT) AS price, bsr, review_count,
+        {bucket} AS bucket,
+        ROW_NUMBER() OVER (PARTITION BY product_id, {bucket} ORDER BY recorded_at DESC, rowid DESC) AS position
+    FROM price_history
+    WHERE recorded_at IS NOT NULL
+)
+GROUP BY product_id, bucket
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(CREATE_TABLE))
+    conn.execute(text("DELETE FROM price_rollups"))
+    columns = ", ".join(f"{m}_{s}" for m in METRICS for s in ("min", "max", "sum", "n", "last"))
+    aggregates = ", ".join(
+        f"MIN({m}), MAX({m}), SUM({m}), COUNT({m}), MAX(CASE WHEN position = 1 THEN {m} END)" for m in METRICS
+    )
+    for resolution, bucket in BUCKETS.items():
+        sql = REBUILD.format(columns=columns, aggregates=aggregates, bucket=bucket)
+        conn.execute(text(sql), {"resolution": resolution})
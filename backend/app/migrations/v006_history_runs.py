@@ -0,0 +1,12 @@
+from sqlalchemy import inspect, text
+
+VERSION = 6
+NAME = "history_runs"
+
+
+def upgrade(conn):
+    existing = {c["name"] for c in inspect(conn).get_columns("price_history")}
+    if "valid_until" not in existing:
+        conn.execute(text("ALTER TABLE price_history ADD COLUMN valid_until DATETIME"))
+    if "repeat_count" not in existing:
+        conn.execute(text("ALTER TABLE price_history ADD COLUMN repeat_count INTEGER NOT NULL DEFAULT 1"))
@@ -0,0 +1,10 @@
+from sqlalchemy import inspect, text
+
+VERSION = 7
+NAME = "user_quota_period"
+
+
+def upgrade(conn):
+    existing = {c["name"] for c in inspect(conn).get_columns("users")}
+    if "quota_period" not in existing:
+        conn.execute(text("ALTER TABLE users ADD COLUMN quota_period VARCHAR(7)"))
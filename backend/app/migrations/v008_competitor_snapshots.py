@@ -0,0 +1,45 @@
+from sqlalchemy import text
+
+VERSION = 8
+NAME = "competitor_snapshots"
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS competitor_crawls (
+        category VARCHAR(255) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        crawl_id VARCHAR(36),
+        pages INTEGER NOT NULL,
+        items INTEGER NOT NULL,
+        total_monthly_sales INTEGER,
+        requested_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        crawled_at DATETIME,
+        PRIMARY KEY (category)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS competitor_snapshots (
+        id VARCHAR(36) NOT NULL,
+        crawl_id VARCHAR(36) NOT NULL,
+        category VARCHAR(255) NOT NULL,
+        rank INTEGER NOT NULL,
+        asin VARCHAR(10) NOT NULL,
+        title TEXT,
+        price NUMERIC(10, 2),
+        rating NUMERIC(3, 2),
+        review_count INTEGER,
+        monthly_sales INTEGER,
+        market_share FLOAT,
+        crawled_at DATETIME NOT NULL,
+        PRIMARY KEY (id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_competitor_snapshots_crawl_rank ON competitor_snapshots (crawl_id, rank)",
+    "CREATE INDEX IF NOT EXISTS ix_competitor_snapshots_asin_crawled ON competitor_snapshots (asin, crawled_at)",
+    "CREATE INDEX IF NOT EXISTS ix_competitor_snapshots_crawled ON competitor_snapshots (crawled_at)",
+]
+
+
+def upgrade(conn):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
@@ -0,0 +1,21 @@
+from sqlalchemy import text
+
+VERSION = 9
+NAME = "product_analyses"
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS product_analyses (
+    product_id VARCHAR(36) NOT NULL,
+    snapshot_id VARCHAR(36) NOT NULL,
+    sales_estimate_monthly INTEGER,
+    revenue_estimate_monthly FLOAT,
+    opportunity_score FLOAT,
+    analysis JSON NOT NULL,
+    computed_at DATETIME NOT NULL,
+    PRIMARY KEY (product_id)
+)
+"""
+
+
+def upgrade(conn):
+    conn.execute(text(CREATE_TABLE))
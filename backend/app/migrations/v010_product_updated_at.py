@@ -0,0 +1,10 @@
+from sqlalchemy import inspect, text
+
+VERSION = 10
+NAME = "product_updated_at"
+
+
+def upgrade(conn):
+    existing = {c["name"] for c in inspect(conn).get_columns("products")}
+    if "updated_at" not in existing:
+        conn.execute(text("ALTER TABLE products ADD COLUMN updated_at DATETIME"))
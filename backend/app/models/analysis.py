@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, JSON
+from app.database import Base
+
+class ProductAnalysis(Base):
+    """Analysis of a product as of one PriceHistory snapshot; rewritten when latest_snapshot_id moves"""
+    __tablename__ = "product_analyses"
+
+    product_id = Column(String(36), primary_key=True)
+    snapshot_id = Column(String(36), nullable=False)  # Product.latest_snapshot_id it was computed from
+    sales_estimate_monthly = Column(Integer, nullable=True)
+    revenue_estimate_monthly = Column(Float, nullable=True)
+    opportunity_score = Column(Float, nullable=True)
+    analysis = Column(JSON, nullable=False)  # generate_ai_analysis output
+    computed_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+class RawPage(Base):
+    """One fetch of a page; the HTML itself lives in the on-disk archive under sha256"""
+    __tablename__ = "raw_pages"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    url = Column(Text, nullable=False)
+    asin = Column(String(10), nullable=True)
+    kind = Column(String(20), nullable=False)  # "product" or "bestsellers"
+    sha256 = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_raw_pages_asin_fetched", "asin", "fetched_at"),
+        Index("ix_raw_pages_url_fetched", "url", "fetched_at"),
+    )
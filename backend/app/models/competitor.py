@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, Numeric, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+import uuid
+
+class CompetitorCrawl(Base):
+    """State of the bestseller crawl for one product category; points at its newest snapshot set"""
+    __tablename__ = "competitor_crawls"
+
+    category = Column(String(255), primary_key=True)
+    status = Column(String(20), nullable=False, default="pending")  # pending, ready, failed or unsupported
+    crawl_id = Column(String(36), nullable=True)  # newest complete crawl, kept while a recrawl fails
+    pages = Column(Integer, nullable=False, default=0)
+    items = Column(Integer, nullable=False, default=0)
+    total_monthly_sales = Column(Integer, nullable=True)
+    requested_at = Column(DateTime(timezone=True), server_default=func.now())
+    crawled_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class CompetitorSnapshot(Base):
+    """One product on a category's bestseller list, as seen by one crawl"""
+    __tablename__ = "competitor_snapshots"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    crawl_id = Column(String(36), nullable=False)
+    category = Column(String(255), nullable=False)
+    rank = Column(Integer, nullable=False)
+    asin = Column(String(10), nullable=False)
+    title = Column(Text, nullable=True)
+    price = Column(Numeric(10, 2), nullable=True)
+    rating = Column(Numeric(3, 2), nullable=True)
+    review_count = Column(Integer, nullable=True)
+    monthly_sales = Column(Integer, nullable=True)
+    market_share = Column(Float, nullable=True)  # percent of the crawl's estimated monthly units
+    crawled_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_competitor_snapshots_crawl_rank", "crawl_id", "rank"),
+        Index("ix_competitor_snapshots_asin_crawled", "asin", "crawled_at"),
+        Index("ix_competitor_snapshots_crawled", "crawled_at"),
+    )
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import Base
+
+class RefreshLease(Base):
+    __tablename__ = "refresh_leases"
+
+    asin = Column(String(10), primary_key=True)
+    owner = Column(String(64), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
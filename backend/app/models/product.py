@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Boolean, Integer, DateTime, Numeric, Text
+from sqlalchemy import Column, String, Boolean, Integer, Float, DateTime, Numeric, Text, Index
 from sqlalchemy.sql import func
 from app.database import Base
+from datetime import datetime, timezone
 import uuid
 
 class Product(Base):
@@ -16,6 +17,18 @@ class Product(Base):
     is_prime = Column(Boolean, default=True)
     last_synced_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Any rewrite of the product or its history (set explicitly by jobs that only touch history rows).
+    # Client-side clock: CURRENT_TIMESTAMP has one-second resolution, too coarse for validators
+    updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
+
+    # Copy of the newest PriceHistory row, kept in step by product_store.apply_scrape
+    latest_snapshot_id = Column(String(36), nullable=True)
+    latest_price = Column(Numeric(10, 2), nullable=True)
+    latest_bsr = Column(Integer, nullable=True)
+    latest_rating = Column(Numeric(3, 2), nullable=True)
+    latest_review_count = Column(Integer, nullable=True)
+    latest_in_stock = Column(Boolean, nullable=True)
+    latest_recorded_at = Column(DateTime(timezone=True), nullable=True)
 
 
 class PriceHistory(Base):
@@ -29,6 +42,42 @@ class PriceHistory(Base):
     review_count = Column(Integer, nullable=True)
     in_stock = Column(Boolean, default=True)
     recorded_at = Column(DateTime(timezone=True), server_default=func.now())
+    page_sha256 = Column(String(64), nullable=True)  # archived page this row was parsed from
+    # Change-only storage: the row was observed repeat_count times, last at valid_until
+    valid_until = Column(DateTime(timezone=True), nullable=True)
+    repeat_count = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        Index("ix_price_history_product_recorded", "product_id", "recorded_at"),
+    )
+
+
+class PriceRollup(Base):
+    """PriceHistory aggregated per hour/day/week bucket, kept up to date as snapshots are written"""
+    __tablename__ = "price_rollups"
+
+    product_id = Column(String(36), primary_key=True)
+    resolution = Column(String(8), primary_key=True)  # "hour", "day" or "week"
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    samples = Column(Integer, nullable=False, default=0)
+    last_recorded_at = Column(DateTime(timezone=True), nullable=True)
+
+    # *_n counts the non-null values behind *_sum, so avg = sum / n
+    price_min = Column(Float, nullable=True)
+    price_max = Column(Float, nullable=True)
+    price_sum = Column(Float, nullable=True)
+    price_n = Column(Integer, nullable=False, default=0)
+    price_last = Column(Float, nullable=True)
+    bsr_min = Column(Integer, nullable=True)
+    bsr_max = Column(Integer, nullable=True)
+    bsr_sum = Column(Float, nullable=True)
+    bsr_n = Column(Integer, nullable=False, default=0)
+    bsr_last = Column(Integer, nullable=True)
+    review_count_min = Column(Integer, nullable=True)
+    review_count_max = Column(Integer, nullable=True)
+    review_count_sum = Column(Float, nullable=True)
+    review_count_n = Column(Integer, nullable=False, default=0)
+    review_count_last = Column(Integer, nullable=True)
 
 
 class TrackedProduct(Base):
@@ -37,4 +86,10 @@ class TrackedProduct(Base):
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), nullable=False)
     product_id = Column(String(36), nullable=False)
-    tracked_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    tracked_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # The unique pair also serves user_id-only lookups (leftmost prefix)
+    __table_args__ = (
+        Index("uq_tracked_products_user_product", "user_id", "product_id", unique=True),
+        Index("ix_tracked_products_product", "product_id"),
+    )
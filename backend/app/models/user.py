@@ -14,6 +14,7 @@ class User(Base):
     full_name = Column(String(255), nullable=True)
     plan = Column(String(20), default="free")
     monthly_searches = Column(Integer, default=0)
+    quota_period = Column(String(7), nullable=True)  # "YYYY-MM" that monthly_searches counts
     search_limit = Column(Integer, default=50)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
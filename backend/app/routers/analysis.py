@@ -1,100 +1,123 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+import asyncio
+from collections import Counter
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.product import Product, PriceHistory
-from app.services.analytics.ai_analyzer import generate_ai_analysis
-from app.services.amazon.sales_estimator import estimate_monthly_sales, calculate_opportunity_score
-import csv
-import io
+from app.models.product import Product, TrackedProduct
+from app.models.analysis import ProductAnalysis
+from app.schemas.analysis import PortfolioResponse, ProductAnalysisResponse
+from app.services.analytics.analysis_store import resolve_analyses, store_analyses
+from app.services.analytics.export_stream import stream_tracked_csv, stream_price_history
+from datetime import datetime
+from typing import Literal, Optional
 from fastapi.responses import StreamingResponse
 
 router = APIRouter(prefix="/api/analysis", tags=["Analysis"])
 
-@router.get("/{asin}/ai")
-def get_ai_analysis(
+def portfolio_query(user_id: str):
+    return (
+        select(TrackedProduct.tracked_at, Product, ProductAnalysis)
+        .join(Product, Product.id == TrackedProduct.product_id)
+        .outerjoin(ProductAnalysis, ProductAnalysis.product_id == Product.id)
+        .where(TrackedProduct.user_id == user_id)
+    )
+
+
+def product_analysis_query(asin: str):
+    return (
+        select(Product, ProductAnalysis)
+        .outerjoin(ProductAnalysis, ProductAnalysis.product_id == Product.id)
+        .where(Product.asin == asin.upper())
+    )
+
+
+def _analysis_response(product: Product, result: dict) -> dict:
+    return {"asin": product.asin, "product_title": product.title, **result["analysis"]}
+
+
+@router.get("/portfolio", response_model=PortfolioResponse)
+async def get_portfolio_analysis(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Analyses of every tracked product in one response, best opportunities first"""
+    rows = (await db.execute(portfolio_query(current_user.id))).all()
+    results, computed = resolve_analyses([(product, stored) for _, product, stored in rows])
+    if computed:
+        await asyncio.to_thread(store_analyses, computed)
+
+    items = []
+    for tracked_at, product, _ in rows:
+        result = results[product.id]
+        items.append({
+            **_analysis_response(product, result),
+            "category": product.category,
+            "tracked_at": tracked_at,
+            "sales_estimate_monthly": result["sales_estimate_monthly"],
+            "revenue_estimate_monthly": result["revenue_estimate_monthly"],
+            "opportunity_score": result["opportunity_score"],
+        })
+    items.sort(key=lambda item: item["opportunity_score"] is None or -item["opportunity_score"])
+
+    signals = Counter(item["overall_signal"] for item in items)
+    scores = [item["opportunity_score"] for item in items if item["opportunity_score"] is not None]
+    return {
+        "products": items,
+        "total": len(items),
+        "summary": {
+            "total_monthly_revenue": round(sum(item["revenue_estimate_monthly"] or 0 for item in items), 2),
+            "total_monthly_units": sum(item["sales_estimate_monthly"] or 0 for item in items),
+            "average_opportunity_score": round(sum(scores) / len(scores), 1) if scores else None,
+            "signals": dict(signals),
+        },
+    }
+
+
+@router.get("/{asin}/ai", response_model=ProductAnalysisResponse)
+async def get_ai_analysis(
     asin: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    product = db.query(Product).filter(Product.asin == asin.upper()).first()
-    if not product:
+    row = (await db.execute(product_analysis_query(asin))).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Product not found. Fetch it first.")
-    
-    latest = (
-        db.query(PriceHistory)
-        .filter(PriceHistory.product_id == product.id)
-        .order_by(PriceHistory.recorded_at.desc())
-        .first()
-    )
-    
-    sales_data = estimate_monthly_sales(latest.bsr if latest else 0, product.category or "")
-    opportunity_score = None
-    if latest and sales_data["monthly_units"]:
-        opportunity_score = calculate_opportunity_score(
-            bsr=latest.bsr or 0,
-            review_count=latest.review_count or 0,
-            monthly_sales=sales_data["monthly_units"],
-            seller_count=1
-        )
-    
-    product_data = {
-        "asin": product.asin,
-        "title": product.title,
-        "category": product.category,
-        "current_price": float(latest.price) if latest and latest.price else None,
-        "current_bsr": latest.bsr if latest else None,
-        "current_rating": float(latest.rating) if latest and latest.rating else None,
-        "current_review_count": latest.review_count if latest else None,
-        "sales_estimate_monthly": sales_data["monthly_units"],
-        "revenue_estimate_monthly": round(sales_data["monthly_units"] * float(latest.price), 2) if sales_data["monthly_units"] and latest and latest.price else None,
-        "opportunity_score": opportunity_score,
-    }
-    
-    analysis = generate_ai_analysis(product_data)
-    return {"asin": asin, "product_title": product.title, **analysis}
+
+    product, stored = row
+    results, computed = resolve_analyses([(product, stored)])
+    if computed:
+        await asyncio.to_thread(store_analyses, computed)
+    return _analysis_response(product, results[product.id])
 
 
 @router.get("/export/csv")
 def export_tracked_csv(
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    from app.models.product import TrackedProduct
-    
-    tracked_list = db.query(TrackedProduct).filter(
-        TrackedProduct.user_id == current_user.id
-    ).all()
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["ASIN", "Title", "Brand", "Category", "Price", "BSR", "Rating", "Reviews", "Tracked At"])
-    
-    for t in tracked_list:
-        product = db.query(Product).filter(Product.id == t.product_id).first()
-        if product:
-            latest = (
-                db.query(PriceHistory)
-                .filter(PriceHistory.product_id == product.id)
-                .order_by(PriceHistory.recorded_at.desc())
-                .first()
-            )
-            writer.writerow([
-                product.asin,
-                product.title,
-                product.brand or "",
-                product.category or "",
-                float(latest.price) if latest and latest.price else "",
-                latest.bsr if latest else "",
-                float(latest.rating) if latest and latest.rating else "",
-                latest.review_count if latest else "",
-                t.tracked_at.strftime("%Y-%m-%d %H:%M") if t.tracked_at else "",
-            ])
-    
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        stream_tracked_csv(current_user.id),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=tracked_products.csv"}
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/export/history")
+def export_price_history(
+    format: Literal["csv", "ndjson"] = Query(default="csv"),
+    start: Optional[datetime] = Query(default=None, description="Include snapshots recorded at or after this time"),
+    end: Optional[datetime] = Query(default=None, description="Include snapshots recorded before this time"),
+    asin: Optional[str] = Query(default=None),
+    current_user: User = Depends(get_current_user)
+):
+    if format == "ndjson":
+        media_type, filename = "application/x-ndjson", "price_history.ndjson"
+    else:
+        media_type, filename = "text/csv", "price_history.csv"
+    return StreamingResponse(
+        stream_price_history(current_user.id, format, start, end, asin),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
@@ -1,38 +1,150 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db, SessionLocal
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.models.product import Product, PriceHistory
-from app.services.amazon.competitor_service import get_mock_competitors
+from app.models.product import Product
+from app.models.competitor import CompetitorCrawl, CompetitorSnapshot
+from app.schemas.competitor import CompetitorsResponse
+from app.services.amazon.competitor_service import bestseller_url
+from app.services.amazon.sales_estimator import estimate_monthly_sales
 
 router = APIRouter(prefix="/api/competitors", tags=["Competitors"])
 
-@router.get("/{asin}")
-def get_competitors(
+
+def current_crawl_query(category: str, limit: int):
+    """The category's current crawl joined to its top entries, on the (crawl_id, rank) index"""
+    return (
+        select(CompetitorCrawl, CompetitorSnapshot)
+        .outerjoin(CompetitorSnapshot, CompetitorSnapshot.crawl_id == CompetitorCrawl.crawl_id)
+        .where(CompetitorCrawl.category == category)
+        .order_by(CompetitorSnapshot.rank)
+        .limit(limit)
+    )
+
+
+def crawl_entry_query(crawl_id: str, asin: str):
+    return select(CompetitorSnapshot).where(CompetitorSnapshot.crawl_id == crawl_id, CompetitorSnapshot.asin == asin)
+
+
+def _competitor(row: CompetitorSnapshot) -> dict:
+    return {
+        "asin": row.asin,
+        "title": row.title,
+        "price": row.price,
+        "rating": row.rating,
+        "bsr": row.rank,
+        "review_count": row.review_count,
+        "monthly_sales": row.monthly_sales,
+        "market_share": row.market_share,
+    }
+
+
+def _queue_crawl(category: str, requeue_status: Optional[str] = None):
+    """Mark the category's crawl pending, inserting its row when there is none.
+
+    With requeue_status only a row still in that status is touched (the
+    crawler may have moved it on since the request read it).
+    """
+    db = SessionLocal()
+    try:
+        row = db.get(CompetitorCrawl, category)
+        if row is None:
+            db.add(CompetitorCrawl(category=category, status="pending"))
+        elif requeue_status is not None and row.status == requeue_status:
+            row.status = "pending"
+        else:
+            return
+        db.commit()
+    except IntegrityError:
+        db.rollback()  # another request queued it first
+    finally:
+        db.close()
+
+
+async def _request_crawl(category: str, crawl: Optional[CompetitorCrawl]):
+    """Queue a crawl for the background crawler; never crawls in the request.
+
+    The write goes through the sync session in a thread so it queues on the
+    process write lock like every other writer.
+    """
+    if crawl is None:
+        await asyncio.to_thread(_queue_crawl, category)
+        return
+    stale_before = datetime.now(timezone.utc) - timedelta(hours=settings.competitor_crawl_interval_hours)
+    crawled_at = crawl.crawled_at
+    if crawled_at is not None and crawled_at.tzinfo is None:
+        crawled_at = crawled_at.replace(tzinfo=timezone.utc)
+    stale = crawl.status == "ready" and crawled_at is not None and crawled_at < stale_before
+    if stale or crawl.status == "failed":
+        await asyncio.to_thread(_queue_crawl, category, crawl.status)
+
+
+@router.get("/{asin}", response_model=CompetitorsResponse)
+async def get_competitors(
     asin: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    product = db.query(Product).filter(Product.asin == asin.upper()).first()
+    asin = asin.upper()
+    product = (await db.execute(select(Product).where(Product.asin == asin))).scalars().first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found. Fetch it first.")
-    
-    latest = (
-        db.query(PriceHistory)
-        .filter(PriceHistory.product_id == product.id)
-        .order_by(PriceHistory.recorded_at.desc())
-        .first()
-    )
-    
-    competitors = get_mock_competitors(asin, product.category or "default")
-    
-    return {
+
+    result = {
         "asin": asin,
         "product_title": product.title,
-        "product_price": float(latest.price) if latest and latest.price else None,
-        "product_bsr": latest.bsr if latest else None,
-        "product_rating": float(latest.rating) if latest and latest.rating else None,
+        "product_price": product.latest_price or None,
+        "product_bsr": product.latest_bsr,
+        "product_rating": product.latest_rating or None,
+        "product_market_share": None,
+        "status": "unsupported",
+        "crawled_at": None,
+        "competitors": [],
+        "total_competitors": 0,
+    }
+    if not product.category or bestseller_url(product.category) is None:
+        return result
+
+    # One extra row so the list stays full when the product itself is among them
+    rows = (await db.execute(current_crawl_query(product.category, settings.competitors_per_product + 1))).all()
+    crawl = rows[0][0] if rows else None
+    await _request_crawl(product.category, crawl)
+    if crawl is None:
+        result["status"] = "pending"
+        return result
+
+    competitors, own = [], None
+    for _, snapshot in rows:
+        if snapshot is None:
+            continue
+        if snapshot.asin == asin:
+            own = snapshot
+        else:
+            competitors.append(_competitor(snapshot))
+    competitors = competitors[:settings.competitors_per_product]
+
+    if own is None and crawl.crawl_id is not None:
+        # Ranked further down the list than the rows above
+        own = (await db.execute(crawl_entry_query(crawl.crawl_id, asin))).scalars().first()
+
+    if own is not None:
+        result["product_market_share"] = own.market_share
+    elif product.latest_bsr and crawl.total_monthly_sales:
+        # Not on the crawled list: its estimated units against the list's total plus its own
+        units = estimate_monthly_sales(product.latest_bsr, product.category)["monthly_units"]
+        result["product_market_share"] = round(units / (crawl.total_monthly_sales + units) * 100, 2)
+
+    result.update({
+        "status": crawl.status if crawl.crawl_id is None else "ready",
+        "crawled_at": crawl.crawled_at,
         "competitors": competitors,
         "total_competitors": len(competitors),
-    }
\ No newline at end of file
+    })
+    return result
@@ -1,28 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.dependencies import get_current_user
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
+from app.dependencies import rate_limited_user, charge_searches
 from app.models.user import User
 from app.models.product import Product
-from app.services.amazon.keyword_service import get_keywords_for_product
+from app.services.amazon.keyword_service import get_keywords_for_product_async
+from app.services.cache import cache, snapshot_key
 
 router = APIRouter(prefix="/api/keywords", tags=["Keywords"])
 
 @router.get("/{asin}")
-def get_keywords(
+async def get_keywords(
     asin: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(rate_limited_user)
 ):
-    product = db.query(Product).filter(Product.asin == asin.upper()).first()
+    product = (await db.execute(select(Product).where(Product.asin == asin.upper()))).scalars().first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found. Fetch it first via /api/products/{asin}")
     
-    keywords = get_keywords_for_product(product.title, asin)
-    
-    return {
-        "asin": asin,
-        "product_title": product.title,
-        "keywords": keywords,
-        "total": len(keywords)
-    }
\ No newline at end of file
+    async def build():
+        # Charged on a cache miss only, when autocomplete is actually queried
+        await charge_searches(current_user)
+        keywords = await get_keywords_for_product_async(product.title, asin)
+        return {
+            "asin": asin,
+            "product_title": product.title,
+            "keywords": keywords,
+            "total": len(keywords)
+        }
+
+    return await cache.get_or_compute(
+        "keywords", snapshot_key(asin, product.latest_snapshot_id), build, settings.cache_ttl_keywords
+    )
@@ -1,76 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
-from app.database import get_db
-from app.dependencies import get_current_user
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from app.config import settings
+from app.database import get_db, get_async_db, SessionLocal
+from app.dependencies import get_current_user, rate_limited_user, charge_searches
 from app.models.user import User
 from app.models.product import Product, PriceHistory, TrackedProduct
-from app.services.amazon.product_scraper import scrape_amazon_product
+from app.schemas.product import HistoryFormat, ProductBatchRequest, ProductDetail, ProductHistory, TrackedProductItem
+from app.services.amazon.history_rollups import as_utc, load_history
+from app.services.amazon.history_runs import expand_runs
+from app.services.amazon.product_scraper import scrape_amazon_product_async
+from app.services.amazon.product_store import is_stale, set_latest
+from app.services.amazon.refresh import flights, refresh_product, save_batch
 from app.services.amazon.sales_estimator import estimate_monthly_sales, calculate_opportunity_score
+from app.services.http_cache import last_modified, not_modified_response, product_etag
+from app.tasks.refresh_scheduler import scheduler
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
 
-@router.get("/{asin}")
-def get_product(
+# Statement builders for the hot queries, shared with tests/test_query_plans.py
+
+def recent_history_query(product_id: str, limit: int = 90):
+    return (
+        select(PriceHistory)
+        .where(PriceHistory.product_id == product_id)
+        .order_by(PriceHistory.recorded_at.desc())
+        .limit(limit)
+    )
+
+
+def tracked_products_query(user_id: str):
+    return (
+        select(TrackedProduct.tracked_at, Product)
+        .join(Product, Product.id == TrackedProduct.product_id)
+        .where(TrackedProduct.user_id == user_id)
+    )
+
+
+def tracking_pair_query(user_id: str, product_id: str):
+    return select(TrackedProduct).where(TrackedProduct.user_id == user_id, TrackedProduct.product_id == product_id)
+
+
+def _columns(points: List[dict]) -> dict:
+    """Rows of identically keyed dicts as parallel arrays (history_format=columns)"""
+    if not points:
+        return {"recorded_at": [], "price": [], "bsr": [], "rating": [], "review_count": []}
+    return {key: [p[key] for p in points] for key in points[0]}
+
+
+@router.get("/{asin}", response_model=ProductDetail)
+async def get_product(
     asin: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    history_format: HistoryFormat = Query(default="rows", description="'columns' returns price_history as parallel arrays"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(rate_limited_user)
 ):
     asin = asin.upper().strip()
 
-    product = db.query(Product).filter(Product.asin == asin).first()
-    needs_refresh = True
-
-    if product and product.last_synced_at:
-        last_synced = product.last_synced_at
-        if last_synced.tzinfo is None:
-            last_synced = last_synced.replace(tzinfo=timezone.utc)
-        age_hours = (datetime.now(timezone.utc) - last_synced).total_seconds() / 3600
-        needs_refresh = age_hours > 6
-
-    if needs_refresh:
-        data = scrape_amazon_product(asin)
-        if not data:
-            raise HTTPException(status_code=404, detail="Product not found on Amazon")
+    product = (await db.execute(select(Product).where(Product.asin == asin))).scalars().first()
 
-        if not product:
-            product = Product(
-                asin=asin,
-                title=data["title"],
-                brand=data["brand"],
-                category=data["category"],
-                image_url=data["image_url"],
-                amazon_url=data["amazon_url"],
-                is_prime=data["is_prime"],
-            )
-            db.add(product)
-            db.flush()
-        else:
-            product.title = data["title"]
-            product.brand = data["brand"]
-
-        history = PriceHistory(
-            product_id=product.id,
-            price=data["price"],
-            bsr=data["bsr"],
-            rating=data["rating"],
-            review_count=data["review_count"],
-            in_stock=data["in_stock"],
-        )
-        db.add(history)
+    # Known products are always served from the DB; stale ones are handed to
+    # the background scheduler. Only a never-seen ASIN is scraped inline.
+    if product and is_stale(product) and settings.refresh_scheduler_enabled:
+        scheduler.request_refresh(asin)
+    elif is_stale(product):
+        await charge_searches(current_user)
+        if not await refresh_product(asin):
+            raise HTTPException(status_code=404, detail="Product not found on Amazon")
+        product = (await db.execute(
+            select(Product).where(Product.asin == asin).execution_options(populate_existing=True)
+        )).scalars().first()
 
-        product.last_synced_at = datetime.now(timezone.utc)
-        db.commit()
-        db.refresh(product)
+    not_modified = not_modified_response(request, response, product_etag(product, history_format), last_modified(product))
+    if not_modified is not None:
+        return not_modified
 
-    history = (
-        db.query(PriceHistory)
-        .filter(PriceHistory.product_id == product.id)
-        .order_by(PriceHistory.recorded_at.desc())
-        .limit(90)
-        .all()
-    )
+    history = (await db.execute(recent_history_query(product.id))).scalars().all()
 
     latest = history[0] if history else None
     sales_data = estimate_monthly_sales(
@@ -87,6 +102,18 @@ def get_product(
             seller_count=1
         )
 
+    # Runs expand to one entry per observation; keep the newest 90
+    points = [
+        {
+            "price": h.price,
+            "bsr": h.bsr,
+            "rating": h.rating,
+            "review_count": h.review_count,
+            "recorded_at": observed_at,
+        }
+        for observed_at, h in list(expand_runs(reversed(history)))[-90:]
+    ]
+    price = latest.price if latest and latest.price else None
     return {
         "asin": product.asin,
         "title": product.title,
@@ -94,29 +121,186 @@ def get_product(
         "category": product.category,
         "image_url": product.image_url,
         "amazon_url": product.amazon_url,
-        "current_price": float(latest.price) if latest and latest.price else None,
+        "current_price": price,
         "current_bsr": latest.bsr if latest else None,
-        "current_rating": float(latest.rating) if latest and latest.rating else None,
+        "current_rating": latest.rating if latest and latest.rating else None,
         "current_review_count": latest.review_count if latest else None,
         "in_stock": latest.in_stock if latest else None,
         "sales_estimate_monthly": sales_data["monthly_units"],
         "revenue_estimate_monthly": round(
-            sales_data["monthly_units"] * float(latest.price), 2
-        ) if sales_data["monthly_units"] and latest and latest.price else None,
+            sales_data["monthly_units"] * float(price), 2
+        ) if sales_data["monthly_units"] and price else None,
         "opportunity_score": opportunity_score,
-        "price_history": [
-            {
-                "price": float(h.price) if h.price else None,
-                "bsr": h.bsr,
-                "rating": float(h.rating) if h.rating else None,
-                "review_count": h.review_count,
-                "recorded_at": h.recorded_at.isoformat()
-            }
-            for h in reversed(history)
-        ],
+        "price_history": _columns(points) if history_format == "columns" else points,
     }
 
 
+@router.get("/{asin}/history", response_model=ProductHistory, response_model_exclude_unset=True)
+async def get_product_history(
+    asin: str,
+    request: Request,
+    response: Response,
+    start: Optional[datetime] = Query(default=None, alias="from"),
+    end: Optional[datetime] = Query(default=None, alias="to"),
+    points: int = Query(default=settings.history_default_points, ge=3, le=2000),
+    history_format: HistoryFormat = Query(default="rows", description="'columns' returns points as parallel arrays"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Price/BSR history over any range, from raw rows or hour/day/week rollups, LTTB-downsampled to `points`"""
+    product = (await db.execute(select(Product).where(Product.asin == asin.upper().strip()))).scalars().first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found. Fetch it first.")
+
+    end = as_utc(end) if end else datetime.now(timezone.utc)
+    start = as_utc(start) if start else end - timedelta(days=90)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+
+    # An open-ended range slides with the clock; a revalidated copy keeps its window until the next scrape
+    etag = product_etag(product, request.url.query)
+    not_modified = not_modified_response(request, response, etag, last_modified(product))
+    if not_modified is not None:
+        return not_modified
+
+    history = await load_history(db, product.id, start, end, points)
+    if history_format == "columns":
+        history["points"] = _columns(history["points"])
+    return {"asin": product.asin, **history}
+
+
+def _product_summary(product: Product) -> dict:
+    sales_data = estimate_monthly_sales(product.latest_bsr or 0, product.category or "")
+    opportunity_score = None
+    if sales_data["monthly_units"]:
+        opportunity_score = calculate_opportunity_score(
+            bsr=product.latest_bsr or 0,
+            review_count=product.latest_review_count or 0,
+            monthly_sales=sales_data["monthly_units"],
+            seller_count=1
+        )
+    return {
+        "asin": product.asin,
+        "title": product.title,
+        "brand": product.brand,
+        "category": product.category,
+        "image_url": product.image_url,
+        "current_price": float(product.latest_price) if product.latest_price else None,
+        "current_bsr": product.latest_bsr,
+        "current_rating": float(product.latest_rating) if product.latest_rating else None,
+        "current_review_count": product.latest_review_count,
+        "in_stock": product.latest_in_stock,
+        "sales_estimate_monthly": sales_data["monthly_units"],
+        "opportunity_score": opportunity_score,
+    }
+
+
+def _read_summary(asin: str) -> dict:
+    read_db = SessionLocal()
+    try:
+        return _product_summary(read_db.query(Product).filter(Product.asin == asin).first())
+    finally:
+        read_db.close()
+
+
+def _encode(item: dict, fmt: str) -> str:
+    line = json.dumps(item, default=str)
+    if fmt == "sse":
+        return f"event: {item['type']}\ndata: {line}\n\n"
+    return line + "\n"
+
+
+@router.post("/batch")
+async def get_products_batch(
+    body: ProductBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(rate_limited_user)
+):
+    asins = list(dict.fromkeys(a.upper().strip() for a in body.asins if a and a.strip()))
+    if len(asins) > settings.batch_max_asins:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_asins} ASINs per batch")
+
+    products = {p.asin: p for p in (await db.execute(select(Product).where(Product.asin.in_(asins)))).scalars()}
+    fresh = [products[a] for a in asins if a in products and not is_stale(products[a])]
+    stale = [a for a in asins if a not in products or is_stale(products[a])]
+    # Only ASINs that go upstream count as searches; fresh ones are DB reads
+    await charge_searches(current_user, len(stale))
+    fmt = body.format
+
+    async def stream():
+        for product in fresh:
+            yield _encode({"type": "product", "asin": product.asin, "status": "fresh",
+                           "product": _product_summary(product)}, fmt)
+
+        semaphore = asyncio.Semaphore(settings.batch_scrape_concurrency)
+
+        async def scrape(asin):
+            async with semaphore:
+                return asin, await scrape_amazon_product_async(asin)
+
+        async def join(asin, pending):
+            # Another request is already refreshing this ASIN; share its write
+            refreshed = await asyncio.wrap_future(pending)
+            return asin, refreshed
+
+        # ASINs this batch scrapes are registered as in flight, so a concurrent
+        # GET or batch for one of them waits for this save instead of scraping again
+        jobs = []
+        joined = set()
+        owned = {}
+        for asin in stale:
+            future, leader = flights.claim(asin)
+            if leader:
+                owned[asin] = future
+                jobs.append(scrape(asin))
+            else:
+                joined.add(asin)
+                jobs.append(join(asin, future))
+
+        scraped = {}
+        failed = {}
+        try:
+            for next_done in asyncio.as_completed(jobs):
+                asin, data = await next_done
+                if asin in joined:
+                    if data:
+                        yield _encode({"type": "product", "asin": asin, "status": "scraped",
+                                       "product": await asyncio.to_thread(_read_summary, asin)}, fmt)
+                    else:
+                        yield _encode({"type": "product", "asin": asin, "status": "not_found"}, fmt)
+                    continue
+                if not data:
+                    flights.finish(asin, owned.pop(asin), False)
+                    yield _encode({"type": "product", "asin": asin, "status": "not_found"}, fmt)
+                    continue
+                scraped[asin] = data
+                preview = Product(asin=asin, title=data["title"], brand=data["brand"],
+                                  category=data["category"], image_url=data["image_url"])
+                set_latest(preview, PriceHistory(price=data["price"], bsr=data["bsr"], rating=data["rating"],
+                                                 review_count=data["review_count"], in_stock=data["in_stock"]))
+                yield _encode({"type": "product", "asin": asin, "status": "scraped",
+                               "product": _product_summary(preview)}, fmt)
+
+            # All new Product/PriceHistory rows go out in one transaction, off the event loop
+            if scraped:
+                failed = await asyncio.to_thread(save_batch, scraped)
+            for asin in scraped:
+                flights.finish(asin, owned.pop(asin), asin not in failed)
+            for asin, error in failed.items():
+                yield _encode({"type": "product", "asin": asin, "status": "save_failed", "error": error}, fmt)
+        finally:
+            # Client gone or a scrape raised: waiters on unfinished ASINs get "not refreshed"
+            for asin, future in owned.items():
+                flights.finish(asin, future, False)
+
+        yield _encode({"type": "summary", "requested": len(asins), "fresh": len(fresh),
+                       "scraped": len(scraped), "saved": len(scraped) - len(failed), "save_failed": len(failed),
+                       "shared": len(joined), "not_found": len(stale) - len(scraped) - len(joined)}, fmt)
+
+    media_type = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type)
+
+
 @router.post("/{asin}/track")
 def track_product(
     asin: str,
@@ -128,48 +312,39 @@ def track_product(
     if not product:
         raise HTTPException(status_code=404, detail="Fetch product first using GET /api/products/{asin}")
 
-    existing = db.query(TrackedProduct).filter(
-        TrackedProduct.user_id == current_user.id,
-        TrackedProduct.product_id == product.id
-    ).first()
+    existing = db.execute(tracking_pair_query(current_user.id, product.id)).scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Already tracking")
 
     tracked = TrackedProduct(user_id=current_user.id, product_id=product.id)
     db.add(tracked)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Already tracking")
     return {"message": "Product tracked!", "asin": asin}
 
 
-@router.get("/tracked/list")
-def get_tracked(
-    db: Session = Depends(get_db),
+@router.get("/tracked/list", response_model=List[TrackedProductItem])
+async def get_tracked(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    tracked_list = db.query(TrackedProduct).filter(
-        TrackedProduct.user_id == current_user.id
-    ).all()
-
-    result = []
-    for t in tracked_list:
-        product = db.query(Product).filter(Product.id == t.product_id).first()
-        if product:
-            latest = (
-                db.query(PriceHistory)
-                .filter(PriceHistory.product_id == product.id)
-                .order_by(PriceHistory.recorded_at.desc())
-                .first()
-            )
-            result.append({
-                "asin": product.asin,
-                "title": product.title,
-                "brand": product.brand,
-                "image_url": product.image_url,
-                "current_price": float(latest.price) if latest and latest.price else None,
-                "current_bsr": latest.bsr if latest else None,
-                "tracked_at": t.tracked_at.isoformat(),
-            })
-    return result
+    rows = (await db.execute(tracked_products_query(current_user.id))).all()
+
+    return [
+        {
+            "asin": product.asin,
+            "title": product.title,
+            "brand": product.brand,
+            "image_url": product.image_url,
+            "current_price": product.latest_price or None,
+            "current_bsr": product.latest_bsr,
+            "tracked_at": tracked_at,
+        }
+        for tracked_at, product in rows
+    ]
 
 
 @router.delete("/{asin}/track")
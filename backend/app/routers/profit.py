@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, Query
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.config import settings
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.services.analytics.profit_calculator import calculate_profit
+from app.schemas.profit import ParamSpec, ProfitGridRequest
+from app.services.analytics.profit_calculator import calculate_profit, profit_grid, simulate_margins
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.product import Product, PriceHistory
+from app.models.product import Product
 
 router = APIRouter(prefix="/api/profit", tags=["Profit Calculator"])
 
@@ -25,6 +28,78 @@ def profit_calculator(
         shipping_to_fba=shipping_to_fba,
     )
 
+def _axis(spec: ParamSpec) -> np.ndarray:
+    if spec.min is None:
+        return np.array([spec.value], dtype=np.float64)
+    return np.linspace(spec.min, spec.max if spec.max is not None else spec.min, spec.steps)
+
+
+def _sample(spec: ParamSpec, rng: np.random.Generator, draws: int, floor: float) -> np.ndarray:
+    if spec.distribution == "normal":
+        values = rng.normal(spec.mean, spec.std, draws)
+    elif spec.distribution == "triangular":
+        mode = spec.mode if spec.mode is not None else (spec.min + spec.max) / 2
+        values = rng.triangular(spec.min, mode, spec.max, draws) if spec.max > spec.min else np.full(draws, spec.min)
+    elif spec.min is not None and spec.max is not None:
+        values = rng.uniform(spec.min, spec.max, draws)
+    else:
+        values = np.full(draws, spec.value if spec.value is not None else spec.min, dtype=np.float64)
+    # Tails of a normal can go negative; prices and costs can't
+    return np.maximum(values, floor)
+
+
+@router.post("/grid")
+def profit_scenario_grid(
+    request: ProfitGridRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Fee/margin/ROI surface over ranges of inputs, plus an optional Monte-Carlo margin run"""
+    category = request.category
+    selling_price = request.selling_price
+    if request.asin:
+        product = db.query(Product).filter(Product.asin == request.asin.upper()).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found. Fetch it first.")
+        category = category or product.category
+        if selling_price is None and product.latest_price:
+            selling_price = ParamSpec(value=float(product.latest_price))
+    if selling_price is None:
+        raise HTTPException(status_code=400, detail="selling_price is required without a priced asin")
+    category = category or "default"
+
+    specs = {
+        "selling_price": selling_price,
+        "product_cost": request.landed_cost,
+        "weight_lbs": request.weight_lbs,
+        "shipping_to_fba": request.shipping_to_fba,
+        "ad_spend": request.ad_spend,
+    }
+    axes = {name: _axis(spec) for name, spec in specs.items()}
+    cells = int(np.prod([len(values) for values in axes.values()]))
+    if cells > settings.profit_grid_max_cells:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Grid has {cells} cells, the limit is {settings.profit_grid_max_cells}. Use fewer steps.",
+        )
+    if axes["selling_price"].min() <= 0:
+        raise HTTPException(status_code=400, detail="Invalid selling price")
+
+    result = profit_grid(axes, category)
+    result["category"] = category
+    if request.asin:
+        result["asin"] = request.asin.upper()
+
+    if request.simulation:
+        sim = request.simulation
+        rng = np.random.default_rng(sim.seed)
+        samples = {
+            name: _sample(spec, rng, sim.draws, floor=0.01 if name == "selling_price" else 0.0)
+            for name, spec in specs.items()
+        }
+        result["simulation"] = simulate_margins(samples, category, bins=sim.bins)
+    return result
+
 @router.get("/{asin}")
 def profit_for_product(
     asin: str,
@@ -38,18 +113,11 @@ def profit_for_product(
     if not product:
         return {"error": "Product not found"}
     
-    latest = (
-        db.query(PriceHistory)
-        .filter(PriceHistory.product_id == product.id)
-        .order_by(PriceHistory.recorded_at.desc())
-        .first()
-    )
-    
-    if not latest or not latest.price:
+    if not product.latest_price:
         return {"error": "No price data available"}
     
     result = calculate_profit(
-        selling_price=float(latest.price),
+        selling_price=float(product.latest_price),
         product_cost=product_cost,
         category=product.category or "default",
         weight_lbs=weight_lbs,
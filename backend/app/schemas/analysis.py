@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, List, Optional
+
+class MetricsSummary(BaseModel):
+    monthly_revenue: str
+    monthly_units: str
+    opportunity_score: Optional[float] = None
+    market_position: str
+
+class ProductAnalysisResponse(BaseModel):
+    """generate_ai_analysis output for one product"""
+    asin: str
+    product_title: Optional[str] = None
+    overall_signal: str
+    summary: str
+    action: str
+    market_position: str
+    position_insight: str
+    review_barrier: str
+    review_insight: str
+    price_insight: str
+    pricing_strategy: str
+    rating_insight: str
+    quality_bar: str
+    recommendations: List[str]
+    metrics_summary: MetricsSummary
+
+class PortfolioItem(ProductAnalysisResponse):
+    category: Optional[str] = None
+    tracked_at: Optional[datetime] = None
+    sales_estimate_monthly: Optional[int] = None
+    revenue_estimate_monthly: Optional[float] = None
+    opportunity_score: Optional[float] = None
+
+class PortfolioSummary(BaseModel):
+    total_monthly_revenue: float
+    total_monthly_units: int
+    average_opportunity_score: Optional[float] = None
+    signals: Dict[str, int]
+
+class PortfolioResponse(BaseModel):
+    products: List[PortfolioItem]
+    total: int
+    summary: PortfolioSummary
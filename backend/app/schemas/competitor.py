@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Literal, Optional
+
+class Competitor(BaseModel):
+    asin: str
+    title: Optional[str] = None
+    price: Optional[float] = None
+    rating: Optional[float] = None
+    bsr: int  # rank on the category's bestseller list
+    review_count: Optional[int] = None
+    monthly_sales: Optional[int] = None
+    market_share: Optional[float] = None
+
+class CompetitorsResponse(BaseModel):
+    asin: str
+    product_title: Optional[str] = None
+    product_price: Optional[float] = None
+    product_bsr: Optional[int] = None
+    product_rating: Optional[float] = None
+    product_market_share: Optional[float] = None
+    status: Literal["pending", "ready", "failed", "unsupported"]
+    crawled_at: Optional[datetime] = None
+    competitors: List[Competitor]
+    total_competitors: int
@@ -0,0 +1,107 @@
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+from typing import List, Literal, Optional, Union
+
+class ProductBatchRequest(BaseModel):
+    asins: List[str] = Field(..., min_length=1)
+    format: Literal["ndjson", "sse"] = "ndjson"
+
+
+# Response models. Routes hand these raw column values (Decimal prices,
+# datetimes) and pydantic converts them while serializing, which is much
+# cheaper than float()/isoformat() per field plus jsonable_encoder.
+
+HistoryFormat = Literal["rows", "columns"]
+
+
+class PricePoint(BaseModel):
+    price: Optional[float] = None
+    bsr: Optional[int] = None
+    rating: Optional[float] = None
+    review_count: Optional[int] = None
+    recorded_at: datetime
+
+
+class PriceColumns(BaseModel):
+    """price_history as parallel arrays (history_format=columns), one entry per observation"""
+    recorded_at: List[datetime]
+    price: List[Optional[float]]
+    bsr: List[Optional[int]]
+    rating: List[Optional[float]]
+    review_count: List[Optional[int]]
+
+
+class ProductDetail(BaseModel):
+    asin: str
+    title: Optional[str] = None
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    image_url: Optional[str] = None
+    amazon_url: Optional[str] = None
+    current_price: Optional[float] = None
+    current_bsr: Optional[int] = None
+    current_rating: Optional[float] = None
+    current_review_count: Optional[int] = None
+    in_stock: Optional[bool] = None
+    sales_estimate_monthly: Optional[int] = None
+    revenue_estimate_monthly: Optional[float] = None
+    opportunity_score: Optional[float] = None
+    price_history: Union[List[PricePoint], PriceColumns]
+
+
+class HistoryPoint(BaseModel):
+    """A raw observation, or an hour/day/week rollup (averages plus min/max/last); unset fields are omitted"""
+    recorded_at: datetime
+    samples: Optional[int] = None
+    price: Optional[float] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    price_last: Optional[float] = None
+    bsr: Optional[Union[int, float]] = None  # int for raw points, an average for rollups
+    bsr_min: Optional[int] = None
+    bsr_max: Optional[int] = None
+    bsr_last: Optional[int] = None
+    rating: Optional[float] = None
+    review_count: Optional[Union[int, float]] = None
+    review_count_min: Optional[int] = None
+    review_count_max: Optional[int] = None
+    review_count_last: Optional[int] = None
+
+
+class HistoryColumns(BaseModel):
+    recorded_at: List[datetime]
+    samples: Optional[List[int]] = None
+    price: List[Optional[float]]
+    price_min: Optional[List[Optional[float]]] = None
+    price_max: Optional[List[Optional[float]]] = None
+    price_last: Optional[List[Optional[float]]] = None
+    bsr: List[Optional[Union[int, float]]]
+    bsr_min: Optional[List[Optional[int]]] = None
+    bsr_max: Optional[List[Optional[int]]] = None
+    bsr_last: Optional[List[Optional[int]]] = None
+    rating: Optional[List[Optional[float]]] = None
+    review_count: List[Optional[Union[int, float]]]
+    review_count_min: Optional[List[Optional[int]]] = None
+    review_count_max: Optional[List[Optional[int]]] = None
+    review_count_last: Optional[List[Optional[int]]] = None
+
+
+class ProductHistory(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    asin: str
+    from_: datetime = Field(alias="from")
+    to: datetime
+    resolution: str
+    source_points: int
+    points: Union[List[HistoryPoint], HistoryColumns]
+
+
+class TrackedProductItem(BaseModel):
+    asin: str
+    title: Optional[str] = None
+    brand: Optional[str] = None
+    image_url: Optional[str] = None
+    current_price: Optional[float] = None
+    current_bsr: Optional[int] = None
+    tracked_at: datetime
@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
+
+class ParamSpec(BaseModel):
+    """One input of the profit grid.
+
+    Either a fixed `value` or a `min`..`max` range with `steps` grid points.
+    For the Monte-Carlo run, `distribution` picks how it is sampled; without
+    one a range is sampled uniformly and a fixed value stays fixed.
+    """
+    value: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    steps: int = Field(default=1, ge=1, le=200)
+    distribution: Optional[Literal["uniform", "normal", "triangular"]] = None
+    mean: Optional[float] = None
+    std: Optional[float] = Field(default=None, gt=0)
+    mode: Optional[float] = None
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.value is None and self.min is None:
+            raise ValueError("give either value or min/max")
+        if self.min is not None and self.max is not None and self.max < self.min:
+            raise ValueError("max must be >= min")
+        if self.distribution == "normal" and (self.mean is None or self.std is None):
+            raise ValueError("normal distribution needs mean and std")
+        if self.distribution in ("uniform", "triangular") and (self.min is None or self.max is None):
+            raise ValueError(f"{self.distribution} distribution needs min and max")
+        return self
+
+class SimulationRequest(BaseModel):
+    draws: int = Field(default=100_000, ge=1_000, le=1_000_000)
+    seed: Optional[int] = None
+    bins: int = Field(default=50, ge=5, le=200)
+
+class ProfitGridRequest(BaseModel):
+    asin: Optional[str] = None  # fills in selling_price/category from the stored product
+    category: Optional[str] = None
+    selling_price: Optional[ParamSpec] = None
+    landed_cost: ParamSpec
+    weight_lbs: ParamSpec = ParamSpec(value=1.0)
+    shipping_to_fba: ParamSpec = ParamSpec(value=2.0)
+    ad_spend: ParamSpec = ParamSpec(value=0.0)
+    simulation: Optional[SimulationRequest] = None
@@ -1,115 +1,127 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
-from app.config import settings
-import re
-
-def scrape_category_bestsellers(category_url: str) -> List[Dict]:
-    """Scrape Amazon bestseller list for a category"""
-    scraper_url = f"http://api.scraperapi.com"
-    params = {
-        "api_key": settings.scraper_api_key,
-        "url": category_url,
-        "country_code": "us",
-    }
-    
+import asyncio
+from typing import List, Dict, Optional, Tuple
+from app.services.amazon.extraction import parse_document, extract_bestsellers, bestseller_page_count
+from app.services.amazon.page_archive import archive_page
+from app.services.amazon.sales_estimator import estimate_sales_batch
+from app.services.amazon.scraper_client import fetch_page, fetch_page_sync
+from app.services.metrics import scrape_outcomes
+
+# Breadcrumb category (lowercased, substring match, first hit wins) -> bestseller list slug
+BESTSELLER_SLUGS = (
+    ("kitchen", "kitchen"),
+    ("electronics", "electronics"),
+    ("book", "books"),
+    ("toy", "toys-and-games"),
+    ("sport", "sporting-goods"),
+    ("beauty", "beauty"),
+    ("clothing", "fashion"),
+    ("health", "hpc"),
+    ("pet", "pet-supplies"),
+    ("office", "office-products"),
+    ("tool", "hi"),
+    ("automotive", "automotive"),
+    ("baby", "baby-products"),
+    ("video game", "videogames"),
+    ("garden", "lawn-garden"),
+    ("cell phone", "wireless"),
+    ("craft", "arts-crafts"),
+    ("grocery", "grocery"),
+    ("musical", "musical-instruments"),
+    ("home", "home-garden"),
+)
+
+
+def bestseller_url(category: str, page: int = 1) -> Optional[str]:
+    """Bestseller list URL for a product category, or None when we don't know its list"""
+    category_lower = (category or "").lower()
+    for key, slug in BESTSELLER_SLUGS:
+        if key in category_lower:
+            return f"https://www.amazon.com/gp/bestsellers/{slug}/ref=zg_bs_pg_{page}?pg={page}"
+    return None
+
+
+def parse_bestsellers_page(status_code: int, html: str) -> Optional[Tuple[List[Dict], int]]:
+    """Competitor entries and the list's page count; None when the fetch failed"""
+    if status_code != 200 or len(html) < 3000:
+        scrape_outcomes.inc("bestsellers", "http_error")
+        return None
+
+    root = parse_document(html)
+    entries = extract_bestsellers(root)
+    scrape_outcomes.inc("bestsellers", "ok" if entries else "empty")
+    return entries, bestseller_page_count(root)
+
+
+def _archive_and_parse(category_url: str, status_code: int, html: str) -> Optional[Tuple[List[Dict], int]]:
+    archive_page(category_url, status_code, html, kind="bestsellers")
+    return parse_bestsellers_page(status_code, html)
+
+
+async def fetch_bestseller_page(category_url: str) -> Optional[Tuple[List[Dict], int]]:
     try:
-        response = requests.get(scraper_url, params=params, timeout=60)
-        if response.status_code != 200 or len(response.text) < 3000:
-            return []
-        
-        soup = BeautifulSoup(response.text, "html.parser")
-        competitors = []
-        
-        # Find product grid items
-        items = soup.find_all("div", {"class": re.compile(r"zg-grid-general-faceout|p13n-sc-uncoverable-faceout")})
-        
-        for item in items[:10]:
-            try:
-                # Title
-                title_elem = item.find("span", {"class": re.compile(r"a-size-base|zg-text-center-align")})
-                title = title_elem.get_text(strip=True) if title_elem else None
-                
-                # ASIN from link
-                link = item.find("a", href=True)
-                asin = None
-                if link:
-                    match = re.search(r"/dp/([A-Z0-9]{10})", link["href"])
-                    if match:
-                        asin = match.group(1)
-                
-                # Price
-                price = None
-                price_elem = item.find("span", {"class": re.compile(r"a-price|p13n-sc-price")})
-                if price_elem:
-                    try:
-                        price_text = price_elem.get_text(strip=True).replace("$", "").replace(",", "")
-                        price = float(price_text.split()[0])
-                    except:
-                        pass
-                
-                # Rating
-                rating = None
-                rating_elem = item.find("span", {"class": "a-icon-alt"})
-                if rating_elem:
-                    try:
-                        rating = float(rating_elem.get_text().split()[0])
-                    except:
-                        pass
-                
-                if asin and title:
-                    competitors.append({
-                        "asin": asin,
-                        "title": title[:100],
-                        "price": price,
-                        "rating": rating,
-                    })
-            except:
-                continue
-        
-        return competitors
+        response = await fetch_page(category_url, timeout=60)
+        return await asyncio.to_thread(_archive_and_parse, category_url, response.status_code, response.text)
+    except Exception as e:
+        print(f"Competitor scrape error: {e}")
+        scrape_outcomes.inc("bestsellers", "exception")
+        return None
+
+
+# Single-page helpers with the pre-crawl signature, kept for scripts and older callers:
+# the top entries of one bestseller page, [] when the fetch fails
+
+async def scrape_category_bestsellers_async(category_url: str, limit: int = 10) -> List[Dict]:
+    result = await fetch_bestseller_page(category_url)
+    return result[0][:limit] if result else []
+
+
+def scrape_category_bestsellers(category_url: str, limit: int = 10) -> List[Dict]:
+    """Blocking wrapper kept for scripts and sync callers"""
+    try:
+        response = fetch_page_sync(category_url, timeout=60)
+        result = _archive_and_parse(category_url, response.status_code, response.text)
     except Exception as e:
         print(f"Competitor scrape error: {e}")
+        scrape_outcomes.inc("bestsellers", "exception")
         return []
+    return result[0][:limit] if result else []
+
+
+async def crawl_bestsellers(category: str, max_pages: int) -> Optional[Tuple[List[Dict], int]]:
+    """Every entry on a category's bestseller list (ranked, one per ASIN) and the pages read.
+
+    Page 1 says how many pages there are; the rest are fetched concurrently.
+    None when any page fails, so a crawl is either complete or not stored.
+    """
+    first = await fetch_bestseller_page(bestseller_url(category, 1))
+    if first is None:
+        return None
+    entries, page_count = first
+    page_count = min(page_count, max_pages)
+    rest = await asyncio.gather(*(
+        fetch_bestseller_page(bestseller_url(category, page)) for page in range(2, page_count + 1)
+    ))
+    if any(result is None for result in rest):
+        return None
+
+    competitors, seen = [], set()
+    per_page = len(entries) or 1
+    for page, (page_entries, _) in enumerate([first] + list(rest), start=1):
+        for i, entry in enumerate(page_entries):
+            if entry["asin"] in seen:
+                continue
+            seen.add(entry["asin"])
+            # Without a rank badge, the position on the list stands in
+            competitors.append({**entry, "rank": entry["rank"] or (page - 1) * per_page + i + 1})
+    competitors.sort(key=lambda c: c["rank"])
+    return competitors, page_count
 
 
-def get_mock_competitors(asin: str, category: str) -> List[Dict]:
-    """Return mock competitors when scraping fails"""
-    category_products = {
-        "books": [
-            {"asin": "B08CMF2CQF", "title": "Clean Code", "price": 35.99, "rating": 4.7, "bsr": 1200, "review_count": 8500},
-            {"asin": "B07X9RQ7PL", "title": "The Pragmatic Programmer", "price": 39.99, "rating": 4.6, "bsr": 1800, "review_count": 5200},
-            {"asin": "B00B77ER5O", "title": "Code Complete", "price": 42.00, "rating": 4.5, "bsr": 2100, "review_count": 3800},
-            {"asin": "B01NAEKSTD", "title": "Design Patterns", "price": 44.99, "rating": 4.4, "bsr": 3500, "review_count": 2900},
-            {"asin": "B07FPFL5SG", "title": "Refactoring", "price": 38.00, "rating": 4.5, "bsr": 4200, "review_count": 2100},
-        ],
-        "electronics": [
-            {"asin": "B09B93ZDY4", "title": "Competitor Device A", "price": 49.99, "rating": 4.3, "bsr": 3000, "review_count": 12000},
-            {"asin": "B08F7N3T7X", "title": "Competitor Device B", "price": 39.99, "rating": 4.1, "bsr": 5500, "review_count": 8700},
-            {"asin": "B07YZB567G", "title": "Competitor Device C", "price": 59.99, "rating": 4.5, "bsr": 2200, "review_count": 15000},
-        ],
-        "default": [
-            {"asin": "B08X1Y2Z3A", "title": "Similar Product A", "price": 24.99, "rating": 4.2, "bsr": 8000, "review_count": 3200},
-            {"asin": "B09A2B3C4D", "title": "Similar Product B", "price": 29.99, "rating": 4.4, "bsr": 6500, "review_count": 4800},
-            {"asin": "B07E5F6G7H", "title": "Similar Product C", "price": 19.99, "rating": 4.0, "bsr": 12000, "review_count": 1900},
-            {"asin": "B08H9I0J1K", "title": "Similar Product D", "price": 34.99, "rating": 4.6, "bsr": 4200, "review_count": 7100},
-            {"asin": "B09L2M3N4O", "title": "Similar Product E", "price": 22.99, "rating": 3.9, "bsr": 18000, "review_count": 890},
-        ]
-    }
-    
-    cat_lower = (category or "").lower()
-    products = category_products.get("default")
-    for key in category_products:
-        if key in cat_lower:
-            products = category_products[key]
-            break
-    
-    # Add market share estimates
-    total_sales = sum(max(0, 100000 - p.get("bsr", 50000)) for p in products)
-    result = []
-    for p in products:
-        sales_estimate = max(0, 100000 - p.get("bsr", 50000))
-        market_share = round((sales_estimate / total_sales * 100) if total_sales > 0 else 0, 1)
-        result.append({**p, "market_share": market_share, "sales_estimate": sales_estimate // 1000})
-    
-    return result
\ No newline at end of file
+def with_market_share(competitors: List[Dict], category: str) -> Tuple[List[Dict], int]:
+    """Monthly units per entry (its list rank is its category BSR) and its share of the list's total"""
+    units = estimate_sales_batch([c["rank"] for c in competitors], category)["monthly_units"]
+    total = int(units.sum())
+    return [
+        {**c, "monthly_sales": int(u), "market_share": round(int(u) / total * 100, 2) if total else 0.0}
+        for c, u in zip(competitors, units)
+    ], total
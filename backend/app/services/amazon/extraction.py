@@ -0,0 +1,191 @@
+import re
+from typing import List, Dict, Optional
+from lxml import html as lxml_html
+
+# XPath selectors shared by product_scraper and competitor_service. Class
+# tests use the padded-concat idiom so "a-price" doesn't match "a-price-whole".
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+PRODUCT_SELECTORS = {
+    "title": "//span[@id='productTitle']",
+    "price": f"//span[{_has_class('a-price-whole')}]",
+    "rating": f"//span[{_has_class('a-icon-alt')}]",
+    "review_count": "//span[@id='acrCustomerReviewText']",
+    "brand": "//a[@id='bylineInfo']",
+    "breadcrumb_links": "//div[@id='wayfinding-breadcrumbs_feature_div']//a",
+    "image": "//img[@id='landingImage']",
+    # BSR lives in one of these depending on the page template
+    "bsr_blocks": (
+        "//*[@id='productDetails_detailBullets_sections1' or @id='detailBulletsWrapper_feature_div'"
+        " or @id='detailBullets_feature_div' or @id='prodDetails' or @id='SalesRank']"
+    ),
+}
+
+_FACEOUT = f"{_has_class('zg-grid-general-faceout')} or {_has_class('p13n-sc-uncoverable-faceout')}"
+
+BESTSELLER_SELECTORS = {
+    # Newer templates nest one faceout class inside the other; take the outer one only
+    "items": f"//div[{_FACEOUT}][not(ancestor::div[{_FACEOUT}])]",
+    "rank": f".//span[{_has_class('zg-bdg-text')}]",
+    "title": f".//span[{_has_class('a-size-base')} or {_has_class('zg-text-center-align')}]",
+    "link": ".//a[@href]",
+    "price": (
+        ".//span[contains(@class, 'a-price') or contains(@class, 'p13n-sc-price')]"
+    ),
+    "rating": f".//span[{_has_class('a-icon-alt')}]",
+    "review_count": f".//div[{_has_class('a-icon-row')}]//span[{_has_class('a-size-small')}]",
+    "page_links": f"//ul[{_has_class('a-pagination')}]//a[@href]",
+}
+
+BSR_PATTERN = re.compile(r"#([\d,]+)\s+in")
+ASIN_PATTERN = re.compile(r"/dp/([A-Z0-9]{10})")
+PAGE_PARAM_PATTERN = re.compile(r"[?&]pg=(\d+)")
+
+
+def parse_document(page: str):
+    return lxml_html.document_fromstring(page)
+
+
+def text_of(elem, strip: bool = True) -> str:
+    """Same text BeautifulSoup's get_text(strip=True) produces: stripped pieces joined with no separator"""
+    if elem is None:
+        return ""
+    if not strip:
+        return elem.text_content()
+    return "".join(piece.strip() for piece in elem.itertext())
+
+
+def first(root, xpath: str):
+    found = root.xpath(xpath)
+    return found[0] if found else None
+
+
+def extract_product(root) -> Dict[str, Optional[object]]:
+    """Pull the product fields out of a parsed product page; missing fields come back as None"""
+    title = text_of(first(root, PRODUCT_SELECTORS["title"])) or None
+
+    price = None
+    elem = first(root, PRODUCT_SELECTORS["price"])
+    if elem is not None:
+        try:
+            price = float(text_of(elem).replace(",", ""))
+        except ValueError:
+            pass
+
+    rating = None
+    elem = first(root, PRODUCT_SELECTORS["rating"])
+    if elem is not None:
+        try:
+            rating = float(text_of(elem).split(" ")[0])
+        except ValueError:
+            pass
+
+    review_count = None
+    elem = first(root, PRODUCT_SELECTORS["review_count"])
+    if elem is not None:
+        try:
+            review_count = int(re.sub(r"[^\d]", "", text_of(elem, strip=False)))
+        except ValueError:
+            pass
+
+    # Only the product-details blocks are scanned for the rank, not the whole page
+    bsr = None
+    for block in root.xpath(PRODUCT_SELECTORS["bsr_blocks"]):
+        match = BSR_PATTERN.search(block.text_content())
+        if match:
+            bsr = int(match.group(1).replace(",", ""))
+            break
+
+    brand = None
+    elem = first(root, PRODUCT_SELECTORS["brand"])
+    if elem is not None:
+        brand = re.sub(r"(Brand:|Visit the|Store)", "", text_of(elem)).strip()
+
+    category = None
+    elem = first(root, PRODUCT_SELECTORS["breadcrumb_links"])
+    if elem is not None:
+        category = text_of(elem)
+
+    image_url = None
+    elem = first(root, PRODUCT_SELECTORS["image"])
+    if elem is not None:
+        image_url = elem.get("src")
+
+    return {
+        "title": title,
+        "brand": brand,
+        "category": category,
+        "price": price,
+        "rating": rating,
+        "review_count": review_count,
+        "bsr": bsr,
+        "image_url": image_url,
+    }
+
+
+def extract_bestsellers(root, limit: Optional[int] = None) -> List[Dict]:
+    items = root.xpath(BESTSELLER_SELECTORS["items"])
+    if limit is not None:
+        items = items[:limit]
+
+    competitors = []
+    for item in items:
+        title = text_of(first(item, BESTSELLER_SELECTORS["title"])) or None
+
+        asin = None
+        link = first(item, BESTSELLER_SELECTORS["link"])
+        if link is not None:
+            match = ASIN_PATTERN.search(link.get("href", ""))
+            if match:
+                asin = match.group(1)
+
+        price = None
+        elem = first(item, BESTSELLER_SELECTORS["price"])
+        if elem is not None:
+            try:
+                price = float(text_of(elem).replace("$", "").replace(",", "").split()[0])
+            except (ValueError, IndexError):
+                pass
+
+        rating = None
+        elem = first(item, BESTSELLER_SELECTORS["rating"])
+        if elem is not None:
+            try:
+                rating = float(text_of(elem, strip=False).split()[0])
+            except (ValueError, IndexError):
+                pass
+
+        rank = None
+        match = re.search(r"\d[\d,]*", text_of(first(item, BESTSELLER_SELECTORS["rank"])))
+        if match:
+            rank = int(match.group(0).replace(",", ""))
+
+        review_count = None
+        elem = first(item, BESTSELLER_SELECTORS["review_count"])
+        if elem is not None:
+            digits = re.sub(r"[^\d]", "", text_of(elem))
+            review_count = int(digits) if digits else None
+
+        if asin and title:
+            competitors.append({
+                "asin": asin,
+                "title": title[:100],
+                "price": price,
+                "rating": rating,
+                "rank": rank,
+                "review_count": review_count,
+            })
+    return competitors
+
+
+def bestseller_page_count(root) -> int:
+    """Highest ?pg= in the list's pagination (1 when there is none)"""
+    pages = [1]
+    for link in root.xpath(BESTSELLER_SELECTORS["page_links"]):
+        match = PAGE_PARAM_PATTERN.search(link.get("href", ""))
+        if match:
+            pages.append(int(match.group(1)))
+    return max(pages)
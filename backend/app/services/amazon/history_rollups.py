@@ -0,0 +1,255 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from sqlalchemy import case, delete, event, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.product import PriceHistory, PriceRollup
+from app.services.amazon.history_runs import as_utc, expand_runs
+from app.services.analytics.downsample import lttb
+
+RESOLUTIONS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+METRICS = ("price", "bsr", "review_count")
+
+# A resolution is good enough for a range when it yields at most this many
+# times the requested points; LTTB trims the rest
+OVERSAMPLE = 4
+
+
+Observation = namedtuple("Observation", "recorded_at price bsr review_count")
+
+
+def bucket_start(recorded_at: datetime, resolution: str) -> datetime:
+    recorded_at = as_utc(recorded_at)
+    if resolution == "hour":
+        return recorded_at.replace(minute=0, second=0, microsecond=0)
+    day = recorded_at.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return day
+    return day - timedelta(days=day.weekday())  # weeks start on Monday
+
+
+def _value(snapshot, metric: str):
+    value = getattr(snapshot, metric)
+    return float(value) if metric == "price" and value is not None else value
+
+
+def _rollup_rows(product_id: str, snapshots: Iterable) -> List[dict]:
+    """Aggregate snapshots (any order) into one row per (resolution, bucket)"""
+    rows: Dict[tuple, dict] = {}
+    for snapshot in snapshots:
+        recorded_at = as_utc(snapshot.recorded_at or datetime.now(timezone.utc))
+        for resolution in RESOLUTIONS:
+            key = (resolution, bucket_start(recorded_at, resolution))
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = {
+                    "product_id": product_id, "resolution": resolution, "bucket_start": key[1],
+                    "samples": 0, "last_recorded_at": None,
+                    **{f"{m}_{s}": None for m in METRICS for s in ("min", "max", "sum", "last")},
+                    **{f"{m}_n": 0 for m in METRICS},
+                }
+            row["samples"] += 1
+            is_last = row["last_recorded_at"] is None or recorded_at >= row["last_recorded_at"]
+            for metric in METRICS:
+                value = _value(snapshot, metric)
+                if is_last:
+                    row[f"{metric}_last"] = value
+                if value is None:
+                    continue
+                row[f"{metric}_min"] = value if row[f"{metric}_min"] is None else min(row[f"{metric}_min"], value)
+                row[f"{metric}_max"] = value if row[f"{metric}_max"] is None else max(row[f"{metric}_max"], value)
+                row[f"{metric}_sum"] = (row[f"{metric}_sum"] or 0) + value
+                row[f"{metric}_n"] += 1
+            if is_last:
+                row["last_recorded_at"] = recorded_at
+    return list(rows.values())
+
+
+def _upsert(rows: List[dict]):
+    """INSERT ... ON CONFLICT that folds new rows into existing buckets"""
+    stmt = insert(PriceRollup).values(rows)
+    t, new = PriceRollup.__table__.c, stmt.excluded
+    newer = new.last_recorded_at >= t.last_recorded_at
+    updates = {
+        "samples": t.samples + new.samples,
+        "last_recorded_at": case((newer, new.last_recorded_at), else_=t.last_recorded_at),
+    }
+    for metric in METRICS:
+        lo, hi, total, n, last = (f"{metric}_{s}" for s in ("min", "max", "sum", "n", "last"))
+        updates[lo] = func.coalesce(func.min(t[lo], new[lo]), t[lo], new[lo])
+        updates[hi] = func.coalesce(func.max(t[hi], new[hi]), t[hi], new[hi])
+        updates[total] = case(
+            (t[total].is_(None), new[total]),
+            (new[total].is_(None), t[total]),
+            else_=t[total] + new[total],
+        )
+        updates[n] = t[n] + new[n]
+        updates[last] = case((newer, new[last]), else_=t[last])
+    return stmt.on_conflict_do_update(index_elements=["product_id", "resolution", "bucket_start"], set_=updates)
+
+
+@event.listens_for(Session, "after_flush")
+def _rollup_new_snapshots(session, flush_context):
+    """Fold every observation written by this flush into the rollups, same transaction.
+
+    That is each new PriceHistory row plus each run extended by apply_scrape
+    in "changes" mode (queued in session.info, as no row is inserted for it).
+    """
+    by_product = defaultdict(list)
+    for obj in session.new:
+        if isinstance(obj, PriceHistory):
+            by_product[obj.product_id].append(obj)
+    for snapshot, observed_at in session.info.pop("rollup_observations", []):
+        by_product[snapshot.product_id].append(
+            Observation(observed_at, snapshot.price, snapshot.bsr, snapshot.review_count)
+        )
+    if not by_product:
+        return
+    rows = [row for product_id, snapshots in by_product.items() for row in _rollup_rows(product_id, snapshots)]
+    session.connection().execute(_upsert(rows))
+
+
+def rebuild_rollups(bind, product_ids: Optional[List[str]] = None, chunk_size: int = 500):
+    """Recompute rollups from raw PriceHistory.
+
+    Only buckets from each product's oldest remaining raw row onwards are
+    replaced, so rollups that outlived raw retention are left alone.
+    """
+    db = SessionLocal(bind=bind)  # SessionLocal's write lock still applies
+    try:
+        if product_ids is None:
+            product_ids = [row[0] for row in db.query(PriceHistory.product_id).distinct()]
+        for i in range(0, len(product_ids), chunk_size):
+            chunk = product_ids[i:i + chunk_size]
+            snapshots = defaultdict(list)
+            query = (
+                db.query(PriceHistory.product_id, PriceHistory.recorded_at, PriceHistory.valid_until,
+                         PriceHistory.repeat_count, PriceHistory.price, PriceHistory.bsr, PriceHistory.review_count)
+                .filter(PriceHistory.product_id.in_(chunk))
+            )
+            for observed_at, row in expand_runs(query):
+                snapshots[row.product_id].append(Observation(observed_at, row.price, row.bsr, row.review_count))
+            for product_id, rows in snapshots.items():
+                first = min(as_utc(r.recorded_at) for r in rows if r.recorded_at)
+                for resolution in RESOLUTIONS:
+                    db.execute(delete(PriceRollup).where(
+                        PriceRollup.product_id == product_id,
+                        PriceRollup.resolution == resolution,
+                        PriceRollup.bucket_start >= bucket_start(first, resolution),
+                    ))
+                db.execute(_upsert(_rollup_rows(product_id, rows)))
+            db.commit()
+    finally:
+        db.close()
+
+
+def choose_resolution(start: datetime, end: datetime, raw_count: int, points: int) -> str:
+    """Finest resolution that covers [start, end) in roughly `points` without overloading the response"""
+    now = datetime.now(timezone.utc)
+    budget = points * OVERSAMPLE
+    raw_complete = not settings.history_raw_retention_days or start >= now - timedelta(days=settings.history_raw_retention_days)
+    if raw_count <= budget and raw_complete:
+        return "raw"
+    span = end - start
+    for resolution, size in RESOLUTIONS.items():
+        if resolution == "hour" and start < now - timedelta(days=settings.history_hourly_retention_days):
+            continue
+        if span / size <= budget:
+            return resolution
+    return "week"
+
+
+def _avg(total, n, digits: int):
+    return round(total / n, digits) if n else None
+
+
+def _in_range(product_id: str, start: datetime, end: datetime) -> tuple:
+    # Runs overlapping the range count once per observation they stand for
+    return (
+        PriceHistory.product_id == product_id,
+        PriceHistory.recorded_at < end,
+        func.coalesce(PriceHistory.valid_until, PriceHistory.recorded_at) >= start,
+    )
+
+
+def raw_count_query(product_id: str, start: datetime, end: datetime):
+    return select(func.coalesce(func.sum(PriceHistory.repeat_count), 0)).where(*_in_range(product_id, start, end))
+
+
+def raw_history_query(product_id: str, start: datetime, end: datetime):
+    return (
+        select(PriceHistory.recorded_at, PriceHistory.valid_until, PriceHistory.repeat_count,
+               PriceHistory.price, PriceHistory.bsr, PriceHistory.rating, PriceHistory.review_count)
+        .where(*_in_range(product_id, start, end))
+        .order_by(PriceHistory.recorded_at)
+    )
+
+
+def rollup_query(product_id: str, resolution: str, start: datetime, end: datetime):
+    return (
+        select(PriceRollup)
+        .where(
+            PriceRollup.product_id == product_id,
+            PriceRollup.resolution == resolution,
+            PriceRollup.bucket_start >= bucket_start(start, resolution),
+            PriceRollup.bucket_start < end,
+        )
+        .order_by(PriceRollup.bucket_start)
+    )
+
+
+async def load_history(db: AsyncSession, product_id: str, start: datetime, end: datetime, points: int) -> dict:
+    start, end = as_utc(start), as_utc(end)
+    raw_count = (await db.execute(raw_count_query(product_id, start, end))).scalar()
+    resolution = choose_resolution(start, end, raw_count, points)
+
+    if resolution == "raw":
+        rows = (await db.execute(raw_history_query(product_id, start, end))).all()
+        observations = list(expand_runs(rows, start, end))
+        series = [
+            {
+                "recorded_at": as_utc(observed_at),
+                "price": float(r.price) if r.price is not None else None,
+                "bsr": r.bsr,
+                "rating": float(r.rating) if r.rating is not None else None,
+                "review_count": r.review_count,
+            }
+            for observed_at, r in observations
+        ]
+        times = [as_utc(observed_at).timestamp() for observed_at, _ in observations]
+    else:
+        rows = (await db.execute(rollup_query(product_id, resolution, start, end))).scalars().all()
+        series = []
+        for r in rows:
+            point = {"recorded_at": as_utc(r.bucket_start), "samples": r.samples}
+            for metric in METRICS:
+                point[metric] = _avg(getattr(r, f"{metric}_sum"), getattr(r, f"{metric}_n"), 2 if metric == "price" else 1)
+                point[f"{metric}_min"] = getattr(r, f"{metric}_min")
+                point[f"{metric}_max"] = getattr(r, f"{metric}_max")
+                point[f"{metric}_last"] = getattr(r, f"{metric}_last")
+            series.append(point)
+        times = [as_utc(r.bucket_start).timestamp() for r in rows]
+
+    source_points = len(series)
+    if source_points > points:
+        # Downsample on price, falling back to BSR for products with no prices
+        metric = "price" if any(p["price"] is not None for p in series) else "bsr"
+        values = np.array([p[metric] if p[metric] is not None else np.nan for p in series], dtype=np.float64)
+        series = [series[i] for i in lttb(np.array(times), values, points)]
+
+    return {
+        "from": start,
+        "to": end,
+        "resolution": resolution,
+        "source_points": source_points,
+        "points": series,
+    }
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# In "changes" storage mode a PriceHistory row stands for a run of identical
+# observations: the first at recorded_at, the last at valid_until,
+# repeat_count in total. Only the ends of a run are stored, so readers
+# spread the observations in between evenly.
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def run_times(recorded_at: datetime, valid_until: Optional[datetime], repeat_count: Optional[int]) -> List[datetime]:
+    if not valid_until or not repeat_count or repeat_count <= 1:
+        return [recorded_at]
+    step = (valid_until - recorded_at) / (repeat_count - 1)
+    return [recorded_at + step * i for i in range(repeat_count - 1)] + [valid_until]
+
+
+def expand_runs(rows: Iterable, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Tuple[datetime, object]]:
+    """(observed_at, row) for every observation behind rows with recorded_at/valid_until/repeat_count, clipped to [start, end)"""
+    start = as_utc(start) if start is not None else None
+    end = as_utc(end) if end is not None else None
+    for row in rows:
+        for observed_at in run_times(row.recorded_at, row.valid_until, row.repeat_count):
+            if start is not None and as_utc(observed_at) < start:
+                continue
+            if end is not None and as_utc(observed_at) >= end:
+                continue
+            yield observed_at, row
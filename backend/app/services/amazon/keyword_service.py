@@ -1,48 +1,141 @@
-import requests
-from typing import List, Dict
+import asyncio
+import httpx
 import time
+from typing import List, Dict, Optional
+from app.config import settings
+from app.services.amazon.rate_limiter import TokenBucket
+from app.services.amazon.scraper_client import get_async_client
+from app.services.metrics import upstream_requests
 
-def get_amazon_suggestions(keyword: str) -> List[str]:
-    """Get Amazon autocomplete suggestions"""
+SUGGESTION_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+}
+
+# One bucket for every autocomplete call this process makes
+suggestion_limiter = TokenBucket(settings.keyword_suggest_rate, settings.keyword_suggest_burst)
+
+
+def _suggestion_params(keyword: str) -> dict:
+    return {
+        "word": keyword,
+        "marketplace": "US",
+        "session-id": "123-1234567-1234567",
+        "customer-id": "",
+        "request-id": "123456789",
+        "page-type": "Gateway",
+        "lop": "en_US",
+        "site-variant": "desktop",
+        "client-info": "amazon-search-ui",
+        "mid": "ATVPDKIKX0DER",
+        "alias": "aps",
+        "b2b": "0",
+        "fresh": "0",
+        "ks": "80",
+        "prefix": keyword,
+        "event": "onKeyPress",
+        "limit": "11",
+        "fb": "1",
+    }
+
+
+def _parse_suggestions(keyword: str, data: dict) -> List[str]:
+    suggestions = []
+    for item in data.get("suggestions", []):
+        value = item.get("value", "")
+        if value and value != keyword:
+            suggestions.append(value)
+    return suggestions[:10]
+
+
+async def get_amazon_suggestions_async(
+    keyword: str,
+    client: Optional[httpx.AsyncClient] = None,
+    deadline: Optional[float] = None,
+) -> List[str]:
+    """Get Amazon autocomplete suggestions through the shared rate limiter"""
+    if not await suggestion_limiter.acquire(deadline):
+        return []
+    timeout = 10.0
+    if deadline is not None:
+        timeout = max(0.1, min(timeout, deadline - time.monotonic()))
+    started = time.perf_counter()
+    status = "error"
     try:
-        url = "https://completion.amazon.com/api/2017/suggestions"
-        params = {
-            "word": keyword,
-            "marketplace": "US",
-            "session-id": "123-1234567-1234567",
-            "customer-id": "",
-            "request-id": "123456789",
-            "page-type": "Gateway",
-            "lop": "en_US",
-            "site-variant": "desktop",
-            "client-info": "amazon-search-ui",
-            "mid": "ATVPDKIKX0DER",
-            "alias": "aps",
-            "b2b": "0",
-            "fresh": "0",
-            "ks": "80",
-            "prefix": keyword,
-            "event": "onKeyPress",
-            "limit": "11",
-            "fb": "1",
-        }
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        }
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = await (client or get_async_client()).get(
+            settings.keyword_suggest_url, params=_suggestion_params(keyword), headers=SUGGESTION_HEADERS, timeout=timeout
+        )
+        status = str(response.status_code)
         if response.status_code == 200:
-            data = response.json()
-            suggestions = []
-            for item in data.get("suggestions", []):
-                value = item.get("value", "")
-                if value and value != keyword:
-                    suggestions.append(value)
-            return suggestions[:10]
+            return _parse_suggestions(keyword, response.json())
     except Exception as e:
         print(f"Suggestion error: {e}")
+    finally:
+        upstream_requests.observe(time.perf_counter() - started, "autocomplete", status)
     return []
 
 
+async def _with_client(fn):
+    # Sync callers run on their own loop, which can't reuse the app's pooled client
+    async with httpx.AsyncClient(follow_redirects=True) as client:
+        return await fn(client)
+
+
+def get_amazon_suggestions(keyword: str) -> List[str]:
+    """Get Amazon autocomplete suggestions"""
+    return asyncio.run(_with_client(lambda client: get_amazon_suggestions_async(keyword, client)))
+
+
+async def expand_seeds(
+    seeds: List[str],
+    budget_seconds: float,
+    depth: int = 2,
+    client: Optional[httpx.AsyncClient] = None,
+) -> List[str]:
+    """Expand seeds into an autocomplete suggestion tree under a latency budget.
+
+    All seeds are queried concurrently and each suggestion is expanded as
+    soon as its parent returns, up to `depth` levels and
+    `keyword_second_level_seeds` extra lookups. When the deadline passes,
+    outstanding calls are cancelled and whatever arrived is returned.
+    """
+    deadline = time.monotonic() + budget_seconds
+    expanded = set()
+    found: List[str] = []
+    extra_budget = settings.keyword_second_level_seeds
+    pending = {}
+
+    def schedule(keyword: str, level: int):
+        expanded.add(keyword)
+        task = asyncio.create_task(get_amazon_suggestions_async(keyword, client, deadline))
+        pending[task] = level
+
+    for seed in dict.fromkeys(seeds):
+        schedule(seed, 1)
+
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                level = pending.pop(task)
+                if task.exception() is not None:
+                    continue
+                for suggestion in task.result():
+                    if suggestion in found:
+                        continue
+                    found.append(suggestion)
+                    if level < depth and extra_budget > 0 and suggestion not in expanded:
+                        extra_budget -= 1
+                        schedule(suggestion, level + 1)
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return found
+
+
 def estimate_search_volume(keyword: str) -> Dict:
     """Estimate search volume based on keyword characteristics"""
     word_count = len(keyword.split())
@@ -85,11 +178,7 @@ def estimate_search_volume(keyword: str) -> Dict:
     }
 
 
-def get_keywords_for_product(title: str, asin: str) -> List[Dict]:
-    """Generate keywords from product title + suggestions"""
-    if not title:
-        return []
-    
+def extract_seed_keywords(title: str) -> List[str]:
     # Extract seed keywords from title
     stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", 
                   "for", "of", "with", "by", "from", "edition", "version", "2nd",
@@ -111,15 +200,10 @@ def get_keywords_for_product(title: str, asin: str) -> List[Dict]:
         if w1 not in stop_words and w2 not in stop_words and len(w1) > 2 and len(w2) > 2:
             seed_keywords.append(f"{w1} {w2}")
     
-    # Get suggestions for top seeds
-    all_keywords = list(set(seed_keywords[:5]))
-    
-    for seed in seed_keywords[:3]:
-        suggestions = get_amazon_suggestions(seed)
-        all_keywords.extend(suggestions)
-        time.sleep(0.3)
-    
-    # Score all keywords
+    return seed_keywords
+
+
+def score_keywords(all_keywords: List[str]) -> List[Dict]:
     scored = []
     seen = set()
     for kw in all_keywords:
@@ -129,4 +213,29 @@ def get_keywords_for_product(title: str, asin: str) -> List[Dict]:
     
     # Sort by opportunity score
     scored.sort(key=lambda x: x["opportunity_score"], reverse=True)
-    return scored[:20]
\ No newline at end of file
+    return scored[:20]
+
+
+async def get_keywords_for_product_async(
+    title: str,
+    asin: str,
+    client: Optional[httpx.AsyncClient] = None,
+) -> List[Dict]:
+    """Generate keywords from product title + suggestions within the keyword latency budget"""
+    if not title:
+        return []
+    
+    seed_keywords = extract_seed_keywords(title)
+    all_keywords = list(set(seed_keywords[:5]))
+    all_keywords.extend(await expand_seeds(
+        seed_keywords[:settings.keyword_seed_count],
+        budget_seconds=settings.keyword_budget_seconds,
+        depth=settings.keyword_expand_depth,
+        client=client,
+    ))
+    return score_keywords(all_keywords)
+
+
+def get_keywords_for_product(title: str, asin: str) -> List[Dict]:
+    """Generate keywords from product title + suggestions"""
+    return asyncio.run(_with_client(lambda client: get_keywords_for_product_async(title, asin, client)))
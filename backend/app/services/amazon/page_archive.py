@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Optional
+import httpx
+from app.config import settings
+from app.database import SessionLocal
+from app.models.archive import RawPage
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Pages are stored once per distinct body at <root>/ab/cd/<sha256>.html.zst
+# (or .html.gz). The raw_pages table indexes every fetch by ASIN/URL and
+# time, so repeated identical fetches cost one index row, not another blob.
+SUFFIXES = (".zst", ".gz")
+
+
+def _suffix() -> str:
+    if settings.page_archive_codec == "zstd" and zstandard is not None:
+        return ".zst"
+    return ".gz"
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def blob_path(root: str, sha: str, suffix: str) -> str:
+    return os.path.join(root, sha[:2], sha[2:4], f"{sha}.html{suffix}")
+
+
+def find_blob(root: str, sha: str) -> Optional[str]:
+    for suffix in SUFFIXES:
+        path = blob_path(root, sha, suffix)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def write_blob(root: str, html: str) -> str:
+    """Compress and store a page under its content hash; returns the hash"""
+    raw = html.encode("utf-8")
+    sha = hashlib.sha256(raw).hexdigest()
+    if find_blob(root, sha):
+        return sha
+
+    suffix = _suffix()
+    path = blob_path(root, sha, suffix)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    if suffix == ".zst":
+        data = zstandard.ZstdCompressor(level=10).compress(raw)
+    else:
+        data = gzip.compress(raw, compresslevel=6)
+
+    # Write then rename so readers never see a half-written blob
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return sha
+
+
+def read_blob(root: str, sha: str) -> Optional[str]:
+    path = find_blob(root, sha)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return gzip.decompress(data).decode("utf-8")
+
+
+def archive_page(url: str, status_code: int, html: str, asin: Optional[str] = None, kind: str = "product") -> Optional[str]:
+    """Keep a fetched page for later re-parsing; returns its hash, or None when archiving is off or fails"""
+    if not settings.page_archive_enabled or not html:
+        return None
+    if settings.scraper_replay:
+        # The page came out of the archive, it is already stored and indexed
+        return content_hash(html)
+    try:
+        sha = write_blob(settings.page_archive_dir, html)
+        db = SessionLocal()
+        try:
+            db.add(RawPage(
+                url=url,
+                asin=asin,
+                kind=kind,
+                sha256=sha,
+                status_code=status_code,
+                size_bytes=len(html),
+                fetched_at=datetime.now(timezone.utc),
+            ))
+            db.commit()
+        finally:
+            db.close()
+        return sha
+    except Exception as e:
+        print(f"Page archive error: {e}")
+        return None
+
+
+def latest_page(url: str) -> Optional[RawPage]:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(RawPage)
+            .filter(RawPage.url == url)
+            .order_by(RawPage.fetched_at.desc())
+            .first()
+        )
+    finally:
+        db.close()
+
+
+class ReplayMiss(LookupError):
+    """Replay mode was asked for a URL the archive has no copy of"""
+
+
+def replay_response(url: str) -> httpx.Response:
+    """Answer a fetch from the newest archived copy of url, as ScraperAPI would have"""
+    page = latest_page(url)
+    html = read_blob(settings.page_archive_dir, page.sha256) if page else None
+    if html is None:
+        raise ReplayMiss(url)
+    return httpx.Response(page.status_code, text=html)
@@ -1,8 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 from typing import Optional
-import re
+from app.services.amazon.extraction import parse_document, extract_product
 from app.config import settings
+from app.services.amazon.page_archive import ReplayMiss, archive_page
+from app.services.amazon.scraper_client import fetch_page, fetch_page_sync
+from app.services.metrics import scrape_outcomes, mock_fallbacks
+
+
+def _fallback(asin: str, outcome: str) -> Optional[dict]:
+    scrape_outcomes.inc("product", outcome)
+    if settings.scraper_replay:
+        return None  # a replay reproduces what was archived; mock data would pass for a real page
+    mock_fallbacks.inc("product")
+    return get_mock_product(asin)
 
 
 def get_mock_product(asin: str) -> dict:
@@ -23,109 +33,69 @@ def get_mock_product(asin: str) -> dict:
     }
 
 
-def scrape_amazon_product(asin: str) -> Optional[dict]:
-    """Scrape Amazon product using ScraperAPI"""
+def parse_product_page(asin: str, status_code: int, html: str) -> Optional[dict]:
+    """Extract product fields from a ScraperAPI response, falling back to mock data (None in replay mode)"""
     amazon_url = f"https://www.amazon.com/dp/{asin}"
 
-    params = {
-        "api_key": settings.scraper_api_key,
-        "url": amazon_url,
-        "country_code": "us",
-        "premium": "true",
+    print(f"Status: {status_code}, Length: {len(html)}")
+
+    if status_code != 200 or len(html) < 5000:
+        print("Scraper failed — using mock data for testing")
+        return _fallback(asin, "http_error")
+
+    if "captcha" in html.lower():
+        print("Captcha detected — using mock data")
+        return _fallback(asin, "captcha")
+
+    fields = extract_product(parse_document(html))
+
+    if not fields["title"]:
+        print("No title found — using mock data")
+        return _fallback(asin, "no_title")
+
+    scrape_outcomes.inc("product", "ok")
+    return {
+        "asin": asin,
+        **fields,
+        "amazon_url": amazon_url,
+        "in_stock": True,
+        "is_prime": True,
     }
 
+
+def _archive_and_parse(asin: str, amazon_url: str, status_code: int, html: str) -> Optional[dict]:
+    page_sha256 = archive_page(amazon_url, status_code, html, asin=asin, kind="product")
+    data = parse_product_page(asin, status_code, html)
+    if data is not None:
+        data["page_sha256"] = page_sha256
+    return data
+
+
+async def scrape_amazon_product_async(asin: str) -> Optional[dict]:
+    """Scrape Amazon product using ScraperAPI over the shared async client"""
+    amazon_url = f"https://www.amazon.com/dp/{asin}"
     try:
-        response = requests.get(
-            "http://api.scraperapi.com",
-            params=params,
-            timeout=70
-        )
-
-        print(f"Status: {response.status_code}, Length: {len(response.text)}")
-
-        if response.status_code != 200 or len(response.text) < 5000:
-            print("Scraper failed — using mock data for testing")
-            return get_mock_product(asin)
-
-        if "captcha" in response.text.lower():
-            print("Captcha detected — using mock data")
-            return get_mock_product(asin)
-
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        title = None
-        elem = soup.find("span", {"id": "productTitle"})
-        if elem:
-            title = elem.get_text(strip=True)
-
-        if not title:
-            print("No title found — using mock data")
-            return get_mock_product(asin)
-
-        price = None
-        elem = soup.find("span", {"class": "a-price-whole"})
-        if elem:
-            try:
-                price = float(elem.get_text(strip=True).replace(",", ""))
-            except:
-                pass
-
-        rating = None
-        elem = soup.find("span", {"class": "a-icon-alt"})
-        if elem:
-            try:
-                rating = float(elem.get_text(strip=True).split(" ")[0])
-            except:
-                pass
-
-        review_count = None
-        elem = soup.find("span", {"id": "acrCustomerReviewText"})
-        if elem:
-            try:
-                review_count = int(re.sub(r"[^\d]", "", elem.get_text()))
-            except:
-                pass
-
-        bsr = None
-        match = re.search(r"#([\d,]+)\s+in", soup.get_text())
-        if match:
-            try:
-                bsr = int(match.group(1).replace(",", ""))
-            except:
-                pass
-
-        brand = None
-        elem = soup.find("a", {"id": "bylineInfo"})
-        if elem:
-            brand = re.sub(r"(Brand:|Visit the|Store)", "", elem.get_text(strip=True)).strip()
-
-        category = None
-        breadcrumb = soup.find("div", {"id": "wayfinding-breadcrumbs_feature_div"})
-        if breadcrumb:
-            links = breadcrumb.find_all("a")
-            if links:
-                category = links[0].get_text(strip=True)
-
-        image_url = None
-        img = soup.find("img", {"id": "landingImage"})
-        if img:
-            image_url = img.get("src")
-
-        return {
-            "asin": asin,
-            "title": title,
-            "brand": brand,
-            "category": category,
-            "price": price,
-            "rating": rating,
-            "review_count": review_count,
-            "bsr": bsr,
-            "image_url": image_url,
-            "amazon_url": amazon_url,
-            "in_stock": True,
-            "is_prime": True,
-        }
+        response = await fetch_page(amazon_url, premium=True)
+        return await asyncio.to_thread(_archive_and_parse, asin, amazon_url, response.status_code, response.text)
+    except ReplayMiss:
+        print(f"Replay miss: {amazon_url}")
+        scrape_outcomes.inc("product", "replay_miss")
+        return None
+    except Exception as e:
+        print(f"Exception: {e} — using mock data")
+        return _fallback(asin, "exception")
+
 
+def scrape_amazon_product(asin: str) -> Optional[dict]:
+    """Blocking wrapper kept for scripts and sync callers"""
+    amazon_url = f"https://www.amazon.com/dp/{asin}"
+    try:
+        response = fetch_page_sync(amazon_url, premium=True)
+        return _archive_and_parse(asin, amazon_url, response.status_code, response.text)
+    except ReplayMiss:
+        print(f"Replay miss: {amazon_url}")
+        scrape_outcomes.inc("product", "replay_miss")
+        return None
     except Exception as e:
         print(f"Exception: {e} — using mock data")
-        return get_mock_product(asin)
\ No newline at end of file
+        return _fallback(asin, "exception")
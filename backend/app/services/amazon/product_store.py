@@ -0,0 +1,138 @@
+from sqlalchemy import func, and_
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.models.product import Product, PriceHistory
+from app.services.amazon import history_rollups  # noqa: F401  (registers the rollup flush hook)
+from app.services.analytics import analysis_store  # noqa: F401  (registers the analysis flush hook)
+import uuid
+
+STALE_AFTER_HOURS = 6
+
+
+def is_stale(product: Optional[Product]) -> bool:
+    if not product or not product.last_synced_at:
+        return True
+    last_synced = product.last_synced_at
+    if last_synced.tzinfo is None:
+        last_synced = last_synced.replace(tzinfo=timezone.utc)
+    age_hours = (datetime.now(timezone.utc) - last_synced).total_seconds() / 3600
+    return age_hours > STALE_AFTER_HOURS
+
+
+def apply_scrape(db: Session, asin: str, data: dict, product: Optional[Product] = None) -> Product:
+    """Stage the product upsert and a new PriceHistory row for one scrape.
+
+    Ids are assigned up front so many scrapes can be staged and written in a
+    single flush/commit by the caller. In "changes" storage mode a scrape
+    identical to the latest snapshot extends that row instead of adding one.
+    """
+    if not product:
+        product = Product(
+            id=str(uuid.uuid4()),
+            asin=asin,
+            title=data["title"],
+            brand=data["brand"],
+            category=data["category"],
+            image_url=data["image_url"],
+            amazon_url=data["amazon_url"],
+            is_prime=data["is_prime"],
+        )
+        db.add(product)
+    else:
+        product.title = data["title"]
+        product.brand = data["brand"]
+
+    now = datetime.now(timezone.utc)
+    if settings.history_storage_mode == "changes" and _unchanged(product, data):
+        snapshot = db.get(PriceHistory, product.latest_snapshot_id)
+        if snapshot is not None:
+            snapshot.valid_until = now
+            snapshot.repeat_count = (snapshot.repeat_count or 1) + 1
+            # Rollups still count this observation; the flush hook picks it up
+            db.info.setdefault("rollup_observations", []).append((snapshot, now))
+            product.latest_recorded_at = now
+            product.last_synced_at = now
+            return product
+
+    snapshot = PriceHistory(
+        id=str(uuid.uuid4()),
+        product_id=product.id,
+        price=data["price"],
+        bsr=data["bsr"],
+        rating=data["rating"],
+        review_count=data["review_count"],
+        in_stock=data["in_stock"],
+        recorded_at=now,
+        page_sha256=data.get("page_sha256"),
+    )
+    db.add(snapshot)
+    set_latest(product, snapshot)
+
+    product.last_synced_at = now
+    return product
+
+
+def _rounded(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def _unchanged(product: Optional[Product], data: dict) -> bool:
+    return (
+        product is not None
+        and product.latest_snapshot_id is not None
+        and _rounded(product.latest_price) == _rounded(data["price"])
+        and product.latest_bsr == data["bsr"]
+        and _rounded(product.latest_rating) == _rounded(data["rating"])
+        and product.latest_review_count == data["review_count"]
+        and product.latest_in_stock == data["in_stock"]
+    )
+
+
+def set_latest(product: Product, snapshot: PriceHistory):
+    product.latest_snapshot_id = snapshot.id
+    product.latest_price = snapshot.price
+    product.latest_bsr = snapshot.bsr
+    product.latest_rating = snapshot.rating
+    product.latest_review_count = snapshot.review_count
+    product.latest_in_stock = snapshot.in_stock
+    product.latest_recorded_at = snapshot.valid_until or snapshot.recorded_at
+
+
+def latest_snapshots(db: Session, product_ids: List[str]) -> Dict[str, PriceHistory]:
+    """Latest PriceHistory row per product in one query"""
+    if not product_ids:
+        return {}
+    latest_at = (
+        db.query(PriceHistory.product_id, func.max(PriceHistory.recorded_at).label("recorded_at"))
+        .filter(PriceHistory.product_id.in_(product_ids))
+        .group_by(PriceHistory.product_id)
+        .subquery()
+    )
+    rows = (
+        db.query(PriceHistory)
+        .join(latest_at, and_(
+            PriceHistory.product_id == latest_at.c.product_id,
+            PriceHistory.recorded_at == latest_at.c.recorded_at,
+        ))
+        .all()
+    )
+    return {row.product_id: row for row in rows}
+
+
+def backfill_latest(bind, chunk_size: int = 1000):
+    """Populate latest_* columns for products that predate them"""
+    db = SessionLocal(bind=bind)  # SessionLocal's write lock still applies
+    try:
+        ids = [row[0] for row in db.query(Product.id).filter(Product.latest_snapshot_id.is_(None)).all()]
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            snapshots = latest_snapshots(db, chunk)
+            for product in db.query(Product).filter(Product.id.in_(chunk)).all():
+                if product.id in snapshots:
+                    set_latest(product, snapshots[product.id])
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Token bucket shared by every caller in the process.
+
+    State is guarded by a thread lock rather than an asyncio primitive, so the
+    same bucket works from the main event loop and from sync wrappers that
+    spin up their own loop in a worker thread.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token now, or return how long to wait before one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Wait for a token; give up (False) if none frees up before `deadline` (monotonic time)"""
+        while True:
+            wait = self.reserve()
+            if wait == 0.0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
@@ -0,0 +1,240 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.config import settings
+from app.database import SessionLocal
+from app.models.lease import RefreshLease
+from app.models.product import Product
+from app.services.amazon.product_scraper import scrape_amazon_product_async
+from app.services.amazon.product_store import apply_scrape, is_stale
+
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the work; anyone arriving while it is in
+    flight - from the event loop or from a threadpool worker - waits on the
+    same Future and gets the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def claim(self, key: str):
+        """(future, True) if the caller now owns key and must finish() it, else (in-flight future, False)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def finish(self, key: str, future: Future, result=None, error: Optional[BaseException] = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def pending(self, key: str) -> Optional[Future]:
+        with self._lock:
+            return self._calls.get(key)
+
+    def do(self, key: str, fn: Callable):
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable):
+        future, leader = self.claim(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+
+
+flights = SingleFlight()
+
+
+# Cross-worker leases. Within one worker SingleFlight is enough; with several
+# uvicorn workers a lease makes sure only one of them scrapes a given ASIN.
+
+def _acquire_db_lease(asin: str, ttl: float) -> bool:
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        db.query(RefreshLease).filter(
+            RefreshLease.asin == asin, RefreshLease.expires_at < now
+        ).delete(synchronize_session=False)
+        db.add(RefreshLease(asin=asin, owner=WORKER_ID, expires_at=now + timedelta(seconds=ttl)))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def _release_db_lease(asin: str):
+    db = SessionLocal()
+    try:
+        db.query(RefreshLease).filter(
+            RefreshLease.asin == asin, RefreshLease.owner == WORKER_ID
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _db_lease_held(asin: str) -> bool:
+    db = SessionLocal()
+    try:
+        lease = db.query(RefreshLease).filter(RefreshLease.asin == asin).first()
+        if not lease:
+            return False
+        expires_at = lease.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return expires_at > datetime.now(timezone.utc)
+    finally:
+        db.close()
+
+
+_redis = None
+
+def _redis_client():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(settings.redis_url)
+    return _redis
+
+
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+def acquire_lease(asin: str) -> bool:
+    ttl = settings.scraper_timeout + 30
+    if settings.refresh_lease_backend == "db":
+        return _acquire_db_lease(asin, ttl)
+    if settings.refresh_lease_backend == "redis":
+        return bool(_redis_client().set(f"refresh-lease:{asin}", WORKER_ID, nx=True, px=int(ttl * 1000)))
+    return True
+
+
+def release_lease(asin: str):
+    if settings.refresh_lease_backend == "db":
+        _release_db_lease(asin)
+    elif settings.refresh_lease_backend == "redis":
+        _redis_client().eval(_RELEASE_SCRIPT, 1, f"refresh-lease:{asin}", WORKER_ID)
+
+
+def lease_held(asin: str) -> bool:
+    if settings.refresh_lease_backend == "db":
+        return _db_lease_held(asin)
+    if settings.refresh_lease_backend == "redis":
+        return bool(_redis_client().exists(f"refresh-lease:{asin}"))
+    return False
+
+
+def _save(asin: str, data: dict):
+    db = SessionLocal()
+    try:
+        product = db.query(Product).filter(Product.asin == asin).first()
+        apply_scrape(db, asin, data, product)
+        db.commit()
+    finally:
+        db.close()
+
+
+def save_batch(scraped: Dict[str, dict]) -> Dict[str, str]:
+    """Persist many scrapes, in one transaction when possible.
+
+    If that transaction fails (say another worker inserted one of the
+    products first) each scrape is retried on its own, so one conflict
+    doesn't discard the rest. Returns the error for each ASIN not saved.
+    """
+    db = SessionLocal()
+    try:
+        existing = {p.asin: p for p in db.query(Product).filter(Product.asin.in_(list(scraped)))}
+        for asin, data in scraped.items():
+            apply_scrape(db, asin, data, existing.get(asin))
+        db.commit()
+        return {}
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Batch save error, retrying per product: {e}")
+    finally:
+        db.close()
+
+    failed = {}
+    for asin, data in scraped.items():
+        try:
+            _save(asin, data)
+        except SQLAlchemyError as e:
+            print(f"Save error for {asin}: {e}")
+            failed[asin] = type(e).__name__
+    return failed
+
+
+def _is_fresh_in_db(asin: str) -> bool:
+    db = SessionLocal()
+    try:
+        return not is_stale(db.query(Product).filter(Product.asin == asin).first())
+    finally:
+        db.close()
+
+
+async def _wait_for_other_worker(asin: str) -> bool:
+    deadline = time.monotonic() + settings.scraper_timeout + 30
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+        if not await asyncio.to_thread(lease_held, asin):
+            break
+    return await asyncio.to_thread(_is_fresh_in_db, asin)
+
+
+async def _scrape_and_save(asin: str) -> bool:
+    if not await asyncio.to_thread(acquire_lease, asin):
+        return await _wait_for_other_worker(asin)
+    try:
+        data = await scrape_amazon_product_async(asin)
+        if not data:
+            return False
+        await asyncio.to_thread(_save, asin, data)
+        return True
+    finally:
+        await asyncio.to_thread(release_lease, asin)
+
+
+async def refresh_product(asin: str) -> bool:
+    """Scrape and persist one ASIN, sharing the work with concurrent callers.
+
+    Returns True once a fresh snapshot is in the DB, whether this caller
+    wrote it or waited on someone else's scrape.
+    """
+    return await flights.do_async(asin, lambda: _scrape_and_save(asin))
@@ -1,3 +1,8 @@
+import numpy as np
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Sequence, Tuple, Union
+
 CATEGORY_CURVES = {
     "home": [(1,45000),(100,7000),(1000,1400),(5000,380),(10000,180),(50000,30)],
     "electronics": [(1,30000),(100,4000),(1000,800),(5000,200),(10000,90),(50000,15)],
@@ -9,66 +14,137 @@ CATEGORY_CURVES = {
     "default": [(1,30000),(100,4200),(1000,850),(5000,215),(10000,100),(50000,17)],
 }
 
+# BSR-to-sales is close to a power law, so interpolating between log(bsr)
+# and log(units) follows it far better than straight lines between knots.
+# Curves are compiled to log-space arrays once, at import.
+CURVE_NAMES = list(CATEGORY_CURVES)
+DEFAULT_CURVE = CURVE_NAMES.index("default")
+
+
+@lru_cache(maxsize=64)
+def _compile_curve(points: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    points = sorted(points)
+    ranks = np.array([p[0] for p in points], dtype=np.float64)
+    sales = np.array([p[1] for p in points], dtype=np.float64)
+    return np.log(ranks), np.log(np.maximum(sales, 1e-9))
+
+
+COMPILED_CURVES = [_compile_curve(tuple(CATEGORY_CURVES[name])) for name in CURVE_NAMES]
+
+
+def _interpolate(bsrs: np.ndarray, log_ranks: np.ndarray, log_sales: np.ndarray) -> np.ndarray:
+    """Units for positive BSRs; outside the curve np.interp clamps to the end knots"""
+    units = np.exp(np.interp(np.log(bsrs), log_ranks, log_sales))
+    # The epsilon keeps a BSR sitting exactly on a knot from flooring one unit low
+    return np.floor(units + 1e-6).astype(np.int64)
+
+
+@lru_cache(maxsize=4096)
+def curve_for_category(category: str) -> Tuple[int, str]:
+    """Index into CURVE_NAMES and the confidence that goes with it"""
+    category_lower = (category or "").lower()
+    for i, key in enumerate(CURVE_NAMES):
+        if key != "default" and key in category_lower:
+            return i, "high"
+    return DEFAULT_CURVE, "medium"
+
+
+def estimate_sales_batch(bsrs: Sequence, categories: Union[str, Sequence[str]]) -> dict:
+    """Monthly units for whole arrays of BSRs in one pass.
+
+    Returns numpy arrays: monthly_units (0 where there is no BSR), has_bsr
+    and confidence ("low" where there is no BSR). Each distinct category
+    string is resolved to a curve once, however many rows share it.
+    """
+    bsrs = np.asarray(bsrs, dtype=np.float64)
+    if isinstance(categories, str) or categories is None:
+        curve_idx, confidence = curve_for_category(categories or "")
+        curve_idx = np.full(bsrs.shape, curve_idx)
+        high = np.full(bsrs.shape, confidence == "high")
+    else:
+        unique, inverse = np.unique(np.array([c or "" for c in categories], dtype=str), return_inverse=True)
+        lookups = [curve_for_category(c) for c in unique]
+        curve_idx = np.array([idx for idx, _ in lookups], dtype=np.int64)[inverse]
+        high = np.array([conf == "high" for _, conf in lookups], dtype=bool)[inverse]
+
+    has_bsr = bsrs > 0  # NaN (a missing BSR) compares False
+    units = np.zeros(bsrs.shape, dtype=np.int64)
+    for i, (log_ranks, log_sales) in enumerate(COMPILED_CURVES):
+        mask = has_bsr & (curve_idx == i)
+        if mask.any():
+            units[mask] = _interpolate(bsrs[mask], log_ranks, log_sales)
+
+    confidence = np.where(has_bsr, np.where(high, "high", "medium"), "low")
+    return {"monthly_units": units, "has_bsr": has_bsr, "confidence": confidence}
+
+
 def interpolate_sales(bsr: int, curve: list) -> int:
     if bsr <= 0:
         return 0
-    curve = sorted(curve, key=lambda x: x[0])
-    if bsr <= curve[0][0]:
-        return curve[0][1]
-    if bsr >= curve[-1][0]:
-        return max(0, curve[-1][1])
-    for i in range(len(curve) - 1):
-        bsr_low, sales_high = curve[i]
-        bsr_high, sales_low = curve[i + 1]
-        if bsr_low <= bsr <= bsr_high:
-            ratio = (bsr - bsr_low) / (bsr_high - bsr_low)
-            return max(0, int(sales_high - ratio * (sales_high - sales_low)))
-    return 0
+    log_ranks, log_sales = _compile_curve(tuple(map(tuple, curve)))
+    return max(0, int(_interpolate(np.array([bsr], dtype=np.float64), log_ranks, log_sales)[0]))
+
 
 def estimate_monthly_sales(bsr: int, category: str) -> dict:
     if not bsr or bsr <= 0:
         return {"monthly_units": None, "confidence": "low"}
-    
-    category_lower = (category or "").lower()
-    curve = CATEGORY_CURVES["default"]
-    confidence = "medium"
-    
-    for key, cat_curve in CATEGORY_CURVES.items():
-        if key != "default" and key in category_lower:
-            curve = cat_curve
-            confidence = "high"
-            break
-    
-    monthly_units = interpolate_sales(bsr, curve)
-    return {"monthly_units": monthly_units, "confidence": confidence}
+    curve_idx, confidence = curve_for_category(category or "")
+    units = _interpolate(np.array([bsr], dtype=np.float64), *COMPILED_CURVES[curve_idx])
+    return {"monthly_units": int(units[0]), "confidence": confidence}
+
+
+# (thresholds, points) for calculate_opportunity_score. Demand, reviews and
+# BSR bands are "value >= threshold" (bisect right); seller bands are
+# inclusive on their upper edge (bisect left). The scalar function bisects
+# these tuples and the batch path searchsorts the same values, so both agree.
+DEMAND_STEPS = ((100, 300, 800, 1500, 3000), (0, 5, 10, 17, 23, 30))     # 30 pts
+REVIEW_STEPS = ((100, 500, 1000, 3000, 8000), (30, 22, 15, 8, 3, 0))     # 30 pts
+BSR_STEPS = ((1000, 5000, 15000, 50000), (20, 15, 10, 5, 0))             # 20 pts
+SELLER_STEPS = ((1, 3, 8, 15), (20, 15, 10, 5, 0))                       # 20 pts
+
+
+def _points(steps: tuple, values: np.ndarray, side: str) -> np.ndarray:
+    thresholds, points = steps
+    return np.asarray(points)[np.searchsorted(thresholds, values, side=side)]
+
+
+def opportunity_scores(bsrs, review_counts, monthly_sales, seller_counts=1) -> np.ndarray:
+    """calculate_opportunity_score over whole arrays; returns integer scores (0-100)"""
+    bsrs, review_counts, monthly_sales, seller_counts = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (bsrs, review_counts, monthly_sales, seller_counts))
+    )
+    score = (
+        _points(DEMAND_STEPS, monthly_sales, "right")
+        + _points(REVIEW_STEPS, review_counts, "right")
+        + _points(BSR_STEPS, bsrs, "right")
+        + _points(SELLER_STEPS, seller_counts, "left")
+    )
+    return np.minimum(score, 100)
+
+
+def estimate_batch(bsrs, review_counts, categories, seller_counts=1) -> dict:
+    """Units, confidence and opportunity score for many products in one vectorized call.
+
+    opportunity_score is NaN where there is no sales estimate, matching the
+    single-product routes, which only score products with monthly units.
+    """
+    sales = estimate_sales_batch(bsrs, categories)
+    units = sales["monthly_units"]
+    scores = opportunity_scores(
+        np.nan_to_num(np.asarray(bsrs, dtype=np.float64)),
+        np.nan_to_num(np.asarray(review_counts, dtype=np.float64)),
+        units,
+        seller_counts,
+    ).astype(np.float64)
+    scores[units <= 0] = np.nan
+    return {**sales, "opportunity_score": scores}
+
 
 def calculate_opportunity_score(bsr, review_count, monthly_sales, seller_count) -> float:
-    score = 0
-    
-    # Demand (30 pts)
-    if monthly_sales >= 3000: score += 30
-    elif monthly_sales >= 1500: score += 23
-    elif monthly_sales >= 800: score += 17
-    elif monthly_sales >= 300: score += 10
-    elif monthly_sales >= 100: score += 5
-    
-    # Low competition reviews (30 pts)
-    if review_count < 100: score += 30
-    elif review_count < 500: score += 22
-    elif review_count < 1000: score += 15
-    elif review_count < 3000: score += 8
-    elif review_count < 8000: score += 3
-    
-    # BSR strength (20 pts)
-    if bsr < 1000: score += 20
-    elif bsr < 5000: score += 15
-    elif bsr < 15000: score += 10
-    elif bsr < 50000: score += 5
-    
-    # Seller count (20 pts)
-    if seller_count <= 1: score += 20
-    elif seller_count <= 3: score += 15
-    elif seller_count <= 8: score += 10
-    elif seller_count <= 15: score += 5
-    
-    return round(min(100, score), 1)
\ No newline at end of file
+    score = (
+        DEMAND_STEPS[1][bisect_right(DEMAND_STEPS[0], monthly_sales)]
+        + REVIEW_STEPS[1][bisect_right(REVIEW_STEPS[0], review_count)]
+        + BSR_STEPS[1][bisect_right(BSR_STEPS[0], bsr)]
+        + SELLER_STEPS[1][bisect_left(SELLER_STEPS[0], seller_count)]
+    )
+    return round(min(100, score), 1)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+import httpx
+from typing import Optional
+from app.config import settings
+from app.services.amazon.page_archive import replay_response
+from app.services.metrics import upstream_requests
+
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.scraper_max_connections,
+        max_keepalive_connections=settings.scraper_max_connections,
+        keepalive_expiry=30,
+    )
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared pooled client for the event loop (keep-alive, HTTP/2 when h2 is installed)"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=_limits(),
+            timeout=httpx.Timeout(settings.scraper_timeout, connect=10),
+            follow_redirects=True,
+        )
+    return _async_client
+
+
+def get_sync_client() -> httpx.Client:
+    """Shared pooled client for sync callers (scripts, thread workers)"""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(
+            http2=_http2_available(),
+            limits=_limits(),
+            timeout=httpx.Timeout(settings.scraper_timeout, connect=10),
+            follow_redirects=True,
+        )
+    return _sync_client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.scraper_max_concurrency)
+    return _semaphore
+
+
+def _scraper_params(url: str, premium: bool) -> dict:
+    params = {
+        "api_key": settings.scraper_api_key,
+        "url": url,
+        "country_code": "us",
+    }
+    if premium:
+        params["premium"] = "true"
+    return params
+
+
+async def fetch_page(url: str, premium: bool = False, timeout: Optional[float] = None) -> httpx.Response:
+    """Fetch a page through ScraperAPI without blocking the event loop.
+
+    At most `scraper_max_concurrency` fetches are in flight at once; extra
+    callers wait for a slot instead of opening more upstream connections.
+    With `scraper_replay` on, pages come from the archive and nothing is fetched.
+    """
+    if settings.scraper_replay:
+        return await asyncio.to_thread(replay_response, url)
+    client = get_async_client()
+    async with _get_semaphore():
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await client.get(
+                settings.scraper_api_url,
+                params=_scraper_params(url, premium),
+                timeout=timeout or settings.scraper_timeout,
+            )
+            status = str(response.status_code)
+            return response
+        finally:
+            upstream_requests.observe(time.perf_counter() - started, "scraperapi", status)
+
+
+def fetch_page_sync(url: str, premium: bool = False, timeout: Optional[float] = None) -> httpx.Response:
+    if settings.scraper_replay:
+        return replay_response(url)
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = get_sync_client().get(
+            settings.scraper_api_url,
+            params=_scraper_params(url, premium),
+            timeout=timeout or settings.scraper_timeout,
+        )
+        status = str(response.status_code)
+        return response
+    finally:
+        upstream_requests.observe(time.perf_counter() - started, "scraperapi", status)
+
+
+async def close_clients():
+    global _async_client, _sync_client, _semaphore
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+    _semaphore = None
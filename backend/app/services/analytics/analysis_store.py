@@ -0,0 +1,137 @@
+"""Materialized product analyses, one row per product keyed by its latest snapshot.
+
+An analysis only depends on the product's latest_* columns and category,
+so it is computed once per snapshot. The flush that moves a product's
+latest_snapshot_id also rewrites its analysis, in bulk for every product
+that flush moved. Reads recompute only the rows that are missing or keyed
+to an older snapshot (rows that predate this table, or a lost race with a
+newer scrape).
+"""
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.analysis import ProductAnalysis
+from app.models.product import Product
+from app.services.amazon.sales_estimator import estimate_batch
+from app.services.analytics.ai_analyzer import generate_ai_analysis
+
+UPSERT_CHUNK = 500  # rows per INSERT, well under SQLite's bound-parameter limit
+
+
+def compute_analyses(products: Sequence[Product]) -> List[dict]:
+    """ProductAnalysis rows (as dicts) for many products; sales and scores in one vectorized pass"""
+    if not products:
+        return []
+    estimates = estimate_batch(
+        [p.latest_bsr or 0 for p in products],
+        [p.latest_review_count or 0 for p in products],
+        [p.category or "" for p in products],
+    )
+    now = datetime.now(timezone.utc)
+    rows = []
+    for product, units, score in zip(products, estimates["monthly_units"], estimates["opportunity_score"]):
+        units = int(units) or None
+        price = float(product.latest_price) if product.latest_price else None
+        revenue = round(units * price, 2) if units and price else None
+        score = None if np.isnan(score) else float(score)
+        analysis = generate_ai_analysis({
+            "asin": product.asin,
+            "title": product.title,
+            "category": product.category,
+            "current_price": price,
+            "current_bsr": product.latest_bsr,
+            "current_rating": float(product.latest_rating) if product.latest_rating else None,
+            "current_review_count": product.latest_review_count,
+            "sales_estimate_monthly": units,
+            "revenue_estimate_monthly": revenue,
+            "opportunity_score": score,
+        })
+        rows.append({
+            "product_id": product.id,
+            "snapshot_id": product.latest_snapshot_id,
+            "sales_estimate_monthly": units,
+            "revenue_estimate_monthly": revenue,
+            "opportunity_score": score,
+            "analysis": analysis,
+            "computed_at": now,
+        })
+    return rows
+
+
+def _upserts(rows: List[dict]):
+    for i in range(0, len(rows), UPSERT_CHUNK):
+        stmt = insert(ProductAnalysis).values(rows[i:i + UPSERT_CHUNK])
+        yield stmt.on_conflict_do_update(
+            index_elements=["product_id"],
+            set_={c: stmt.excluded[c] for c in rows[0] if c != "product_id"},
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _analyse_new_snapshots(session, flush_context):
+    """Rewrite the analysis of every product whose latest snapshot this flush moved, same transaction"""
+    moved = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, Product) and obj.latest_snapshot_id
+        and inspect(obj).attrs.latest_snapshot_id.history.added
+    ]
+    if not moved:
+        return
+    connection = session.connection()
+    for stmt in _upserts(compute_analyses(moved)):
+        connection.execute(stmt)
+
+
+def store_analyses(rows: List[dict]):
+    """Write analyses computed on a read path (sync session, so writes queue on the write lock)"""
+    rows = [row for row in rows if row["snapshot_id"]]
+    if not rows:
+        return
+    db = SessionLocal()
+    try:
+        existing = {
+            a.product_id: a for a in
+            db.query(ProductAnalysis).filter(ProductAnalysis.product_id.in_([r["product_id"] for r in rows]))
+        }
+        for row in rows:
+            analysis = existing.get(row["product_id"])
+            if analysis is None:
+                db.add(ProductAnalysis(**row))
+            else:
+                for key, value in row.items():
+                    setattr(analysis, key, value)
+        db.commit()
+    finally:
+        db.close()
+
+
+def resolve_analyses(pairs: Sequence[Tuple[Product, Optional[ProductAnalysis]]]) -> Tuple[Dict[str, dict], List[dict]]:
+    """Analyses by product id for (product, stored analysis or None) pairs.
+
+    A stored row only counts when it matches the product's latest snapshot;
+    the rest are computed together. Returns the results and the newly
+    computed rows, for the caller to hand to store_analyses.
+    """
+    results = {}
+    stale = []
+    for product, stored in pairs:
+        if stored is not None and stored.snapshot_id == product.latest_snapshot_id:
+            results[product.id] = {
+                "sales_estimate_monthly": stored.sales_estimate_monthly,
+                "revenue_estimate_monthly": stored.revenue_estimate_monthly,
+                "opportunity_score": stored.opportunity_score,
+                "analysis": stored.analysis,
+            }
+        else:
+            stale.append(product)
+    computed = compute_analyses(stale)
+    for row in computed:
+        results[row["product_id"]] = {k: row[k] for k in (
+            "sales_estimate_monthly", "revenue_estimate_monthly", "opportunity_score", "analysis"
+        )}
+    return results, computed
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+from app.database import SessionLocal
+from sqlalchemy import func, select
+from app.models.product import Product, PriceHistory, TrackedProduct
+from app.services.amazon.history_runs import expand_runs
+
+YIELD_PER = 1000
+CHUNK_ROWS = 500
+
+
+def _csv_chunks(header: list, rows: Iterable[list]) -> Iterator[str]:
+    """Write rows through one small reusable buffer, emitting every CHUNK_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(records: Iterable[dict]) -> Iterator[str]:
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record))
+        if len(lines) >= CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _num(value):
+    return float(value) if value is not None else None
+
+
+def tracked_export_query(user_id: str):
+    return (
+        select(
+            Product.asin, Product.title, Product.brand, Product.category,
+            Product.latest_price, Product.latest_bsr, Product.latest_rating,
+            Product.latest_review_count, TrackedProduct.tracked_at,
+        )
+        .join(Product, Product.id == TrackedProduct.product_id)
+        .where(TrackedProduct.user_id == user_id)
+    )
+
+
+def price_history_export_query(
+    user_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    asin: Optional[str] = None,
+):
+    query = (
+        select(
+            Product.asin, PriceHistory.recorded_at, PriceHistory.valid_until, PriceHistory.repeat_count,
+            PriceHistory.price, PriceHistory.bsr, PriceHistory.rating, PriceHistory.review_count,
+            PriceHistory.in_stock,
+        )
+        .join(Product, Product.id == PriceHistory.product_id)
+        .join(TrackedProduct, TrackedProduct.product_id == Product.id)
+        .where(TrackedProduct.user_id == user_id)
+    )
+    if asin:
+        query = query.where(Product.asin == asin.upper())
+    if start:
+        query = query.where(func.coalesce(PriceHistory.valid_until, PriceHistory.recorded_at) >= start)
+    if end:
+        query = query.where(PriceHistory.recorded_at < end)
+    return query.order_by(Product.asin, PriceHistory.recorded_at)
+
+
+def stream_tracked_csv(user_id: str) -> Iterator[str]:
+    db = SessionLocal()
+    try:
+        query = db.execute(tracked_export_query(user_id).execution_options(yield_per=YIELD_PER))
+        rows = (
+            [
+                asin,
+                title,
+                brand or "",
+                category or "",
+                float(price) if price else "",
+                bsr if bsr is not None else "",
+                float(rating) if rating else "",
+                reviews if reviews is not None else "",
+                tracked_at.strftime("%Y-%m-%d %H:%M") if tracked_at else "",
+            ]
+            for asin, title, brand, category, price, bsr, rating, reviews, tracked_at in query
+        )
+        yield from _csv_chunks(
+            ["ASIN", "Title", "Brand", "Category", "Price", "BSR", "Rating", "Reviews", "Tracked At"], rows
+        )
+    finally:
+        db.close()
+
+
+def stream_price_history(
+    user_id: str,
+    fmt: str = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    asin: Optional[str] = None,
+) -> Iterator[str]:
+    """Full PriceHistory series for a user's tracked products, read in yield_per batches.
+
+    Change-only runs are expanded, so the export has one line per observation.
+    """
+    db = SessionLocal()
+    try:
+        query = price_history_export_query(user_id, start, end, asin)
+        observations = expand_runs(db.execute(query.execution_options(yield_per=YIELD_PER)), start, end)
+
+        if fmt == "ndjson":
+            yield from _ndjson_chunks(
+                {
+                    "asin": row.asin,
+                    "recorded_at": observed_at.isoformat() if observed_at else None,
+                    "price": _num(row.price),
+                    "bsr": row.bsr,
+                    "rating": _num(row.rating),
+                    "review_count": row.review_count,
+                    "in_stock": row.in_stock,
+                }
+                for observed_at, row in observations
+            )
+        else:
+            yield from _csv_chunks(
+                ["ASIN", "Recorded At", "Price", "BSR", "Rating", "Reviews", "In Stock"],
+                (
+                    [
+                        row.asin,
+                        observed_at.isoformat() if observed_at else "",
+                        float(row.price) if row.price is not None else "",
+                        row.bsr if row.bsr is not None else "",
+                        float(row.rating) if row.rating is not None else "",
+                        row.review_count if row.review_count is not None else "",
+                        row.in_stock if row.in_stock is not None else "",
+                    ]
+                    for observed_at, row in observations
+                ),
+            )
+    finally:
+        db.close()
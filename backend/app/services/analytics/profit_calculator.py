@@ -1,3 +1,5 @@
+import numpy as np
+from functools import lru_cache
 from typing import Dict
 
 # Amazon FBA fee schedule (approximate)
@@ -76,4 +78,113 @@ def calculate_profit(
         "verdict": "✅ Profitable" if gross_profit > 0 and profit_margin >= 20 
                    else "⚠️ Low Margin" if gross_profit > 0 
                    else "❌ Not Profitable"
-    }
\ No newline at end of file
+    }
+
+
+# Lookup arrays for the vectorized paths, built once from the tables above.
+# A weight lands in the first tier whose limit it doesn't exceed, which is
+# searchsorted(side="left"); anything heavier is charged the last tier.
+FBA_WEIGHT_LIMITS = np.array([tier["weight_limit"] for tier in FBA_FEES.values()])
+FBA_TIER_FEES = np.array([tier["fee"] for tier in FBA_FEES.values()])
+GRID_METRICS = ("total_fees", "gross_profit", "profit_margin_percent", "roi_percent", "breakeven_price")
+
+
+def fba_fees(weights) -> np.ndarray:
+    tiers = np.searchsorted(FBA_WEIGHT_LIMITS, weights, side="left")
+    return FBA_TIER_FEES[np.minimum(tiers, len(FBA_TIER_FEES) - 1)]
+
+
+@lru_cache(maxsize=256)
+def referral_rate(category: str) -> float:
+    cat_lower = category.lower() if category else "default"
+    for key, rate in REFERRAL_FEES.items():
+        if key in cat_lower:
+            return rate
+    return REFERRAL_FEES["default"]
+
+
+def profit_arrays(selling_price, product_cost, weight_lbs, shipping_to_fba, ad_spend, category: str = "default") -> Dict[str, np.ndarray]:
+    """calculate_profit over broadcastable arrays, same fee rules and rounding of the referral fee"""
+    selling_price = np.asarray(selling_price, dtype=np.float64)
+    fba_fee = fba_fees(weight_lbs)
+    referral_fee = np.round(selling_price * referral_rate(category), 2)
+    closing_fee = 1.80 if category and "book" in category.lower() else 0.0
+
+    total_fees = fba_fee + referral_fee + closing_fee
+    total_costs = np.asarray(product_cost) + np.asarray(shipping_to_fba) + np.asarray(ad_spend)
+    gross_profit = selling_price - total_fees - total_costs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit_margin = np.where(selling_price > 0, gross_profit / selling_price * 100, 0.0)
+        roi = np.where(total_costs > 0, gross_profit / total_costs * 100, 0.0)
+    return {
+        "total_fees": total_fees,
+        "gross_profit": gross_profit,
+        "profit_margin_percent": profit_margin,
+        "roi_percent": roi,
+        "breakeven_price": total_fees + total_costs,
+    }
+
+
+def _rounded(values: np.ndarray, decimals: int = 2) -> list:
+    return np.round(values, decimals).tolist()
+
+
+def profit_grid(axes: Dict[str, np.ndarray], category: str = "default") -> Dict:
+    """Every combination of the axis values in one broadcast pass.
+
+    `axes` maps selling_price, product_cost, weight_lbs, shipping_to_fba and
+    ad_spend to 1-D value arrays; surfaces come back nested in that order.
+    """
+    names = list(axes)
+    shaped = {
+        name: values.reshape([-1 if i == j else 1 for j in range(len(names))])
+        for i, (name, values) in enumerate(axes.items())
+    }
+    result = profit_arrays(
+        shaped["selling_price"], shaped["product_cost"], shaped["weight_lbs"],
+        shaped["shipping_to_fba"], shaped["ad_spend"], category,
+    )
+    shape = tuple(len(values) for values in axes.values())
+    surfaces = {metric: np.broadcast_to(result[metric], shape) for metric in GRID_METRICS}
+
+    profit = surfaces["gross_profit"]
+    best = np.unravel_index(np.argmax(profit), shape)
+    return {
+        "axes": {name: _rounded(values) for name, values in axes.items()},
+        "shape": list(shape),
+        # Same rounding as calculate_profit: money to cents, percentages to one decimal
+        "surfaces": {
+            metric: _rounded(values, 1 if metric.endswith("_percent") else 2)
+            for metric, values in surfaces.items()
+        },
+        "summary": {
+            "cells": int(profit.size),
+            "profitable_share": round(float(np.mean(profit > 0)), 4),
+            "best": {name: round(float(axes[name][i]), 2) for name, i in zip(names, best)},
+            "best_gross_profit": round(float(profit[best]), 2),
+        },
+    }
+
+
+def simulate_margins(samples: Dict[str, np.ndarray], category: str = "default", bins: int = 50) -> Dict:
+    """Margin distribution and probability of loss over Monte-Carlo draws of the inputs"""
+    result = profit_arrays(
+        samples["selling_price"], samples["product_cost"], samples["weight_lbs"],
+        samples["shipping_to_fba"], samples["ad_spend"], category,
+    )
+    profit = result["gross_profit"]
+    margin = result["profit_margin_percent"]
+    counts, edges = np.histogram(margin, bins=bins)
+    percentiles = np.percentile(margin, [5, 25, 50, 75, 95])
+    return {
+        "draws": int(profit.size),
+        "probability_of_loss": round(float(np.mean(profit < 0)), 4),
+        "expected_gross_profit": round(float(profit.mean()), 2),
+        "margin_percent": {
+            "mean": round(float(margin.mean()), 2),
+            "std": round(float(margin.std()), 2),
+            **{f"p{p}": round(float(v), 2) for p, v in zip((5, 25, 50, 75, 95), percentiles)},
+        },
+        "histogram": {"counts": counts.tolist(), "edges": _rounded(edges)},
+    }
+
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Optional
+from app.config import settings
+
+
+class InMemoryCache:
+    """Per-process TTL cache with LRU eviction once max_entries is reached"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    async def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def discard(self, key: str = None):
+        """Drop one key (or everything); sync so ORM event hooks can call it"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class RedisCache:
+    """Shared cache across workers; Redis handles TTL and LRU (maxmemory-policy allkeys-lru)"""
+
+    def __init__(self, url: str, prefix: str = "cache:"):
+        import redis.asyncio as redis
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self._redis.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    async def get_or_compute(self, namespace: str, key: str, compute: Callable[[], Awaitable[Any]], ttl: int) -> Any:
+        full_key = f"{namespace}:{key}"
+        try:
+            value = await self.backend.get(full_key)
+        except Exception as e:
+            print(f"Cache read error: {e}")
+            value = None
+        if value is not None:
+            self.hits[namespace] += 1
+            return value
+
+        self.misses[namespace] += 1
+        value = await compute()
+        try:
+            await self.backend.set(full_key, value, ttl)
+        except Exception as e:
+            print(f"Cache write error: {e}")
+        return value
+
+    def stats(self) -> dict:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        per_namespace = {}
+        for ns in namespaces:
+            total = self.hits[ns] + self.misses[ns]
+            per_namespace[ns] = {
+                "hits": self.hits[ns],
+                "misses": self.misses[ns],
+                "hit_ratio": round(self.hits[ns] / total, 3) if total else 0.0,
+            }
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "namespaces": per_namespace,
+        }
+
+
+def snapshot_key(asin: str, snapshot_id: Optional[str]) -> str:
+    """A new scrape changes latest_snapshot_id, which retires every entry keyed on the old one"""
+    return f"{asin.upper()}:{snapshot_id or 'none'}"
+
+
+def _build_backend():
+    if settings.cache_backend == "redis":
+        return RedisCache(settings.redis_url)
+    return InMemoryCache(settings.cache_max_entries)
+
+
+cache = ResponseCache(_build_backend())
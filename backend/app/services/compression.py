@@ -0,0 +1,106 @@
+"""Response compression (brotli when installed and accepted, otherwise gzip).
+
+Unlike Starlette's GZipMiddleware this only touches responses sent as one
+body message. Streamed responses (batch NDJSON, CSV exports) pass through
+untouched: zlib would hold their chunks back until its buffer filled,
+which defeats streaming.
+"""
+import gzip
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson", "image/svg+xml")
+
+
+def _accepted(header: str) -> set:
+    """Codings the client accepts (q=0 excluded)"""
+    codings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        codings.add(name.strip().lower())
+    return codings
+
+
+def choose_encoding(accept_encoding: str):
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.compression_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # held until we know whether the body is compressed
+                return
+            if start is None:
+                return await send(message)
+
+            pending, start = start, None
+            headers = {k.lower(): v for k, v in pending.get("headers", [])}
+            body = message.get("body", b"")
+            content_type = headers.get(b"content-type", b"").decode("latin-1")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or b"content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(pending)
+                return await send(message)
+
+            compressed = compress(body, encoding)
+            raw_headers = [(k, v) for k, v in pending.get("headers", []) if k.lower() not in (b"content-length", b"vary")]
+            vary = [
+                token.strip() for k, v in pending.get("headers", []) if k.lower() == b"vary"
+                for token in v.decode("latin-1").split(",") if token.strip()
+            ]
+            if "accept-encoding" not in {token.lower() for token in vary}:
+                vary.append("Accept-Encoding")
+            etag = headers.get(b"etag")
+            if etag is not None:
+                # Strong validators name one exact byte sequence; the compressed body gets its own
+                raw_headers = [(k, v) for k, v in raw_headers if k.lower() != b"etag"]
+                raw_headers.append((b"etag", etag[:-1] + b"-" + encoding.encode() + b'"' if etag.endswith(b'"') else etag))
+            raw_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", ", ".join(vary).encode("latin-1")),
+            ]
+            await send({**pending, "headers": raw_headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,92 @@
+"""Conditional GET support: validators derived from what a product response is built from.
+
+A product's responses change when a scrape lands (new snapshot or an
+extended run, both of which move last_synced_at) or when its values or
+history are rewritten in place (the reparse job, which moves updated_at).
+The ETag hashes those columns, the latest_* values and whatever query
+parameters shape the body. Routes check it straight after loading the
+Product row and answer 304 before touching history.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+from app.config import settings
+from app.models.product import Product
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def product_etag(product: Product, *variant) -> str:
+    parts = (
+        product.asin, product.latest_snapshot_id, product.last_synced_at, product.updated_at,
+        product.latest_price, product.latest_bsr, product.latest_rating,
+        product.latest_review_count, product.latest_in_stock,
+    )
+    key = "|".join("" if part is None else str(part) for part in (*parts, *variant))
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:32] + '"'
+
+
+def last_modified(product: Product) -> Optional[datetime]:
+    times = [t for t in (_as_utc(product.last_synced_at), _as_utc(product.updated_at)) if t is not None]
+    if not times:
+        return None
+    return max(times).replace(microsecond=0)  # HTTP dates have second precision
+
+
+def cache_headers(etag: str, modified: Optional[datetime]) -> dict:
+    # private: every response needs a bearer token, so shared caches must not keep it
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.http_cache_max_age_seconds}, must-revalidate",
+        # A 304 never passes through compression, so it must carry the 200's Vary itself
+        "Vary": "Authorization, Accept-Encoding" if settings.compression_enabled else "Authorization",
+    }
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+
+def _strip_coding(tag: str) -> str:
+    """CompressionMiddleware suffixes the ETag of an encoded body; all encodings are the same resource"""
+    for suffix in ('-gzip"', '-br"'):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2): a W/ prefix added by a proxy still matches
+    candidates = [_strip_coding(tag.strip().removeprefix("W/")) for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def is_not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified <= since
+    return False
+
+
+def not_modified_response(request: Request, response: Response, etag: str, modified: Optional[datetime]) -> Optional[Response]:
+    """A 304 when the client's copy is current; otherwise sets the validators on `response` and returns None"""
+    headers = cache_headers(etag, modified)
+    if is_not_modified(request, etag, modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
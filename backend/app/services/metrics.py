@@ -0,0 +1,239 @@
+"""In-process metrics rendered in the Prometheus text format at /metrics.
+
+Counters and histograms are plain dicts behind one uncontended lock each,
+so recording is a dict update and a bisect. Values are per process: with
+several uvicorn workers, scrape each worker or aggregate in Prometheus.
+
+Per-request DB instrumentation rides on a contextvar set by
+MetricsMiddleware and SQLAlchemy cursor events; work outside a request
+(scheduler, retention) counts towards the totals only.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from app.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+UPSTREAM_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 70.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format(value) -> str:
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[tuple, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] += amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            return [(self.name, _labels(self.labelnames, k), v) for k, v in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            items = [(k, list(counts), total) for k, (counts, total) in self._values.items()]
+        out = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                out.append((f"{self.name}_bucket", _labels(self.labelnames + ("le",), labels + (le,)), cumulative))
+            out.append((f"{self.name}_sum", _labels(self.labelnames, labels), total))
+            out.append((f"{self.name}_count", _labels(self.labelnames, labels), cumulative))
+        return out
+
+
+class Collected:
+    """Values read from elsewhere when /metrics is rendered; `collect` returns [(label values, value)]"""
+
+    def __init__(self, name: str, help: str, kind: str, labelnames: Sequence[str], collect: Callable[[], list]):
+        self.name, self.help, self.kind, self.labelnames = name, help, kind, tuple(labelnames)
+        self.collect = collect
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        try:
+            return [(self.name, _labels(self.labelnames, labels), value) for labels, value in self.collect()]
+        except Exception as e:
+            print(f"Metrics collect error for {self.name}: {e}")
+            return []
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collected(self, name, help, kind, labelnames, collect) -> Collected:
+        return self.register(Collected(name, help, kind, labelnames, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route", "status"),
+)
+db_queries_total = registry.counter("db_queries_total", "SQL statements executed")
+db_query_seconds_total = registry.counter("db_query_seconds_total", "Time spent in SQL statements")
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements run by one request", ("route",), QUERY_COUNT_BUCKETS,
+)
+db_time_per_request = registry.histogram(
+    "db_time_per_request_seconds", "Time one request spent in SQL statements", ("route",),
+)
+n_plus_one_total = registry.counter(
+    "db_n_plus_one_total", "Requests that repeated one statement more than the N+1 threshold", ("route",),
+)
+upstream_requests = registry.histogram(
+    "upstream_request_duration_seconds", "Calls to ScraperAPI and Amazon autocomplete", ("target", "status"),
+    UPSTREAM_BUCKETS,
+)
+scrape_outcomes = registry.counter(
+    "scrape_outcomes_total",
+    "Scrape results: ok, http_error, captcha, no_title / empty (parse failure), exception",
+    ("kind", "outcome"),
+)
+mock_fallbacks = registry.counter("scrape_mock_fallbacks_total", "Scrapes answered with mock data", ("kind",))
+
+
+class RequestStats:
+    __slots__ = ("queries", "seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = defaultdict(int)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    db_queries_total.inc()
+    db_query_seconds_total.inc(amount=elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+        # Statements are parameterised, so the text identifies "the same query"
+        stats.statements[statement] += 1
+
+
+def instrument_engine(engine):
+    """Count and time every statement on a (sync) Engine; pass async_engine.sync_engine for async ones"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _report_request(route: str, stats: RequestStats):
+    db_queries_per_request.observe(stats.queries, route)
+    db_time_per_request.observe(stats.seconds, route)
+    threshold = settings.metrics_n_plus_one_threshold
+    if threshold and stats.queries > threshold:
+        statement, count = max(stats.statements.items(), key=lambda item: item[1])
+        if count > threshold:
+            n_plus_one_total.inc(route)
+            print(f"⚠️ Possible N+1 on {route}: {count} x {' '.join(statement.split())[:200]}")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering like BaseHTTPMiddleware)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            # FastAPI puts the matched route in the scope; label by its template, not the raw path
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            http_requests.observe(elapsed, scope["method"], route, str(status[0]))
+            _report_request(route, stats)
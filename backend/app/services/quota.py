@@ -0,0 +1,242 @@
+"""Per-user request rate and monthly search quota.
+
+Two limits per user:
+  - a token bucket (quota_burst_capacity, refilled at quota_refill_per_second)
+    that every request to a scrape-triggering route draws from;
+  - a monthly counter of searches (ASINs or keyword sets fetched upstream)
+    checked against User.search_limit.
+
+Counters live in process memory or in Redis, never in the users table on
+the request path. Dirty monthly counters are written back to
+users.monthly_searches / quota_period in batches by QuotaFlusher
+(app/tasks/quota_flush.py). The memory backend is exact for a single
+worker only: each worker would keep its own counters and hand every user
+its full allowance once per worker. With WEB_CONCURRENCY above 1 the app
+refuses to start unless quota_backend = "redis".
+"""
+import asyncio
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models.user import User
+from app.services.amazon.rate_limiter import TokenBucket
+
+Charge = namedtuple("Charge", "allowed used")
+
+
+def current_period(now: Optional[datetime] = None) -> str:
+    return (now or datetime.now(timezone.utc)).strftime("%Y-%m")
+
+
+def seconds_until_next_period(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    if now.month == 12:
+        reset = datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+    else:
+        reset = datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
+    return max(1, int((reset - now).total_seconds()))
+
+
+async def _stored_usage(user_id: str, period: str) -> int:
+    """Searches already flushed to the users table for this period"""
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(User.monthly_searches, User.quota_period).where(User.id == user_id)
+        )).first()
+    if row is None or row.quota_period != period:
+        return 0
+    return row.monthly_searches or 0
+
+
+class MemoryQuotaBackend:
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._used: Dict[Tuple[str, str], int] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    async def take_token(self, user_id: str) -> float:
+        with self._lock:
+            bucket = self._buckets.get(user_id)
+            if bucket is None:
+                bucket = self._buckets[user_id] = TokenBucket(settings.quota_refill_per_second, settings.quota_burst_capacity)
+        return bucket.reserve()
+
+    async def charge(self, user_id: str, period: str, cost: int, limit: int) -> Charge:
+        key = (user_id, period)
+        if key not in self._used:
+            seed = await _stored_usage(user_id, period)
+            with self._lock:
+                self._used.setdefault(key, seed)
+        with self._lock:
+            used = self._used[key]
+            if 0 <= limit < used + cost:
+                return Charge(False, used)
+            self._used[key] = used + cost
+            self._dirty.add(key)
+            return Charge(True, used + cost)
+
+    async def pop_dirty(self, limit: int) -> List[Tuple[str, str, int]]:
+        with self._lock:
+            keys = [self._dirty.pop() for _ in range(min(limit, len(self._dirty)))]
+            current = current_period()
+            for key in list(self._used):
+                # Previous months only matter until their final flush
+                if key[1] != current and key not in self._dirty and key not in keys:
+                    del self._used[key]
+            return [(user_id, period, self._used[(user_id, period)]) for user_id, period in keys]
+
+    async def mark_dirty(self, counts: List[Tuple[str, str, int]]):
+        with self._lock:
+            self._dirty.update((user_id, period) for user_id, period, _ in counts)
+
+
+_TAKE_TOKEN = """
+redis.replicate_commands()
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# Returns {-1, 0} when the counter isn't seeded yet, so the caller can load
+# the flushed value from the DB and retry with it as ARGV[5]
+_CHARGE = """
+local used = redis.call('GET', KEYS[1])
+if not used then
+  if not ARGV[5] then return {-1, 0} end
+  redis.call('SET', KEYS[1], ARGV[5], 'EX', ARGV[3], 'NX')
+  used = redis.call('GET', KEYS[1])
+end
+used = tonumber(used)
+local cost, limit = tonumber(ARGV[1]), tonumber(ARGV[2])
+if limit >= 0 and used + cost > limit then return {0, used} end
+used = redis.call('INCRBY', KEYS[1], cost)
+redis.call('SADD', KEYS[2], ARGV[4])
+return {1, used}
+"""
+
+
+class RedisQuotaBackend:
+    """Buckets and counters shared by every worker; each check is one atomic script call"""
+
+    def __init__(self, url: str, prefix: str = "quota:"):
+        import redis.asyncio as redis
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take_token = self._redis.register_script(_TAKE_TOKEN)
+        self._charge = self._redis.register_script(_CHARGE)
+
+    async def take_token(self, user_id: str) -> float:
+        wait = await self._take_token(
+            keys=[f"{self.prefix}bucket:{user_id}"],
+            args=[settings.quota_refill_per_second, settings.quota_burst_capacity],
+        )
+        return float(wait)
+
+    async def charge(self, user_id: str, period: str, cost: int, limit: int) -> Charge:
+        keys = [f"{self.prefix}used:{period}:{user_id}", f"{self.prefix}dirty"]
+        # Counters outlive their month by a day so the last flush still finds them
+        args = [cost, limit, seconds_until_next_period() + 86400, f"{period}:{user_id}"]
+        status, used = await self._charge(keys=keys, args=args)
+        if status == -1:
+            seed = await _stored_usage(user_id, period)
+            status, used = await self._charge(keys=keys, args=args + [seed])
+        return Charge(status == 1, int(used))
+
+    async def pop_dirty(self, limit: int) -> List[Tuple[str, str, int]]:
+        members = await self._redis.spop(f"{self.prefix}dirty", limit)
+        if not members:
+            return []
+        pairs = [m.decode().split(":", 1) for m in members]
+        counts = await self._redis.mget([f"{self.prefix}used:{period}:{user_id}" for period, user_id in pairs])
+        return [(user_id, period, int(count)) for (period, user_id), count in zip(pairs, counts) if count is not None]
+
+    async def mark_dirty(self, counts: List[Tuple[str, str, int]]):
+        await self._redis.sadd(f"{self.prefix}dirty", *(f"{period}:{user_id}" for user_id, period, _ in counts))
+
+
+class QuotaEngine:
+    def __init__(self, backend):
+        self.backend = backend
+        self.throttled_total = 0
+        self.exhausted_total = 0
+
+    async def take_request(self, user_id: str) -> float:
+        """0 when the request may go ahead, otherwise seconds until the bucket has a token"""
+        wait = await self.backend.take_token(user_id)
+        if wait:
+            self.throttled_total += 1
+        return wait
+
+    async def charge(self, user_id: str, limit: Optional[int], cost: int = 1) -> Charge:
+        """Count `cost` searches against this month; refused (and not counted) past `limit`"""
+        limit = -1 if limit is None else limit
+        result = await self.backend.charge(user_id, current_period(), cost, limit)
+        if not result.allowed:
+            self.exhausted_total += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "throttled_total": self.throttled_total,
+            "exhausted_total": self.exhausted_total,
+        }
+
+    def _write(self, counts: List[Tuple[str, str, int]]):
+        latest = {}
+        for user_id, period, used in counts:
+            if user_id not in latest or period > latest[user_id][0]:
+                latest[user_id] = (period, used)
+        db = SessionLocal()
+        try:
+            for user in db.query(User).filter(User.id.in_(list(latest))).all():
+                period, used = latest[user.id]
+                if user.quota_period is None or period >= user.quota_period:
+                    user.quota_period = period
+                    user.monthly_searches = used
+            db.commit()
+        finally:
+            db.close()
+
+    async def flush(self) -> int:
+        """Write dirty monthly counters back to the users table, one batch per transaction"""
+        written = 0
+        while True:
+            counts = await self.backend.pop_dirty(settings.quota_flush_batch_size)
+            if counts:
+                try:
+                    await asyncio.to_thread(self._write, counts)
+                except Exception:
+                    await self.backend.mark_dirty(counts)
+                    raise
+                written += len(counts)
+            if len(counts) < settings.quota_flush_batch_size:
+                return written
+
+
+def _build_backend():
+    if settings.quota_backend == "redis":
+        return RedisQuotaBackend(settings.redis_url)
+    if settings.web_concurrency > 1:
+        raise RuntimeError(
+            f"quota_backend='memory' cannot enforce limits across {settings.web_concurrency} workers "
+            "(WEB_CONCURRENCY); set QUOTA_BACKEND=redis or run a single worker"
+        )
+    return MemoryQuotaBackend()
+
+
+quotas = QuotaEngine(_build_backend())
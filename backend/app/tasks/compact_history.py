@@ -0,0 +1,86 @@
+"""Fold consecutive identical PriceHistory rows into runs (valid_until/repeat_count).
+
+Safe to run while the app is up: each product is read, folded and written
+in its own short write transaction, so a retention sweep or scrape can't
+delete rows between the read and the fold. The row a product's latest_*
+columns point at is never touched, so concurrent scrapes can keep extending
+or superseding it.
+
+Usage (from backend/):  python -m app.tasks.compact_history [--asin B0XXXXXXXX]
+"""
+import argparse
+from typing import List, Optional
+from sqlalchemy.orm.exc import StaleDataError
+from app.database import SessionLocal, begin_write, engine
+from app.migrations import run_migrations
+from app.models.product import Product, PriceHistory
+
+
+def _key(row: PriceHistory) -> tuple:
+    def rounded(value):
+        return round(float(value), 2) if value is not None else None
+    return rounded(row.price), row.bsr, rounded(row.rating), row.review_count, row.in_stock
+
+
+def compact_product(product_id: str) -> int:
+    """Returns the number of rows folded away"""
+    db = SessionLocal()
+    try:
+        begin_write(db)
+        latest_id = db.query(Product.latest_snapshot_id).filter(Product.id == product_id).scalar()
+        query = db.query(PriceHistory).filter(PriceHistory.product_id == product_id)
+        if latest_id:
+            query = query.filter(PriceHistory.id != latest_id)
+        rows = query.order_by(PriceHistory.recorded_at).all()
+
+        removed = 0
+        head = None
+        for row in rows:
+            if head is not None and _key(row) == _key(head):
+                head.valid_until = row.valid_until or row.recorded_at
+                head.repeat_count = (head.repeat_count or 1) + (row.repeat_count or 1)
+                db.delete(row)
+                removed += 1
+            else:
+                head = row
+        if removed:
+            db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def compact_history(product_ids: Optional[List[str]] = None) -> dict:
+    if product_ids is None:
+        db = SessionLocal()
+        try:
+            product_ids = [row[0] for row in db.query(PriceHistory.product_id).distinct()]
+        finally:
+            db.close()
+
+    removed = 0
+    failed = 0
+    for product_id in product_ids:
+        try:
+            removed += compact_product(product_id)
+        except StaleDataError as e:
+            # Rows changed under us anyway (another writer outside the lock); the next run picks it up
+            print(f"Compaction skipped product {product_id}: {e}")
+            failed += 1
+    return {"products": len(product_ids), "rows_removed": removed, "failed": failed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--asin")
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    ids = None
+    if args.asin:
+        db = SessionLocal()
+        try:
+            ids = [row[0] for row in db.query(Product.id).filter(Product.asin == args.asin.upper())]
+        finally:
+            db.close()
+    print(compact_history(ids))
@@ -0,0 +1,251 @@
+"""Crawls category bestseller lists into competitor snapshots.
+
+Every tick picks the categories of tracked products whose crawl is missing
+or older than competitor_crawl_interval_hours, plus categories the
+competitors endpoint asked for, and crawls them concurrently. Categories
+that resolve to the same bestseller list ("Toys & Games", "Toy Store")
+share one crawl. Each successful crawl is stored as a new set of
+CompetitorSnapshot rows and every category's CompetitorCrawl row is pointed
+at it in the same transaction, so readers never see a half-written list.
+A failed crawl keeps the old set.
+
+Runs in the app on startup; for a one-off pass:
+    python -m app.tasks.competitor_crawl [--category "Kitchen & Dining"]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import delete, select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.competitor import CompetitorCrawl, CompetitorSnapshot
+from app.models.product import Product, TrackedProduct
+from app.services.amazon.competitor_service import bestseller_url, crawl_bestsellers, with_market_share
+
+FAILURE_BACKOFF_SECONDS = 1800
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _list_key(category: str) -> str:
+    """The bestseller list a category resolves to; categories without one stand alone"""
+    return bestseller_url(category) or category
+
+
+def due_categories() -> Dict[str, List[str]]:
+    """Categories to crawl, grouped by the bestseller list they resolve to.
+
+    A list is due when one of its categories is tracked with no fresh crawl
+    or waiting on a requested crawl. Its group holds every known category on
+    that list, so one crawl refreshes them all.
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(hours=settings.competitor_crawl_interval_hours)
+    db = SessionLocal()
+    try:
+        tracked = db.execute(
+            select(Product.category)
+            .join(TrackedProduct, TrackedProduct.product_id == Product.id)
+            .where(Product.category.is_not(None))
+            .distinct()
+        ).scalars().all()
+        crawls = {row.category: row for row in db.execute(select(CompetitorCrawl)).scalars()}
+    finally:
+        db.close()
+
+    due = [_list_key(c) for c, row in crawls.items() if row.status == "pending"]
+    for category in tracked:
+        row = crawls.get(category)
+        if row is None or (row.status != "unsupported" and (row.crawled_at is None or _as_utc(row.crawled_at) < stale_before)):
+            due.append(_list_key(category))
+
+    groups: Dict[str, List[str]] = {key: [] for key in due}
+    for category in [*crawls, *tracked]:
+        members = groups.get(_list_key(category))
+        if members is not None and category not in members:
+            members.append(category)
+    return groups
+
+
+def _mark(categories: List[str], status: str):
+    db = SessionLocal()
+    try:
+        for category in categories:
+            row = db.get(CompetitorCrawl, category)
+            if row is None:
+                row = CompetitorCrawl(category=category)
+                db.add(row)
+            row.status = status
+        db.commit()
+    finally:
+        db.close()
+
+
+def store_crawl(categories: List[str], competitors: List[Dict], pages: int, total_monthly_sales: int) -> str:
+    """Insert one crawl's snapshots and point every category on its list at them, in one transaction"""
+    crawl_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        db.add_all([
+            CompetitorSnapshot(
+                crawl_id=crawl_id,
+                category=categories[0],
+                rank=c["rank"],
+                asin=c["asin"],
+                title=c["title"],
+                price=c["price"],
+                rating=c["rating"],
+                review_count=c["review_count"],
+                monthly_sales=c["monthly_sales"],
+                market_share=c["market_share"],
+                crawled_at=now,
+            )
+            for c in competitors
+        ])
+        for category in categories:
+            row = db.get(CompetitorCrawl, category)
+            if row is None:
+                row = CompetitorCrawl(category=category)
+                db.add(row)
+            row.status = "ready"
+            row.crawl_id = crawl_id
+            row.pages = pages
+            row.items = len(competitors)
+            row.total_monthly_sales = total_monthly_sales
+            row.crawled_at = now
+        db.commit()
+    finally:
+        db.close()
+    return crawl_id
+
+
+def apply_retention() -> int:
+    """Drop snapshot sets older than the retention window; the set a category points at is always kept"""
+    if not settings.competitor_snapshot_retention_days:
+        return 0
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.competitor_snapshot_retention_days)
+    db = SessionLocal()
+    try:
+        current = select(CompetitorCrawl.crawl_id).where(CompetitorCrawl.crawl_id.is_not(None))
+        result = db.execute(
+            delete(CompetitorSnapshot)
+            .where(CompetitorSnapshot.crawled_at < cutoff, CompetitorSnapshot.crawl_id.not_in(current))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+    finally:
+        db.close()
+
+
+async def crawl_category(categories: List[str]) -> bool:
+    """Crawl the bestseller list the categories share, once, and store it for all of them"""
+    category = categories[0]
+    if bestseller_url(category) is None:
+        await asyncio.to_thread(_mark, categories, "unsupported")
+        return False
+    result = await crawl_bestsellers(category, settings.competitor_crawl_max_pages)
+    if not result or not result[0]:
+        await asyncio.to_thread(_mark, categories, "failed")
+        return False
+    competitors, pages = result
+    competitors, total = with_market_share(competitors, category)
+    await asyncio.to_thread(store_crawl, categories, competitors, pages, total)
+    return True
+
+
+class CompetitorCrawler:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._attempted: Dict[str, float] = {}
+        self._in_flight = set()
+        self.crawls_total = 0
+        self.failures_total = 0
+        self.snapshots_deleted = 0
+        self.last_tick_at: Optional[float] = None
+
+    async def _crawl(self, key: str, categories: List[str], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            self._in_flight.add(key)
+            self._attempted[key] = time.monotonic()
+            try:
+                if await crawl_category(categories):
+                    self.crawls_total += 1
+                    self._attempted.pop(key, None)
+                else:
+                    self.failures_total += 1
+            except Exception as e:
+                self.failures_total += 1
+                print(f"Competitor crawl error for {', '.join(categories)}: {e}")
+            finally:
+                self._in_flight.discard(key)
+
+    async def tick(self):
+        self.last_tick_at = time.time()
+        backoff_before = time.monotonic() - FAILURE_BACKOFF_SECONDS
+        # In-flight and backoff bookkeeping is per bestseller list, not per category
+        groups = {
+            key: categories for key, categories in (await asyncio.to_thread(due_categories)).items()
+            if key not in self._in_flight and self._attempted.get(key, float("-inf")) < backoff_before
+        }
+        if groups:
+            semaphore = asyncio.Semaphore(settings.competitor_crawl_concurrency)
+            await asyncio.gather(*(self._crawl(key, categories, semaphore) for key, categories in groups.items()))
+            self.snapshots_deleted += await asyncio.to_thread(apply_retention)
+
+    async def run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"Competitor crawler error: {e}")
+            await asyncio.sleep(settings.competitor_crawl_poll_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "in_flight": sorted(self._in_flight),
+            "backing_off": len(self._attempted),
+            "crawls_total": self.crawls_total,
+            "failures_total": self.failures_total,
+            "snapshots_deleted": self.snapshots_deleted,
+            "last_tick_at": self.last_tick_at,
+        }
+
+
+crawler = CompetitorCrawler()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--category", help="crawl just this category, due or not")
+    args = parser.parse_args()
+
+    async def main():
+        if args.category:
+            print({args.category: await crawl_category([args.category])})
+        else:
+            await crawler.tick()
+            print(crawler.stats())
+
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Retention for price history: old raw snapshots and hourly rollups are
+deleted once day/week rollups cover them.
+
+Runs in the app on startup; for a one-off pass: python -m app.tasks.history_retention
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import text
+from app.config import settings
+from app.database import SessionLocal
+
+BATCH_SIZE = 5000
+
+
+def _delete_in_batches(sql: str, params: dict) -> int:
+    """Short transactions so the write lock is never held for the whole sweep"""
+    deleted = 0
+    while True:
+        db = SessionLocal()
+        try:
+            result = db.execute(text(sql), {**params, "batch": BATCH_SIZE})
+            db.commit()
+        finally:
+            db.close()
+        deleted += result.rowcount
+        if result.rowcount < BATCH_SIZE:
+            return deleted
+
+
+def apply_retention() -> dict:
+    now = datetime.now(timezone.utc)
+    result = {"raw_deleted": 0, "hourly_deleted": 0}
+    if settings.history_raw_retention_days:
+        # The snapshot a product's latest_* columns point at is always kept
+        result["raw_deleted"] = _delete_in_batches(
+            "DELETE FROM price_history WHERE id IN ("
+            "SELECT id FROM price_history WHERE COALESCE(valid_until, recorded_at) < :cutoff "
+            "AND id NOT IN (SELECT latest_snapshot_id FROM products WHERE latest_snapshot_id IS NOT NULL) "
+            "LIMIT :batch)",
+            {"cutoff": now - timedelta(days=settings.history_raw_retention_days)},
+        )
+    if settings.history_hourly_retention_days:
+        result["hourly_deleted"] = _delete_in_batches(
+            "DELETE FROM price_rollups WHERE rowid IN ("
+            "SELECT rowid FROM price_rollups WHERE resolution = 'hour' AND bucket_start < :cutoff LIMIT :batch)",
+            {"cutoff": now - timedelta(days=settings.history_hourly_retention_days)},
+        )
+    return result
+
+
+class HistoryRetention:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[dict] = None
+
+    async def run(self):
+        while True:
+            try:
+                self.last_result = await asyncio.to_thread(apply_retention)
+            except Exception as e:
+                print(f"History retention error: {e}")
+            await asyncio.sleep(settings.history_retention_interval_hours * 3600)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+retention = HistoryRetention()
+
+
+if __name__ == "__main__":
+    print(apply_retention())
@@ -0,0 +1,44 @@
+"""Writes monthly search counters from the quota backend back to the users table.
+
+Runs in the app on startup, every quota_flush_interval_seconds, with a final
+flush on shutdown. At most one interval of counts is lost if a worker dies;
+with the Redis backend they stay in Redis and the next flush picks them up.
+"""
+import asyncio
+from typing import Optional
+from app.config import settings
+from app.services.quota import quotas
+
+
+class QuotaFlusher:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_total = 0
+
+    async def flush(self):
+        try:
+            self.flushed_total += await quotas.flush()
+        except Exception as e:
+            print(f"Quota flush error: {e}")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.quota_flush_interval_seconds)
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+quota_flusher = QuotaFlusher()
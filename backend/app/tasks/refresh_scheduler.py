@@ -0,0 +1,158 @@
+import asyncio
+import heapq
+import math
+import time
+from collections import deque
+from datetime import timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.product import Product, TrackedProduct
+from app.services.amazon.refresh import refresh_product
+
+
+def tracked_products_query():
+    """Every tracked product with its tracker count, in one grouped scan"""
+    return (
+        select(Product.asin, Product.last_synced_at, func.count(TrackedProduct.id))
+        .join(TrackedProduct, TrackedProduct.product_id == Product.id)
+        .group_by(Product.id)
+    )
+
+
+class RefreshScheduler:
+    """Refreshes tracked products in the background before they go stale.
+
+    Every tick the queue is rebuilt from one grouped query over
+    TrackedProduct. Entries are ordered by when they fall due, pulled
+    forward by how many users track the product, and scrapes are drawn
+    from a global per-minute budget.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, float, str]] = []
+        self._requested: Dict[str, float] = {}
+        self._in_flight = set()
+        self._tokens = float(settings.refresh_scrapes_per_minute)
+        self._last_refill = time.monotonic()
+        self._scrape_times = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.scrapes_total = 0
+        self.failures_total = 0
+        self.last_tick_at: Optional[float] = None
+
+    def request_refresh(self, asin: str):
+        """Queue an untracked or stale product for the next tick, ahead of scheduled work"""
+        self._requested.setdefault(asin, time.time())
+
+    def _entry(self, asin: str, last_synced_at, trackers: int) -> Tuple[float, float, str]:
+        if last_synced_at is None:
+            due_at = time.time()
+        else:
+            if last_synced_at.tzinfo is None:
+                last_synced_at = last_synced_at.replace(tzinfo=timezone.utc)
+            due_at = last_synced_at.timestamp() + settings.refresh_interval_hours * 3600
+        # Popular products are pulled forward, log-scaled so a handful of
+        # heavily tracked ASINs can't starve everything else
+        priority = due_at - math.log2(1 + trackers) * settings.refresh_popularity_boost_seconds
+        return priority, due_at, asin
+
+    def _rebuild_queue(self):
+        db = SessionLocal()
+        try:
+            rows = db.execute(tracked_products_query()).all()
+        finally:
+            db.close()
+
+        heap = [self._entry(asin, last_synced_at, trackers) for asin, last_synced_at, trackers in rows]
+        tracked = {asin for _, _, asin in heap}
+        for asin, requested_at in list(self._requested.items()):
+            if asin not in tracked:
+                heap.append((requested_at - settings.refresh_interval_hours * 3600, requested_at, asin))
+        heapq.heapify(heap)
+        self._heap = heap
+
+    def _refill(self):
+        now = time.monotonic()
+        per_second = settings.refresh_scrapes_per_minute / 60
+        self._tokens = min(settings.refresh_scrapes_per_minute, self._tokens + (now - self._last_refill) * per_second)
+        self._last_refill = now
+
+    def _take_due(self) -> List[str]:
+        self._refill()
+        now = time.time()
+        batch = []
+        while self._heap and self._heap[0][0] <= now and self._tokens >= 1:
+            _, _, asin = heapq.heappop(self._heap)
+            if asin in self._in_flight:
+                continue
+            self._tokens -= 1
+            batch.append(asin)
+        return batch
+
+    async def _refresh(self, asin: str):
+        self._in_flight.add(asin)
+        try:
+            if await refresh_product(asin):
+                self.scrapes_total += 1
+                self._scrape_times.append(time.monotonic())
+            else:
+                self.failures_total += 1
+        except Exception as e:
+            self.failures_total += 1
+            print(f"Refresh error for {asin}: {e}")
+        finally:
+            self._in_flight.discard(asin)
+            self._requested.pop(asin, None)
+
+    async def tick(self):
+        await asyncio.to_thread(self._rebuild_queue)
+        self.last_tick_at = time.time()
+        batch = self._take_due()
+        if batch:
+            await asyncio.gather(*(self._refresh(asin) for asin in batch))
+
+    async def run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"Refresh scheduler error: {e}")
+            await asyncio.sleep(settings.refresh_poll_seconds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        now = time.time()
+        cutoff = time.monotonic() - 60
+        while self._scrape_times and self._scrape_times[0] < cutoff:
+            self._scrape_times.popleft()
+        due = [due_at for priority, due_at, _ in self._heap if priority <= now]
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "queue_size": len(self._heap),
+            "queue_depth_due": len(due),
+            "lag_seconds": round(max(0.0, now - min(due)), 1) if due else 0.0,
+            "in_flight": len(self._in_flight),
+            "budget_per_minute": settings.refresh_scrapes_per_minute,
+            "budget_remaining": int(self._tokens),
+            "scrapes_last_minute": len(self._scrape_times),
+            "scrapes_total": self.scrapes_total,
+            "failures_total": self.failures_total,
+            "last_tick_at": self.last_tick_at,
+        }
+
+
+scheduler = RefreshScheduler()
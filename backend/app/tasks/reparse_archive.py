@@ -0,0 +1,146 @@
+"""Rebuild PriceHistory fields from archived product pages.
+
+Run after fixing a selector to repair the rows scraped while it was broken,
+without re-scraping anything.
+
+Usage (from backend/):  python -m app.tasks.reparse_archive [--asin B0XXXXXXXX] [--since 2024-01-01] [--workers 4] [--dry-run]
+"""
+import argparse
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import update
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.migrations import run_migrations
+from app.models.analysis import ProductAnalysis
+from app.models.product import Product, PriceHistory
+from app.services.amazon.extraction import parse_document, extract_product
+from app.services.amazon.history_rollups import rebuild_rollups
+from app.services.amazon.page_archive import read_blob
+from app.services.amazon.product_store import latest_snapshots, set_latest
+
+REPARSED_FIELDS = ("price", "bsr", "rating", "review_count")
+
+_archive_root: Optional[str] = None
+
+
+def _init_worker(archive_root: str):
+    global _archive_root
+    _archive_root = archive_root
+
+
+def _reparse_page(sha: str) -> Tuple[str, Optional[dict]]:
+    """Runs in a worker process; None means the page is missing or still doesn't parse"""
+    try:
+        html = read_blob(_archive_root, sha)
+    except Exception as e:
+        print(f"Could not read {sha}: {e}")
+        return sha, None
+    if not html or "captcha" in html.lower():
+        return sha, None
+    fields = extract_product(parse_document(html))
+    if not fields["title"]:
+        return sha, None
+    return sha, {name: fields[name] for name in REPARSED_FIELDS}
+
+
+def _snapshots_by_page(db, asin: Optional[str], since: Optional[datetime]) -> Dict[str, List[Tuple[str, str]]]:
+    query = (
+        db.query(PriceHistory.page_sha256, PriceHistory.id, PriceHistory.product_id)
+        .filter(PriceHistory.page_sha256.isnot(None))
+    )
+    if asin:
+        query = query.join(Product, Product.id == PriceHistory.product_id).filter(Product.asin == asin.upper())
+    if since:
+        query = query.filter(PriceHistory.recorded_at >= since)
+
+    by_page = defaultdict(list)
+    for sha, snapshot_id, product_id in query:
+        by_page[sha].append((snapshot_id, product_id))
+    return by_page
+
+
+def _refresh_latest(db, product_ids: List[str], chunk_size: int = 1000):
+    for i in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[i:i + chunk_size]
+        # The latest snapshot id usually stays the same while its values change, which the
+        # analysis flush hook can't see; drop the stored analyses so the next read recomputes
+        db.query(ProductAnalysis).filter(ProductAnalysis.product_id.in_(chunk)).delete(synchronize_session=False)
+        snapshots = latest_snapshots(db, chunk)
+        now = datetime.now(timezone.utc)
+        for product in db.query(Product).filter(Product.id.in_(chunk)).all():
+            if product.id in snapshots:
+                set_latest(product, snapshots[product.id])
+            product.updated_at = now  # its history changed even if the latest values didn't
+        db.commit()
+
+
+def reparse_archive(
+    asin: Optional[str] = None,
+    since: Optional[datetime] = None,
+    workers: Optional[int] = None,
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> dict:
+    """Re-extract every archived page referenced by PriceHistory and write the fields back.
+
+    Each distinct page is parsed once across a process pool, however many
+    snapshots point at it; updates are written in primary-key batches.
+    """
+    db = SessionLocal()
+    stats = {"pages": 0, "reparsed": 0, "unparseable": 0, "snapshots_updated": 0}
+    try:
+        by_page = _snapshots_by_page(db, asin, since)
+        stats["pages"] = len(by_page)
+        if not by_page:
+            return stats
+
+        touched_products = set()
+        updates = []
+
+        def flush():
+            if updates and not dry_run:
+                db.execute(update(PriceHistory), updates)
+                db.commit()
+            stats["snapshots_updated"] += len(updates)
+            updates.clear()
+
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(settings.page_archive_dir,),
+        ) as pool:
+            for sha, fields in pool.map(_reparse_page, list(by_page), chunksize=16):
+                if fields is None:
+                    stats["unparseable"] += 1
+                    continue
+                stats["reparsed"] += 1
+                for snapshot_id, product_id in by_page[sha]:
+                    updates.append({"id": snapshot_id, **fields})
+                    touched_products.add(product_id)
+                if len(updates) >= batch_size:
+                    flush()
+        flush()
+
+        if not dry_run:
+            _refresh_latest(db, list(touched_products))
+            rebuild_rollups(engine, list(touched_products))
+        return stats
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--asin")
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    result = reparse_archive(asin=args.asin, since=args.since, workers=args.workers, dry_run=args.dry_run)
+    print(result)
@@ -0,0 +1,72 @@
+"""Per-request cost of get_current_user with cold vs warm claim/principal caches.
+
+Usage (from backend/):  python benchmarks/bench_auth.py [--requests 2000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+from app.database import engine, async_engine, SessionLocal, AsyncSessionLocal
+from app.dependencies import get_current_user, claims_cache, principal_cache
+from app.migrations import run_migrations
+from app.models.user import User
+from app.routers.auth import create_token
+
+queries = 0
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global queries
+    queries += 1
+
+
+async def run(n: int, token: str, warm: bool) -> dict:
+    global queries
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    queries = 0
+    started = time.perf_counter()
+    for _ in range(n):
+        if not warm:
+            claims_cache.discard()
+            principal_cache.discard()
+        # One session per request, as get_async_db does
+        async with AsyncSessionLocal() as db:
+            await get_current_user(credentials, db)
+    elapsed = time.perf_counter() - started
+    return {"us_per_request": round(elapsed / n * 1e6, 1), "queries_per_request": round(queries / n, 2)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    db = SessionLocal()
+    user = User(id=str(uuid.uuid4()), email="bench@example.com", password_hash="x")
+    db.add(user)
+    db.commit()
+    token = create_token({"sub": user.id, "email": user.email})
+    db.close()
+
+    async def main():
+        await run(50, token, warm=False)  # warm up the pool and imports
+        cold = await run(args.requests, token, warm=False)
+        warm = await run(args.requests, token, warm=True)
+        await async_engine.dispose()
+        return cold, warm
+
+    cold, warm = asyncio.run(main())
+    print(f"{args.requests} authenticated requests")
+    print(f"  decode + SELECT every time  {cold}")
+    print(f"  cached claims + principal   {warm}")
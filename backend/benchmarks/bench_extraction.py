@@ -0,0 +1,162 @@
+"""Parser throughput and peak memory: legacy BeautifulSoup/html.parser vs the lxml extraction engine.
+
+Usage (from backend/):  python benchmarks/bench_extraction.py [--pad-mb 1.5] [--iterations 20]
+
+Fixture pages are padded with inline script filler up to --pad-mb to
+approximate real 1-2 MB Amazon pages.
+"""
+import argparse
+import os
+import re
+import sys
+import multiprocessing
+import resource
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from app.services.amazon.extraction import parse_document, extract_product, extract_bestsellers
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_product(page: str) -> dict:
+    """The pre-extraction-engine product parser, kept verbatim for comparison"""
+    soup = BeautifulSoup(page, "html.parser")
+    title = None
+    elem = soup.find("span", {"id": "productTitle"})
+    if elem:
+        title = elem.get_text(strip=True)
+    price = None
+    elem = soup.find("span", {"class": "a-price-whole"})
+    if elem:
+        try:
+            price = float(elem.get_text(strip=True).replace(",", ""))
+        except:
+            pass
+    rating = None
+    elem = soup.find("span", {"class": "a-icon-alt"})
+    if elem:
+        try:
+            rating = float(elem.get_text(strip=True).split(" ")[0])
+        except:
+            pass
+    review_count = None
+    elem = soup.find("span", {"id": "acrCustomerReviewText"})
+    if elem:
+        try:
+            review_count = int(re.sub(r"[^\d]", "", elem.get_text()))
+        except:
+            pass
+    bsr = None
+    match = re.search(r"#([\d,]+)\s+in", soup.get_text())
+    if match:
+        bsr = int(match.group(1).replace(",", ""))
+    brand = None
+    elem = soup.find("a", {"id": "bylineInfo"})
+    if elem:
+        brand = re.sub(r"(Brand:|Visit the|Store)", "", elem.get_text(strip=True)).strip()
+    category = None
+    breadcrumb = soup.find("div", {"id": "wayfinding-breadcrumbs_feature_div"})
+    if breadcrumb:
+        links = breadcrumb.find_all("a")
+        if links:
+            category = links[0].get_text(strip=True)
+    image_url = None
+    img = soup.find("img", {"id": "landingImage"})
+    if img:
+        image_url = img.get("src")
+    return {"title": title, "brand": brand, "category": category, "price": price, "rating": rating,
+            "review_count": review_count, "bsr": bsr, "image_url": image_url}
+
+
+def legacy_bestsellers(page: str) -> list:
+    soup = BeautifulSoup(page, "html.parser")
+    competitors = []
+    for item in soup.find_all("div", {"class": re.compile(r"zg-grid-general-faceout|p13n-sc-uncoverable-faceout")})[:10]:
+        title_elem = item.find("span", {"class": re.compile(r"a-size-base|zg-text-center-align")})
+        title = title_elem.get_text(strip=True) if title_elem else None
+        link = item.find("a", href=True)
+        asin = None
+        if link:
+            match = re.search(r"/dp/([A-Z0-9]{10})", link["href"])
+            if match:
+                asin = match.group(1)
+        price = None
+        price_elem = item.find("span", {"class": re.compile(r"a-price|p13n-sc-price")})
+        if price_elem:
+            try:
+                price = float(price_elem.get_text(strip=True).replace("$", "").replace(",", "").split()[0])
+            except:
+                pass
+        rating = None
+        rating_elem = item.find("span", {"class": "a-icon-alt"})
+        if rating_elem:
+            try:
+                rating = float(rating_elem.get_text().split()[0])
+            except:
+                pass
+        if asin and title:
+            competitors.append({"asin": asin, "title": title[:100], "price": price, "rating": rating})
+    return competitors
+
+
+def engine_product(page: str) -> dict:
+    return extract_product(parse_document(page))
+
+
+def engine_bestsellers(page: str) -> list:
+    # The legacy parser matched nested faceouts twice, so its 10 items are 5 products
+    keys = ("asin", "title", "price", "rating")
+    return [{k: c[k] for k in keys} for c in extract_bestsellers(parse_document(page), limit=5) for _ in range(2)]
+
+
+def load(name: str, pad_mb: float) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        page = f.read()
+    target = int(pad_mb * 1024 * 1024)
+    if len(page) >= target:
+        return page
+    block = "<script>var filler = '" + "x" * 8000 + "';</script>\n"
+    return page.replace("</body>", block * ((target - len(page)) // len(block) + 1) + "</body>")
+
+
+def _peak_rss(fn, page: str, queue):
+    # lxml builds its tree in C, invisible to tracemalloc, so compare the
+    # child's peak RSS against its baseline after loading the page
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    fn(page)
+    queue.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+
+
+def measure(fn, page: str, iterations: int) -> dict:
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_peak_rss, args=(fn, page, queue))
+    child.start()
+    peak_kb = queue.get()
+    child.join()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(page)
+    elapsed = time.perf_counter() - start
+    return {"pages_per_sec": round(iterations / elapsed, 1), "peak_mb": round(peak_kb / 1024, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pad-mb", type=float, default=1.5)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    for fixture, legacy, engine in (
+        ("product_page.html", legacy_product, engine_product),
+        ("bestsellers_page.html", legacy_bestsellers, engine_bestsellers),
+    ):
+        page = load(fixture, args.pad_mb)
+        same = legacy(page) == engine(page)
+        print(f"{fixture} ({len(page) / 1024 / 1024:.1f} MB) — results identical: {same}")
+        for name, fn in (("legacy", legacy), ("engine", engine)):
+            result = measure(fn, page, args.iterations)
+            print(f"  {name:<7} pages/sec={result['pages_per_sec']:<8} peak_rss_delta={result['peak_mb']} MB")
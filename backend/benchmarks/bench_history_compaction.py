@@ -0,0 +1,81 @@
+"""PriceHistory size and export scan time before and after compacting into change-only runs.
+
+Usage (from backend/):  python benchmarks/bench_history_compaction.py [--products 300] [--snapshots 500] [--change-rate 0.15]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+
+from sqlalchemy import text
+from app.database import engine, SessionLocal
+from app.migrations import run_migrations
+from app.models.product import Product, PriceHistory, TrackedProduct
+from app.services.amazon.product_store import set_latest
+from app.services.analytics.export_stream import stream_price_history
+from app.tasks.compact_history import compact_history
+
+
+def seed(n_products: int, n_snapshots: int, change_rate: float) -> str:
+    """Full-mode history: one row per scrape, values moving on change_rate of them"""
+    run_migrations(engine)
+    rng = random.Random(7)
+    user_id = str(uuid.uuid4())
+    start = datetime.now(timezone.utc) - timedelta(hours=5 * n_snapshots)
+    db = SessionLocal()
+    for i in range(n_products):
+        product = Product(id=str(uuid.uuid4()), asin=f"B{i:09d}", title=f"Product {i}", category="Home")
+        db.add(product)
+        db.add(TrackedProduct(id=str(uuid.uuid4()), user_id=user_id, product_id=product.id))
+        price, bsr, reviews = 20.0, 5000, 100
+        for j in range(n_snapshots):
+            if rng.random() < change_rate:
+                price = round(price + rng.choice([-1, 1]) * 0.5, 2)
+                bsr = max(1, bsr + rng.randint(-500, 500))
+                reviews += 1
+            snapshot = PriceHistory(id=str(uuid.uuid4()), product_id=product.id, price=price, bsr=bsr, rating=4.4,
+                                    review_count=reviews, in_stock=True, recorded_at=start + timedelta(hours=5 * j))
+            db.add(snapshot)
+        set_latest(product, snapshot)
+        db.commit()
+    db.close()
+    return user_id
+
+
+def measure(user_id: str) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT COUNT(*) FROM price_history")).scalar()
+        conn.execute(text("VACUUM"))
+    size_mb = os.path.getsize(f"{_tmp}/bench.db") / 1024 / 1024
+    started = time.perf_counter()
+    lines = sum(chunk.count("\n") for chunk in stream_price_history(user_id, fmt="csv")) - 1
+    return {"rows": rows, "db_mb": round(size_mb, 1), "export_s": round(time.perf_counter() - started, 2), "export_lines": lines}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--snapshots", type=int, default=500)
+    parser.add_argument("--change-rate", type=float, default=0.15)
+    args = parser.parse_args()
+
+    user_id = seed(args.products, args.snapshots, args.change_rate)
+    before = measure(user_id)
+    started = time.perf_counter()
+    result = compact_history()
+    compact_s = time.perf_counter() - started
+    after = measure(user_id)
+
+    print(f"{args.products} products x {args.snapshots} snapshots, change rate {args.change_rate}")
+    print(f"  full     {before}")
+    print(f"  runs     {after}")
+    print(f"  compaction removed {result['rows_removed']} rows in {compact_s:.1f}s")
+    assert before["export_lines"] == after["export_lines"], "expanded export must match"
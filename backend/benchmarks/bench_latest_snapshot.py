@@ -0,0 +1,96 @@
+"""Tracked-list query count and latency: per-item lookups vs the denormalized latest snapshot.
+
+Usage (from backend/):  python benchmarks/bench_latest_snapshot.py [--products 10000] [--snapshots 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+
+from sqlalchemy import event
+from app.database import Base, engine, SessionLocal
+from app.models.product import Product, PriceHistory, TrackedProduct
+from app.services.amazon.product_store import set_latest
+
+queries = 0
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global queries
+    queries += 1
+
+
+def seed(n_products: int, n_snapshots: int) -> str:
+    Base.metadata.create_all(bind=engine)
+    user_id = str(uuid.uuid4())
+    db = SessionLocal()
+    now = datetime.now(timezone.utc)
+    for i in range(n_products):
+        product = Product(id=str(uuid.uuid4()), asin=f"B{i:09d}", title=f"Product {i}", brand="Brand", category="Home")
+        db.add(product)
+        for j in range(n_snapshots):
+            snapshot = PriceHistory(id=str(uuid.uuid4()), product_id=product.id, price=10 + j, bsr=1000 + i,
+                                    rating=4.2, review_count=100 + j, in_stock=True,
+                                    recorded_at=now - timedelta(hours=n_snapshots - j))
+            db.add(snapshot)
+        set_latest(product, snapshot)
+        db.add(TrackedProduct(user_id=user_id, product_id=product.id))
+        if i % 1000 == 999:
+            db.commit()
+    db.commit()
+    db.close()
+    return user_id
+
+
+def per_item(db, user_id):
+    result = []
+    for t in db.query(TrackedProduct).filter(TrackedProduct.user_id == user_id).all():
+        product = db.query(Product).filter(Product.id == t.product_id).first()
+        if product:
+            latest = (
+                db.query(PriceHistory)
+                .filter(PriceHistory.product_id == product.id)
+                .order_by(PriceHistory.recorded_at.desc())
+                .first()
+            )
+            result.append((product.asin, latest.price if latest else None))
+    return result
+
+
+def joined(db, user_id):
+    rows = (
+        db.query(TrackedProduct.tracked_at, Product)
+        .join(Product, Product.id == TrackedProduct.product_id)
+        .filter(TrackedProduct.user_id == user_id)
+        .all()
+    )
+    return [(product.asin, product.latest_price) for _, product in rows]
+
+
+def run(name, fn, user_id):
+    global queries
+    db = SessionLocal()
+    queries = 0
+    start = time.perf_counter()
+    rows = fn(db, user_id)
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(f"{name:<10} rows={len(rows):>6}  queries={queries:>6}  latency={elapsed * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--snapshots", type=int, default=5)
+    args = parser.parse_args()
+
+    user_id = seed(args.products, args.snapshots)
+    run("per-item", per_item, user_id)
+    run("joined", joined, user_id)
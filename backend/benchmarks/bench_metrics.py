@@ -0,0 +1,93 @@
+"""Per-request overhead of MetricsMiddleware and the SQL cursor hooks.
+
+Drives the same small route (3 SELECTs) straight through ASGI, once on a
+bare app/engine and once with the middleware and instrument_engine().
+
+Usage (from backend/):  python benchmarks/bench_metrics.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/bench.db"
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from app.database import build_engine
+from app.services.metrics import MetricsMiddleware, instrument_engine
+
+
+def build_app(middleware: bool, sql_hooks: bool, name: str) -> FastAPI:
+    engine = build_engine(f"sqlite:///{_tmp}/{name}.db")
+    app = FastAPI()
+    if middleware:
+        app.add_middleware(MetricsMiddleware)
+    if sql_hooks:
+        instrument_engine(engine)
+
+    # async so every request stays on the loop; threadpool hand-off noise would swamp the difference
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(3):
+                conn.execute(text("SELECT :id"), {"id": item_id}).scalar()
+        return {"id": item_id}
+
+    return app
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def run(app, n: int) -> float:
+    for i in range(200):
+        await call(app, f"/items/{i}")
+    started = time.perf_counter()
+    for i in range(n):
+        await call(app, f"/items/{i}")
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    apps = {
+        "bare": build_app(False, False, "bare"),
+        "middleware": build_app(True, False, "middleware"),
+        "middleware+sql": build_app(True, True, "full"),
+    }
+    results = {name: [] for name in apps}
+    # Interleaved rounds, best of each: this is about the fixed cost, not scheduler noise
+    for _ in range(args.rounds):
+        for name, app in apps.items():
+            results[name].append(asyncio.run(run(app, args.requests)))
+
+    bare = min(results["bare"])
+    for name, timings in results.items():
+        best = min(timings)
+        print(f"{name:>16}: {best:8.1f} us/request  (+{best - bare:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Sales/opportunity scoring throughput: legacy per-product loop vs estimate_batch.
+
+Usage (from backend/):  python benchmarks/bench_sales_estimator.py [--products 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.amazon.sales_estimator import (
+    CATEGORY_CURVES, estimate_batch, estimate_monthly_sales, calculate_opportunity_score,
+)
+
+CATEGORIES = ["Home & Kitchen", "Electronics", "Clothing, Shoes & Jewelry", "Sports & Outdoors",
+              "Beauty & Personal Care", "Toys & Games", "Books", "Garden & Outdoor", "Pet Supplies", ""]
+
+
+def legacy_interpolate_sales(bsr, curve):
+    """The linear, re-sorting implementation this replaced"""
+    if bsr <= 0:
+        return 0
+    curve = sorted(curve, key=lambda x: x[0])
+    if bsr <= curve[0][0]:
+        return curve[0][1]
+    if bsr >= curve[-1][0]:
+        return max(0, curve[-1][1])
+    for i in range(len(curve) - 1):
+        bsr_low, sales_high = curve[i]
+        bsr_high, sales_low = curve[i + 1]
+        if bsr_low <= bsr <= bsr_high:
+            ratio = (bsr - bsr_low) / (bsr_high - bsr_low)
+            return max(0, int(sales_high - ratio * (sales_high - sales_low)))
+    return 0
+
+
+def legacy_estimate(bsr, category):
+    category_lower = (category or "").lower()
+    curve = CATEGORY_CURVES["default"]
+    for key, cat_curve in CATEGORY_CURVES.items():
+        if key != "default" and key in category_lower:
+            curve = cat_curve
+            break
+    return legacy_interpolate_sales(bsr, curve)
+
+
+def legacy_score(bsr, review_count, monthly_sales, seller_count):
+    score = 0
+    if monthly_sales >= 3000: score += 30
+    elif monthly_sales >= 1500: score += 23
+    elif monthly_sales >= 800: score += 17
+    elif monthly_sales >= 300: score += 10
+    elif monthly_sales >= 100: score += 5
+    if review_count < 100: score += 30
+    elif review_count < 500: score += 22
+    elif review_count < 1000: score += 15
+    elif review_count < 3000: score += 8
+    elif review_count < 8000: score += 3
+    if bsr < 1000: score += 20
+    elif bsr < 5000: score += 15
+    elif bsr < 15000: score += 10
+    elif bsr < 50000: score += 5
+    if seller_count <= 1: score += 20
+    elif seller_count <= 3: score += 15
+    elif seller_count <= 8: score += 10
+    elif seller_count <= 15: score += 5
+    return round(min(100, score), 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    bsrs = [int(10 ** rng.uniform(0, 5.5)) for _ in range(args.products)]
+    reviews = [rng.randint(0, 20000) for _ in range(args.products)]
+    categories = [rng.choice(CATEGORIES) for _ in range(args.products)]
+
+    start = time.perf_counter()
+    for bsr, rc, cat in zip(bsrs, reviews, categories):
+        units = legacy_estimate(bsr, cat)
+        if units:
+            legacy_score(bsr, rc, units, 1)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for bsr, rc, cat in zip(bsrs[:10000], reviews, categories):
+        units = estimate_monthly_sales(bsr, cat)["monthly_units"]
+        if units:
+            calculate_opportunity_score(bsr, rc, units, 1)
+    wrappers = (time.perf_counter() - start) * args.products / min(args.products, 10000)
+
+    start = time.perf_counter()
+    result = estimate_batch(bsrs, reviews, categories)
+    batch = time.perf_counter() - start
+
+    # Scalar wrappers and the batch path share one implementation
+    for i in range(0, args.products, max(1, args.products // 1000)):
+        scalar = estimate_monthly_sales(bsrs[i], categories[i])["monthly_units"]
+        assert scalar == result["monthly_units"][i]
+        assert calculate_opportunity_score(bsrs[i], reviews[i], scalar, 1) == result["opportunity_score"][i]
+
+    print(f"{args.products} products")
+    print(f"  legacy loop       {legacy:.3f}s  ({args.products / legacy:,.0f}/s)")
+    print(f"  scalar wrappers   {wrappers:.3f}s  ({args.products / wrappers:,.0f}/s, extrapolated from 10k)")
+    print(f"  estimate_batch    {batch:.3f}s  ({args.products / batch:,.0f}/s)")
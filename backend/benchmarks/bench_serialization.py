@@ -0,0 +1,143 @@
+"""Serialization time and payload size of a product response with 90 and 5,000 history points.
+
+Drives three apps straight through ASGI with the same rows (Decimal prices,
+datetimes, as they come out of the DB):
+  before   hand-built dict with float()/isoformat(), FastAPI's default JSONResponse
+  rows     ProductDetail response model, ORJSONResponse
+  columns  ProductDetail with price_history as parallel arrays, ORJSONResponse
+
+Usage (from backend/):  python benchmarks/bench_serialization.py [--requests 200]
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from app.schemas.product import ProductDetail
+
+Row = namedtuple("Row", "price bsr rating review_count recorded_at")
+
+
+def make_rows(n: int):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Row(Decimal(f"{19 + (i % 700) / 100:.2f}"), 1000 + i * 7 % 5000, Decimal("4.40"), 1200 + i, start + timedelta(hours=i))
+        for i in range(n)
+    ]
+
+
+def header(rows) -> dict:
+    latest = rows[-1]
+    return {
+        "asin": "B000BENCH1", "title": "Stainless Steel Insulated Water Bottle, 32 oz", "brand": "Bench",
+        "category": "Home & Kitchen", "image_url": "https://example.com/img.jpg",
+        "amazon_url": "https://www.amazon.com/dp/B000BENCH1", "current_bsr": latest.bsr,
+        "current_review_count": latest.review_count, "in_stock": True, "sales_estimate_monthly": 850,
+        "revenue_estimate_monthly": 16983.0, "opportunity_score": 55.0,
+    }
+
+
+def build_before(rows) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/product")
+    async def product():
+        latest = rows[-1]
+        return {
+            **header(rows),
+            "current_price": float(latest.price) if latest.price else None,
+            "current_rating": float(latest.rating) if latest.rating else None,
+            "price_history": [
+                {
+                    "price": float(h.price) if h.price else None,
+                    "bsr": h.bsr,
+                    "rating": float(h.rating) if h.rating else None,
+                    "review_count": h.review_count,
+                    "recorded_at": h.recorded_at.isoformat(),
+                }
+                for h in rows
+            ],
+        }
+
+    return app
+
+
+def build_typed(rows, columns: bool) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/product", response_model=ProductDetail)
+    async def product():
+        latest = rows[-1]
+        points = [h._asdict() for h in rows]
+        if columns:
+            points = {key: [p[key] for p in points] for key in Row._fields}
+        return {**header(rows), "current_price": latest.price, "current_rating": latest.rating, "price_history": points}
+
+    return app
+
+
+async def call(app) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/product", "raw_path": b"/product", "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def run(app, n: int) -> float:
+    for _ in range(10):
+        await call(app)
+    started = time.perf_counter()
+    for _ in range(n):
+        await call(app)
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    for size in (90, 5000):
+        rows = make_rows(size)
+        apps = {"before": build_before(rows), "rows": build_typed(rows, False), "columns": build_typed(rows, True)}
+        n = max(10, args.requests * 90 // size)
+        timings = {name: [] for name in apps}
+        for _ in range(args.rounds):
+            for name, app in apps.items():
+                timings[name].append(asyncio.run(run(app, n)))
+
+        print(f"{size} history points")
+        before = min(timings["before"])
+        for name, app in apps.items():
+            body = asyncio.run(call(app))
+            best = min(timings[name])
+            print(
+                f"  {name:>8}: {best:10.1f} us/request ({before / best:4.1f}x)"
+                f"  {len(body):>8,} bytes  {len(gzip.compress(body, compresslevel=6)):>7,} gzipped"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Concurrent read/write throughput: plain SQLite engine vs the tuned profile.
+
+Usage (from backend/):  python benchmarks/bench_sqlite_concurrency.py [--readers 8] [--writers 4] [--seconds 10]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, build_engine, enable_write_serialization
+from app.models.product import Product, PriceHistory
+from app.services.amazon.product_store import apply_scrape
+
+
+def scrape_data(asin):
+    return {"title": f"Product {asin}", "brand": "Brand", "category": "Home", "image_url": None,
+            "amazon_url": None, "is_prime": True, "price": 19.99, "bsr": 1200, "rating": 4.4,
+            "review_count": 321, "in_stock": True}
+
+
+def run(profile: str, readers: int, writers: int, seconds: float, n_products: int = 500) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), f"{profile}.db")
+    engine = build_engine(f"sqlite:///{path}", profile)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    if profile == "tuned":
+        enable_write_serialization(Session, threading.Lock())
+
+    asins = [f"B{i:09d}" for i in range(n_products)]
+    db = Session()
+    for asin in asins:
+        apply_scrape(db, asin, scrape_data(asin))
+    db.commit()
+    db.close()
+
+    counts = {"reads": 0, "writes": 0, "locked_errors": 0}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def reader(seed):
+        i = seed
+        while time.monotonic() < stop_at:
+            db = Session()
+            try:
+                product = db.query(Product).filter(Product.asin == asins[i % n_products]).first()
+                db.query(PriceHistory).filter(PriceHistory.product_id == product.id).order_by(
+                    PriceHistory.recorded_at.desc()).limit(90).all()
+                with lock:
+                    counts["reads"] += 1
+            except OperationalError:
+                with lock:
+                    counts["locked_errors"] += 1
+            finally:
+                db.close()
+            i += 7
+
+    def writer(seed):
+        i = seed
+        while time.monotonic() < stop_at:
+            db = Session()
+            try:
+                asin = asins[i % n_products]
+                product = db.query(Product).filter(Product.asin == asin).first()
+                apply_scrape(db, asin, scrape_data(asin), product)
+                db.commit()
+                with lock:
+                    counts["writes"] += 1
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    counts["locked_errors"] += 1
+            finally:
+                db.close()
+            i += 13
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return {k: v for k, v in counts.items()} | {
+        "reads_per_sec": round(counts["reads"] / seconds, 1),
+        "writes_per_sec": round(counts["writes"] / seconds, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    for profile in ("default", "tuned"):
+        result = run(profile, args.readers, args.writers, args.seconds)
+        print(f"{profile:<8} " + "  ".join(f"{k}={v}" for k, v in result.items()))
@@ -0,0 +1,116 @@
+"""Local stand-in for ScraperAPI and Amazon autocomplete, for offline load tests.
+
+Serves the fixture pages from benchmarks/fixtures (product details vary per
+ASIN so products don't all look alike) and autocomplete JSON, with
+configurable latency and failure rates.
+
+Usage (from backend/):  python benchmarks/fake_upstream.py [--port 8900] [--latency-ms 300] [--jitter-ms 100]
+                            [--failure-rate 0.02] [--captcha-rate 0.01]
+
+Then run the app with
+    SCRAPER_API_URL=http://127.0.0.1:8900
+    KEYWORD_SUGGEST_URL=http://127.0.0.1:8900/api/2017/suggestions
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import re
+from fastapi import FastAPI, Query
+from fastapi.responses import HTMLResponse, JSONResponse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ASIN_IN_URL = re.compile(r"/dp/([A-Z0-9]{10})")
+PAGE_IN_URL = re.compile(r"[?&]pg=(\d+)")
+CAPTCHA_PAGE = "<html><body><form action='/errors/validateCaptcha'>Enter the characters you see below</form></body></html>"
+SUFFIXES = ("for men", "for women", "for kids", "large", "small", "set", "pack", "with lid", "stainless", "bpa free")
+
+
+def _read(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+
+
+def product_page(template: str, asin: str) -> str:
+    seed = _seed(asin)
+    page = template.replace("Stainless Steel Insulated Water Bottle", f"Stainless Steel Insulated Water Bottle {asin}")
+    page = page.replace('a-price-whole">24<', f'a-price-whole">{10 + seed % 90}<', 1)
+    page = page.replace("#1,234 in", f"#{1 + seed % 150000:,} in", 1)
+    return page.replace("18,432 ratings", f"{seed % 40000:,} ratings", 1)
+
+
+def bestsellers_page(template: str, page: int) -> str:
+    """Later pages carry other ASINs and continue the rank badges"""
+    if page <= 1:
+        return template
+    html = re.sub(r"/dp/([A-Z0-9]{10})", lambda m: f"/dp/B{_seed(f'{m.group(1)}:{page}') % 10**9:09d}", template)
+    return re.sub(r'zg-bdg-text">#(\d+)<', lambda m: f'zg-bdg-text">#{int(m.group(1)) + (page - 1) * 50}<', html)
+
+
+def build_app(latency_ms: float, jitter_ms: float, failure_rate: float, captcha_rate: float) -> FastAPI:
+    app = FastAPI()
+    templates = {"product": _read("product_page.html"), "bestsellers": _read("bestsellers_page.html")}
+    app.state.counts = {"pages": 0, "suggestions": 0, "failures": 0, "captchas": 0}
+
+    async def delay():
+        wait = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+        if wait:
+            await asyncio.sleep(wait)
+
+    @app.get("/")
+    async def scraper_api(url: str = Query(...)):
+        """ScraperAPI's GET /?api_key=...&url=... contract"""
+        await delay()
+        app.state.counts["pages"] += 1
+        roll = random.random()
+        if roll < failure_rate:
+            app.state.counts["failures"] += 1
+            return HTMLResponse("upstream error", status_code=500)
+        if roll < failure_rate + captcha_rate:
+            app.state.counts["captchas"] += 1
+            return HTMLResponse(CAPTCHA_PAGE)
+        match = ASIN_IN_URL.search(url)
+        if match:
+            return HTMLResponse(product_page(templates["product"], match.group(1)))
+        match = PAGE_IN_URL.search(url)
+        return HTMLResponse(bestsellers_page(templates["bestsellers"], int(match.group(1)) if match else 1))
+
+    @app.get("/api/2017/suggestions")
+    async def suggestions(prefix: str = Query(default="")):
+        await delay()
+        app.state.counts["suggestions"] += 1
+        if random.random() < failure_rate:
+            app.state.counts["failures"] += 1
+            return JSONResponse({"error": "throttled"}, status_code=503)
+        words = random.Random(_seed(prefix)).sample(SUFFIXES, 6)
+        return {"prefix": prefix, "suggestions": [{"value": f"{prefix} {w}"} for w in words]}
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.counts
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--captcha-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = build_app(args.latency_ms, args.jitter_ms, args.failure_rate, args.captcha_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
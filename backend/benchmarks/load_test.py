@@ -0,0 +1,294 @@
+"""Offline load test: every router against a local fake upstream, with a JSON latency report.
+
+Starts benchmarks/fake_upstream.py and the app (uvicorn, on a throwaway
+SQLite database), seeds users and products, then drives each scenario
+with --concurrency clients for --duration seconds. Prints (or writes to
+--output) throughput and p50/p95/p99 latency per scenario. With
+--baseline, a scenario whose p95 grew or whose throughput dropped by more
+than --tolerance fails the run (exit code 1).
+
+Usage (from backend/):  python benchmarks/load_test.py [--duration 10] [--concurrency 20] [--workers 1]
+                            [--upstream-latency-ms 300] [--upstream-failure-rate 0.02]
+                            [--only products_get,keywords] [--output report.json] [--baseline last.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import httpx
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+_new_asins = itertools.count(1)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_servers(args, tmp: str):
+    upstream_port, app_port = _free_port(), _free_port()
+    upstream = subprocess.Popen([
+        sys.executable, os.path.join(HERE, "fake_upstream.py"), "--port", str(upstream_port),
+        "--latency-ms", str(args.upstream_latency_ms), "--jitter-ms", str(args.upstream_jitter_ms),
+        "--failure-rate", str(args.upstream_failure_rate), "--captcha-rate", str(args.upstream_captcha_rate),
+    ])
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp}/load.db",
+        "PAGE_ARCHIVE_DIR": f"{tmp}/page_archive",
+        "SCRAPER_API_URL": f"http://127.0.0.1:{upstream_port}",
+        "SCRAPER_API_KEY": "load-test",
+        "KEYWORD_SUGGEST_URL": f"http://127.0.0.1:{upstream_port}/api/2017/suggestions",
+        "KEYWORD_SUGGEST_RATE": "1000",
+        "KEYWORD_SUGGEST_BURST": "1000",
+        "REFRESH_SCHEDULER_ENABLED": "false",
+        # Measure the routes, not the per-user limits
+        "QUOTA_BURST_CAPACITY": "1000000000",
+        "QUOTA_REFILL_PER_SECOND": "1000000000",
+    }
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL if not args.verbose else None,
+    )
+    _wait_until_up(f"http://127.0.0.1:{upstream_port}/stats")
+    _wait_until_up(f"http://127.0.0.1:{app_port}/health")
+    return upstream, app, f"http://127.0.0.1:{upstream_port}", f"http://127.0.0.1:{app_port}"
+
+
+def new_asin() -> str:
+    return f"B{next(_new_asins):09d}"
+
+
+async def seed(client: httpx.AsyncClient, db_path: str, users: int, products: int) -> dict:
+    tokens = []
+    for i in range(users):
+        r = await client.post("/api/auth/register", json={"email": f"load{i}@example.com", "password": "load-test-pw"})
+        r.raise_for_status()
+        tokens.append(r.json()["access_token"])
+    # Before any authenticated call, so no worker has a cached principal with the old limit
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE users SET search_limit = NULL")
+
+    asins = [new_asin() for _ in range(products)]
+    headers = {"Authorization": f"Bearer {tokens[0]}"}
+    sem = asyncio.Semaphore(20)
+
+    async def fetch(asin):
+        async with sem:
+            (await client.get(f"/api/products/{asin}", headers=headers)).raise_for_status()
+
+    await asyncio.gather(*(fetch(a) for a in asins))
+    for token in tokens:
+        for asin in asins[:20]:
+            await client.post(f"/api/products/{asin}/track", headers={"Authorization": f"Bearer {token}"})
+    return {"tokens": tokens, "asins": asins}
+
+
+def scenarios(data: dict) -> dict:
+    """name -> fn(rng) returning (method, path, json body or None)"""
+    asins = data["asins"]
+
+    def pick(rng):
+        return rng.choice(asins)
+
+    grid = lambda rng: {"asin": pick(rng), "landed_cost": {"min": 4, "max": 14, "steps": 40},
+                        "ad_spend": {"min": 0, "max": 5, "steps": 20}}
+    return {
+        "products_get": lambda rng: ("GET", f"/api/products/{pick(rng)}", None),
+        "products_scrape": lambda rng: ("GET", f"/api/products/{new_asin()}", None),
+        "products_batch": lambda rng: ("POST", "/api/products/batch",
+                                       {"asins": rng.sample(asins, 8) + [new_asin(), new_asin()]}),
+        "products_history": lambda rng: ("GET", f"/api/products/{pick(rng)}/history", None),
+        "tracked_list": lambda rng: ("GET", "/api/products/tracked/list", None),
+        "keywords": lambda rng: ("GET", f"/api/keywords/{pick(rng)}", None),
+        "competitors": lambda rng: ("GET", f"/api/competitors/{pick(rng)}", None),
+        "profit_calculate": lambda rng: ("GET", f"/api/profit/calculate?selling_price={rng.uniform(15, 60):.2f}"
+                                                f"&product_cost={rng.uniform(3, 12):.2f}&category=Electronics", None),
+        "profit_asin": lambda rng: ("GET", f"/api/profit/{pick(rng)}?product_cost=6.5", None),
+        "profit_grid": lambda rng: ("POST", "/api/profit/grid", grid(rng)),
+        "analysis_ai": lambda rng: ("GET", f"/api/analysis/{pick(rng)}/ai", None),
+        "export_csv": lambda rng: ("GET", "/api/analysis/export/csv", None),
+        "export_history": lambda rng: ("GET", "/api/analysis/export/history?format=ndjson", None),
+    }
+
+
+async def run_scenario(base_url: str, tokens: list, make_request, duration: float, concurrency: int) -> dict:
+    latencies, statuses = [], {}
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        async def worker(i: int):
+            rng = random.Random(i)
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+            while time.monotonic() < deadline:
+                method, path, body = make_request(rng)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body, headers=headers)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    ok = sum(n for status, n in statuses.items() if status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+        "p95_ms": round(float(np.percentile(ms, 95)), 2) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+        "max_ms": round(float(ms.max()), 2) if len(ms) else None,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    regressions = []
+    for name, now in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or not before.get("p95_ms") or not now.get("p95_ms"):
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+        if now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} rps")
+    return regressions
+
+
+async def run(args, base_url: str, upstream_url: str, db_path: str) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        data = await seed(client, db_path, args.users, args.products)
+
+    selected = scenarios(data)
+    if args.only:
+        wanted = set(args.only.split(","))
+        selected = {name: fn for name, fn in selected.items() if name in wanted}
+
+    results = {}
+    for name, make_request in selected.items():
+        results[name] = await run_scenario(base_url, data["tokens"], make_request, args.duration, args.concurrency)
+        print(f"{name:>18}: {results[name]['throughput_rps']:8.1f} rps  p50 {results[name]['p50_ms']} ms  "
+              f"p95 {results[name]['p95_ms']} ms  p99 {results[name]['p99_ms']} ms  errors {results[name]['errors']}",
+              file=sys.stderr)
+
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        upstream_stats = (await client.get(f"{upstream_url}/stats")).json()
+        server_metrics = (await client.get(f"{base_url}/metrics")).text if args.workers == 1 else None
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "users": args.users,
+            "products": args.products,
+            "upstream": {
+                "latency_ms": args.upstream_latency_ms, "jitter_ms": args.upstream_jitter_ms,
+                "failure_rate": args.upstream_failure_rate, "captcha_rate": args.upstream_captcha_rate,
+                **upstream_stats,
+            },
+        },
+        "scenarios": results,
+    }
+    if server_metrics is not None:
+        report["meta"]["db_queries_total"] = _metric_value(server_metrics, "db_queries_total")
+    return report
+
+
+def _metric_value(text: str, name: str):
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    return None
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--upstream-latency-ms", type=float, default=300.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--upstream-failure-rate", type=float, default=0.02)
+    parser.add_argument("--upstream-captcha-rate", type=float, default=0.01)
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="show the app's own output")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    upstream, app, upstream_url, base_url = start_servers(args, tmp)
+    try:
+        report = asyncio.run(run(args, base_url, upstream_url, f"{tmp}/load.db"))
+    finally:
+        for proc in (app, upstream):
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.database builds its engines at import, so the test database has to be chosen first
+_workdir = tempfile.mkdtemp(prefix="amazon-intel-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'test.db')}")
+os.environ.setdefault("PAGE_ARCHIVE_DIR", os.path.join(_workdir, "page_archive"))
+os.environ.setdefault("SCRAPER_API_URL", "http://127.0.0.1:9")  # nothing listens; scrapes fail fast
+os.environ.setdefault("REFRESH_SCHEDULER_ENABLED", "false")
+os.environ.setdefault("COMPETITOR_CRAWL_ENABLED", "false")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post("/api/auth/register", json={"email": "tests@example.com", "password": "pw123456"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
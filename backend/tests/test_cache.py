@@ -0,0 +1,89 @@
+"""ResponseCache over the in-memory backend: snapshot-keyed invalidation, TTL expiry, hit/miss counters."""
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.services import cache as cache_module
+from app.services.cache import InMemoryCache, ResponseCache, snapshot_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the cache module's view of time; the event loop keeps the real clock
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def response_cache():
+    return ResponseCache(InMemoryCache(max_entries=100))
+
+
+class Compute:
+    """Counts calls; returns a value tagged with the call number"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"call": self.calls}
+
+
+def test_snapshot_key_changes_with_latest_snapshot(response_cache, clock):
+    compute = Compute()
+    get = lambda snapshot_id: asyncio.run(  # noqa: E731
+        response_cache.get_or_compute("keywords", snapshot_key("b000test01", snapshot_id), compute, ttl=3600)
+    )
+
+    assert get("snap-1") == {"call": 1}
+    assert get("snap-1") == {"call": 1}  # same snapshot: served from cache
+    assert get("snap-2") == {"call": 2}  # a new scrape moved latest_snapshot_id
+    assert get("snap-2") == {"call": 2}
+    assert compute.calls == 2
+    assert snapshot_key("b000test01", "snap-2") == snapshot_key("B000TEST01", "snap-2")
+    assert snapshot_key("B000TEST01", None) == "B000TEST01:none"
+
+
+def test_entries_expire_after_ttl(response_cache, clock):
+    compute = Compute()
+    get = lambda: asyncio.run(response_cache.get_or_compute("keywords", "k", compute, ttl=60))  # noqa: E731
+
+    assert get() == {"call": 1}
+    clock.now += 59
+    assert get() == {"call": 1}
+    clock.now += 2
+    assert get() == {"call": 2}
+    assert response_cache.backend.size() == 1  # the expired entry was replaced, not kept alongside
+
+
+def test_hit_and_miss_counters(response_cache, clock):
+    compute = Compute()
+    for key in ("a", "a", "a", "b"):
+        asyncio.run(response_cache.get_or_compute("keywords", key, compute, ttl=60))
+    asyncio.run(response_cache.get_or_compute("competitors", "a", compute, ttl=60))
+
+    stats = response_cache.stats()
+    assert stats["backend"] == "InMemoryCache"
+    assert stats["entries"] == 3
+    assert stats["namespaces"]["keywords"] == {"hits": 2, "misses": 2, "hit_ratio": 0.5}
+    assert stats["namespaces"]["competitors"] == {"hits": 0, "misses": 1, "hit_ratio": 0.0}
+
+
+def test_lru_eviction(clock):
+    backend = InMemoryCache(max_entries=2)
+    asyncio.run(backend.set("a", 1, ttl=60))
+    asyncio.run(backend.set("b", 2, ttl=60))
+    asyncio.run(backend.get("a"))  # a is now the most recently used
+    asyncio.run(backend.set("c", 3, ttl=60))
+    assert asyncio.run(backend.get("b")) is None
+    assert asyncio.run(backend.get("a")) == 1
+    assert asyncio.run(backend.get("c")) == 3
@@ -0,0 +1,75 @@
+"""Compaction reads and folds a product's history under the write lock, and one bad product doesn't stop a sweep."""
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm.exc import StaleDataError
+from app.database import DATABASE_URL, SessionLocal, engine
+from app.migrations import run_migrations
+from app.models.product import PriceHistory, Product
+from app.tasks import compact_history as compaction
+
+
+def _seed(asin: str, observations: int) -> str:
+    run_migrations(engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db = SessionLocal()
+    try:
+        product = Product(asin=asin, title="Compaction")
+        db.add(product)
+        db.flush()
+        rows = [
+            PriceHistory(product_id=product.id, price=10, bsr=500, rating=4.5, review_count=20,
+                         in_stock=True, recorded_at=start + timedelta(hours=i))
+            for i in range(observations)
+        ]
+        db.add_all(rows)
+        db.flush()
+        product.latest_snapshot_id = rows[-1].id
+        db.commit()
+        return product.id
+    finally:
+        db.close()
+
+
+def test_other_writers_wait_until_the_fold_commits(monkeypatch):
+    product_id = _seed("B0COMPACT1", 5)
+    refused = []
+    original_key = compaction._key
+
+    def key_with_concurrent_sweep(row):
+        # A retention sweep from another connection, landing between the read and the deletes
+        if not refused:
+            other = sqlite3.connect(DATABASE_URL.split("///", 1)[1], timeout=0)
+            try:
+                other.execute("DELETE FROM price_history WHERE product_id = ?", (product_id,))
+                other.commit()
+                refused.append(False)
+            except sqlite3.OperationalError as e:
+                refused.append("locked" in str(e))
+            finally:
+                other.close()
+        return original_key(row)
+
+    monkeypatch.setattr(compaction, "_key", key_with_concurrent_sweep)
+    assert compaction.compact_product(product_id) == 3
+    assert refused == [True]
+
+    db = SessionLocal()
+    try:
+        rows = db.query(PriceHistory).filter(PriceHistory.product_id == product_id).all()
+        assert sorted(row.repeat_count for row in rows) == [1, 4]
+    finally:
+        db.close()
+
+
+def test_stale_product_does_not_abort_the_sweep(monkeypatch):
+    ids = [_seed("B0COMPACT2", 3), _seed("B0COMPACT3", 3)]
+    original = compaction.compact_product
+
+    def compact_or_fail(product_id):
+        if product_id == ids[0]:
+            raise StaleDataError("DELETE statement on table 'price_history' expected to delete 1 row(s); 0 were matched.")
+        return original(product_id)
+
+    monkeypatch.setattr(compaction, "compact_product", compact_or_fail)
+    result = compaction.compact_history(ids)
+    assert result == {"products": 2, "rows_removed": 1, "failed": 1}
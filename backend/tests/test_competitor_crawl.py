@@ -0,0 +1,52 @@
+"""Categories that resolve to the same bestseller list are crawled and stored once."""
+import asyncio
+from app.database import SessionLocal, engine
+from app.migrations import run_migrations
+from app.models.competitor import CompetitorCrawl, CompetitorSnapshot
+from app.models.product import Product, TrackedProduct
+from app.tasks import competitor_crawl
+
+TOY_CATEGORIES = ["Toys & Games", "Toy Store"]
+
+
+def _track(asin: str, category: str):
+    db = SessionLocal()
+    try:
+        product = Product(asin=asin, title=category, category=category)
+        db.add(product)
+        db.flush()
+        db.add(TrackedProduct(user_id="crawl-test-user", product_id=product.id))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_categories_sharing_a_list_share_one_crawl(monkeypatch):
+    run_migrations(engine)
+    _track("B0TOYCRAWL", TOY_CATEGORIES[0])
+    _track("B0TOYSTORE", TOY_CATEGORIES[1])
+
+    groups = [members for members in competitor_crawl.due_categories().values() if set(members) & set(TOY_CATEGORIES)]
+    assert len(groups) == 1 and sorted(groups[0]) == sorted(TOY_CATEGORIES)
+
+    crawled = []
+
+    async def fake_crawl(category, max_pages):
+        crawled.append(category)
+        return [
+            {"rank": rank, "asin": f"B0TOY{rank:05d}", "title": "Toy", "price": 9.99, "rating": 4.0, "review_count": 10}
+            for rank in range(1, 4)
+        ], 1
+
+    monkeypatch.setattr(competitor_crawl, "crawl_bestsellers", fake_crawl)
+    asyncio.run(competitor_crawl.CompetitorCrawler().tick())
+    assert len([c for c in crawled if c in TOY_CATEGORIES]) == 1
+
+    db = SessionLocal()
+    try:
+        rows = [db.get(CompetitorCrawl, category) for category in TOY_CATEGORIES]
+        assert all(row.status == "ready" for row in rows)
+        assert rows[0].crawl_id == rows[1].crawl_id
+        assert db.query(CompetitorSnapshot).filter(CompetitorSnapshot.crawl_id == rows[0].crawl_id).count() == 3
+    finally:
+        db.close()
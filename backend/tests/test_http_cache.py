@@ -0,0 +1,68 @@
+"""Conditional GETs on product routes: 304 only while nothing the response shows has changed."""
+from datetime import datetime, timezone
+from app.database import SessionLocal
+from app.models.product import Product
+from app.services.amazon.product_store import apply_scrape
+
+ASIN = "B0ETAGTEST"
+
+
+def _seed(asin: str = ASIN, scrapes: int = 1):
+    db = SessionLocal()
+    try:
+        for i in range(scrapes):
+            product = db.query(Product).filter(Product.asin == asin).first()
+            apply_scrape(db, asin, {
+                "title": "ETag test", "brand": "Test", "category": "Home & Kitchen", "image_url": None,
+                "amazon_url": f"https://www.amazon.com/dp/{asin}", "is_prime": True, "in_stock": True,
+                "price": 19.99 + i, "bsr": 5000, "rating": 4.2, "review_count": 300,
+            }, product)
+            db.commit()
+    finally:
+        db.close()
+
+
+def _rewrite(**values):
+    db = SessionLocal()
+    try:
+        product = db.query(Product).filter(Product.asin == ASIN).one()
+        for key, value in values.items():
+            setattr(product, key, value)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_revalidation_follows_in_place_rewrites(client, auth_headers):
+    _seed()
+    url = f"/api/products/{ASIN}"
+    first = client.get(url, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert "Accept-Encoding" in cached.headers["vary"]
+    assert "Authorization" in cached.headers["vary"]
+
+    # Reparse-style rewrite: same snapshot id and sync time, different values
+    _rewrite(latest_price=24.00)
+    changed = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    etag = changed.headers["etag"]
+
+    # Only history rows rewritten: updated_at moves
+    _rewrite(updated_at=datetime.now(timezone.utc))
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+    history = f"/api/products/{ASIN}/history"
+    etag = client.get(history, headers=auth_headers).headers["etag"]
+    assert client.get(history, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+
+def test_compressed_response_lists_accept_encoding_once(client, auth_headers):
+    _seed("B0VARYTEST", scrapes=30)  # enough history for a body worth compressing
+    response = client.get("/api/products/B0VARYTEST/history?points=2000", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers.get("content-encoding") == "gzip"
+    tokens = [t.strip().lower() for t in response.headers["vary"].split(",")]
+    assert tokens.count("accept-encoding") == 1
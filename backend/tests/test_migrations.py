@@ -0,0 +1,127 @@
+"""run_migrations against a fresh database and against one created before migrations existed."""
+import sqlite3
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from app.database import Base
+from app.models import analysis, archive, competitor, lease, product, user  # noqa: F401  (registers every table)
+from app.migrations import MIGRATIONS, run_migrations
+from app.services.amazon.history_rollups import _rollup_rows
+
+# Schema main.py created with Base.metadata.create_all before there were migrations
+BASELINE = """
+CREATE TABLE users (
+    id VARCHAR(36) NOT NULL, email VARCHAR(255) NOT NULL, password_hash VARCHAR(255) NOT NULL,
+    full_name VARCHAR(255), "plan" VARCHAR(20), monthly_searches INTEGER, search_limit INTEGER,
+    is_active BOOLEAN, is_verified BOOLEAN, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), updated_at DATETIME,
+    PRIMARY KEY (id), UNIQUE (email)
+);
+CREATE TABLE products (
+    id VARCHAR(36) NOT NULL, asin VARCHAR(10) NOT NULL, title TEXT, brand VARCHAR(255), category VARCHAR(255),
+    image_url TEXT, amazon_url TEXT, is_prime BOOLEAN, last_synced_at DATETIME,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (id), UNIQUE (asin)
+);
+CREATE TABLE price_history (
+    id VARCHAR(36) NOT NULL, product_id VARCHAR(36) NOT NULL, price NUMERIC(10, 2), bsr INTEGER,
+    rating NUMERIC(3, 2), review_count INTEGER, in_stock BOOLEAN, recorded_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (id)
+);
+CREATE TABLE tracked_products (
+    id VARCHAR(36) NOT NULL, user_id VARCHAR(36) NOT NULL, product_id VARCHAR(36) NOT NULL,
+    tracked_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (id)
+);
+"""
+
+HISTORY = [
+    # id, product_id, price, bsr, rating, review_count, in_stock, recorded_at
+    ("h1", "p1", 19.99, 1200, 4.5, 310, 1, "2026-10-11 23:10:00.000000"),  # Sunday: previous week
+    ("h2", "p1", 18.49, 1100, 4.5, 312, 1, "2026-10-12 09:15:00.000000"),
+    ("h3", "p1", None, 1150, 4.5, 312, 0, "2026-10-12 09:45:00.000000"),
+    ("h4", "p1", 17.99, None, 4.4, 318, 1, "2026-10-13 14:00:00.000000"),
+    ("h5", "p2", 5.25, 80, 4.1, 40, 1, "2026-10-12 10:00:00.000000"),
+]
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    path = tmp_path / "baseline.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE)
+    conn.executemany("INSERT INTO products (id, asin, title) VALUES (?, ?, ?)", [
+        ("p1", "B000000001", "Tracked"), ("p2", "B000000002", "Other"), ("p3", "B000000003", "Never scraped"),
+    ])
+    conn.executemany("INSERT INTO price_history VALUES (?, ?, ?, ?, ?, ?, ?, ?)", HISTORY)
+    conn.executemany("INSERT INTO tracked_products (id, user_id, product_id) VALUES (?, ?, ?)", [
+        ("t1", "u1", "p1"), ("t2", "u1", "p1"),  # duplicate pair, deduplicated by v003
+    ])
+    conn.commit()
+    conn.close()
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine
+    engine.dispose()
+
+
+def _version(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+
+
+def _assert_matches_models(engine):
+    inspector = inspect(engine)
+    assert set(Base.metadata.tables) <= set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        assert columns == {c.name for c in table.columns}, table.name
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        assert {i.name for i in table.indexes} <= indexes, table.name
+
+
+def test_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert run_migrations(engine) == [m.NAME for m in MIGRATIONS]
+    assert _version(engine) == MIGRATIONS[-1].VERSION
+    _assert_matches_models(engine)
+    assert run_migrations(engine) == []
+
+
+def test_upgrade_from_baseline(baseline_engine):
+    assert run_migrations(baseline_engine) == [m.NAME for m in MIGRATIONS]
+    assert _version(baseline_engine) == MIGRATIONS[-1].VERSION
+    _assert_matches_models(baseline_engine)
+
+    with baseline_engine.connect() as conn:
+        latest = dict(conn.execute(text("SELECT id, latest_snapshot_id FROM products")).all())
+        tracked = conn.execute(text("SELECT COUNT(*) FROM tracked_products")).scalar()
+        runs = conn.execute(text("SELECT DISTINCT repeat_count FROM price_history")).scalars().all()
+    assert latest == {"p1": "h4", "p2": "h5", "p3": None}
+    assert tracked == 1
+    assert runs == [1]
+
+
+def test_baseline_rollups_match_live_aggregation(baseline_engine):
+    run_migrations(baseline_engine)
+
+    class Snapshot:
+        def __init__(self, row):
+            _, self.product_id, self.price, self.bsr, _, self.review_count, _, recorded_at = row
+            self.recorded_at = datetime.fromisoformat(recorded_at).replace(tzinfo=timezone.utc)
+
+    expected = {}
+    for product_id in ("p1", "p2"):
+        snapshots = [Snapshot(row) for row in HISTORY if row[1] == product_id]
+        for row in _rollup_rows(product_id, snapshots):
+            key = (row["product_id"], row["resolution"], row["bucket_start"].replace(tzinfo=None))
+            expected[key] = row
+
+    with baseline_engine.connect() as conn:
+        stored = conn.execute(text("SELECT * FROM price_rollups")).mappings().all()
+    assert len(stored) == len(expected)
+    for row in stored:
+        bucket = datetime.fromisoformat(row["bucket_start"])
+        want = expected[(row["product_id"], row["resolution"], bucket)]
+        assert datetime.fromisoformat(row["last_recorded_at"]) == want["last_recorded_at"].replace(tzinfo=None)
+        for column in want:
+            if column not in ("product_id", "resolution", "bucket_start", "last_recorded_at"):
+                assert row[column] == pytest.approx(want[column]), (row["resolution"], bucket, column)
@@ -0,0 +1,63 @@
+"""The hot queries, compiled from the statements the app actually runs, are served by their indexes."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import create_engine, text
+from app.migrations import run_migrations
+from app.routers.analysis import portfolio_query, product_analysis_query
+from app.routers.competitors import crawl_entry_query, current_crawl_query
+from app.routers.products import recent_history_query, tracked_products_query, tracking_pair_query
+from app.services.amazon.history_rollups import raw_count_query, raw_history_query, rollup_query
+from app.services.analytics.export_stream import price_history_export_query, tracked_export_query
+from app.tasks import refresh_scheduler
+
+END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+START = END - timedelta(days=90)
+
+# name -> (statement, index that must serve it, whether the ORDER BY may need a sort)
+HOT_QUERIES = {
+    "recent history": (recent_history_query("p"), "ix_price_history_product_recorded", False),
+    "tracked list": (tracked_products_query("u"), "uq_tracked_products_user_product", False),
+    "tracking pair": (tracking_pair_query("u", "p"), "uq_tracked_products_user_product", False),
+    "scheduler trackers per product": (refresh_scheduler.tracked_products_query(), "ix_tracked_products_product", False),
+    "export range": (price_history_export_query("u", START, END), "ix_price_history_product_recorded", True),
+    "export range for one asin": (price_history_export_query("u", START, END, "a"), "ix_price_history_product_recorded", False),
+    "export tracked csv": (tracked_export_query("u"), "uq_tracked_products_user_product", False),
+    "history raw count": (raw_count_query("p", START, END), "ix_price_history_product_recorded", False),
+    "history raw rows": (raw_history_query("p", START, END), "ix_price_history_product_recorded", False),
+    "history rollups": (rollup_query("p", "day", START, END), "sqlite_autoindex_price_rollups_1", False),
+    "competitor crawl snapshots": (current_crawl_query("Toys", 10), "ix_competitor_snapshots_crawl_rank", False),
+    "competitor entry": (crawl_entry_query("c", "A"), "ix_competitor_snapshots_asin_crawled", False),
+    "portfolio analyses": (portfolio_query("u"), "sqlite_autoindex_product_analyses_1", False),
+    "product analysis": (product_analysis_query("A"), "sqlite_autoindex_product_analyses_1", False),
+}
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    # A schema of its own: rows other tests leave behind would skew the planner on tiny tables
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans')}/plans.db")
+    run_migrations(engine)
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        yield connection
+    engine.dispose()
+
+
+def _plan(conn, statement) -> list:
+    compiled = statement.compile(dialect=conn.dialect)
+    params = compiled.construct_params()
+    args = tuple(
+        value.isoformat(" ") if isinstance(value, datetime) else value
+        for value in (params[name] for name in compiled.positiontup)
+    )
+    return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled.string}", args)]
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_its_index(conn, name):
+    statement, index, may_sort = HOT_QUERIES[name]
+    plan = _plan(conn, statement)
+    assert any(index in step for step in plan), plan
+    assert not [step for step in plan if step.startswith("SCAN") and "INDEX" not in step], plan
+    if not may_sort:
+        assert not [step for step in plan if "TEMP B-TREE" in step], plan
@@ -0,0 +1,44 @@
+"""Reparsing archived pages must show up in analyses that were stored before the reparse."""
+import os
+from app.database import SessionLocal
+from app.services.amazon.page_archive import archive_page
+from app.services.amazon.product_store import apply_scrape
+from app.tasks.reparse_archive import reparse_archive
+
+ASIN = "B0REPARSE1"
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "product_page.html")
+
+
+def _portfolio_entry(client, auth_headers) -> dict:
+    response = client.get("/api/analysis/portfolio", headers=auth_headers)
+    assert response.status_code == 200
+    return next(p for p in response.json()["products"] if p["asin"] == ASIN)
+
+
+def test_reparse_replaces_stored_analysis(client, auth_headers):
+    url = f"https://www.amazon.com/dp/{ASIN}"
+    with open(FIXTURE, encoding="utf-8") as f:
+        sha = archive_page(url, 200, f.read(), asin=ASIN)
+    assert sha
+
+    # Scraped while a selector was broken: numbers that disagree with the archived page
+    db = SessionLocal()
+    try:
+        apply_scrape(db, ASIN, {
+            "title": "Water Bottle", "brand": "HydroPeak", "category": "Home & Kitchen",
+            "image_url": None, "amazon_url": url, "is_prime": True, "in_stock": True,
+            "price": 99.0, "bsr": 250000, "rating": 3.0, "review_count": 10, "page_sha256": sha,
+        })
+        db.commit()
+    finally:
+        db.close()
+    assert client.post(f"/api/products/{ASIN}/track", headers=auth_headers).status_code == 200
+
+    before = _portfolio_entry(client, auth_headers)
+    stats = reparse_archive(asin=ASIN, workers=1)
+    assert stats["snapshots_updated"] == 1
+    after = _portfolio_entry(client, auth_headers)
+
+    assert after["sales_estimate_monthly"] != before["sales_estimate_monthly"]
+    assert after["revenue_estimate_monthly"] == round(after["sales_estimate_monthly"] * 24.0, 2)
+    assert after["opportunity_score"] != before["opportunity_score"]
@@ -0,0 +1,58 @@
+"""The process write lock covers every kind of write a SessionLocal session makes."""
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import delete, select, text, update
+from app.database import SessionLocal, _write_lock, engine
+from app.migrations import run_migrations
+from app.models.lease import RefreshLease
+from app.models.product import PriceHistory
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    run_migrations(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+    assert not _write_lock.locked()
+
+
+def test_reads_do_not_take_the_lock(db):
+    db.execute(select(PriceHistory.id).limit(1)).all()
+    db.execute(text("SELECT COUNT(*) FROM price_history")).scalar()
+    assert not _write_lock.locked()
+
+
+def test_textual_delete_holds_the_lock_until_commit(db):
+    db.execute(text("DELETE FROM refresh_leases WHERE asin = :asin"), {"asin": "B0NOTHERE1"})
+    assert _write_lock.locked()
+    db.commit()
+    assert not _write_lock.locked()
+
+
+@pytest.mark.parametrize("statement", [
+    delete(RefreshLease).where(RefreshLease.asin == "B0NOTHERE1"),
+    update(PriceHistory).where(PriceHistory.id == "missing").values(price=1),
+])
+def test_bulk_dml_holds_the_lock(db, statement):
+    db.execute(statement)
+    assert _write_lock.locked()
+    db.rollback()
+    assert not _write_lock.locked()
+
+
+def test_query_delete_holds_the_lock(db):
+    db.query(RefreshLease).filter(RefreshLease.asin == "B0NOTHERE1").delete(synchronize_session=False)
+    assert _write_lock.locked()
+    db.commit()
+
+
+def test_flush_holds_the_lock(db):
+    db.add(RefreshLease(asin="B0LOCKTEST", owner="test", expires_at=datetime.now(timezone.utc)))
+    db.flush()
+    assert _write_lock.locked()
+    db.rollback()